@@ -0,0 +1,150 @@
+# admission.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Mapping, Optional
+
+# Header carrying the client's own timeout, in seconds
+TIMEOUT_HEADER = 'x-request-timeout'
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised by Deadline.check() once the request's time is up"""
+
+
+class RequestCancelled(RuntimeError):
+    """Raised by Deadline.check() once the request was cancelled, e.g. its client disconnected"""
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered, plus a cancel flag.
+
+    Long-running work calls check() between steps (chunks, solver classes,
+    search passes) and stops with DeadlineExceeded or RequestCancelled.
+    Picklable for process workers: the remaining time travels with it, the
+    cancel flag does not, so work in another process stops at the deadline
+    but not when the request is cancelled.
+    """
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+        self.reason = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self._cancelled.is_set() or time.monotonic() >= self.expires_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def extend(self, other: Optional['Deadline']):
+        """Push expires_at out to other's, if later; None never expires"""
+        self.expires_at = float('inf') if other is None else max(self.expires_at, other.expires_at)
+
+    def cancel(self, reason: str = 'cancelled'):
+        self.reason = reason
+        self._cancelled.set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise RequestCancelled(f"Request {self.reason}")
+        if time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def __getstate__(self):
+        return {'remaining': self.remaining(), 'reason': self.reason}
+
+    def __setstate__(self, state):
+        self.expires_at = time.monotonic() + state['remaining']
+        self._cancelled = threading.Event()
+        self.reason = state['reason']
+
+
+def deadline_from_headers(headers: Mapping[str, str], default: float, maximum: float) -> Deadline:
+    """
+    Deadline from the X-Request-Timeout header (seconds), or default when it
+    is missing or invalid; never longer than maximum
+    """
+    seconds = default
+    value = headers.get(TIMEOUT_HEADER)
+    if value:
+        try:
+            requested = float(value)
+        except ValueError:
+            requested = None
+        if requested is not None and requested > 0:
+            seconds = requested
+    return Deadline(min(seconds, maximum))
+
+
+class LimitExceeded(RuntimeError):
+    """Raised instead of admitting a request when its endpoint class is at its concurrency limit"""
+
+
+class ConcurrencyLimiter:
+    """
+    Per-endpoint-class caps on concurrent requests.
+
+    Each class (e.g. 'match', 'batch', 'allocate') admits at most its limit
+    at once; further requests are rejected right away with LimitExceeded,
+    so a burst of expensive requests cannot take every worker from the
+    cheap ones. Also counts how admitted requests ended: at their deadline,
+    cancelled, or failed with any other error.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._lock = threading.Lock()
+        self._counts = {
+            name: {'in_flight': 0, 'admitted': 0, 'rejected': 0, 'deadline_exceeded': 0, 'cancelled': 0,
+                   'failed': 0}
+            for name in self.limits
+        }
+
+    @classmethod
+    def from_env(cls, defaults: Dict[str, int], prefix: str = 'CONCURRENCY_') -> 'ConcurrencyLimiter':
+        """Defaults overridden by <prefix><CLASS> environment variables, e.g. CONCURRENCY_BATCH=4"""
+        return cls({name: int(os.environ.get(prefix + name.upper(), limit)) for name, limit in defaults.items()})
+
+    def acquire(self, name: str):
+        with self._lock:
+            counts = self._counts[name]
+            if counts['in_flight'] >= self.limits[name]:
+                counts['rejected'] += 1
+                raise LimitExceeded(f"Too many concurrent {name} requests (limit {self.limits[name]})")
+            counts['in_flight'] += 1
+            counts['admitted'] += 1
+
+    def release(self, name: str, outcome: Optional[BaseException] = None):
+        with self._lock:
+            counts = self._counts[name]
+            counts['in_flight'] -= 1
+            if isinstance(outcome, DeadlineExceeded):
+                counts['deadline_exceeded'] += 1
+            elif isinstance(outcome, RequestCancelled):
+                counts['cancelled'] += 1
+            elif outcome is not None:
+                counts['failed'] += 1
+
+    @contextmanager
+    def admit(self, name: str) -> Iterator[None]:
+        """Hold one slot of class name for the block"""
+        self.acquire(name)
+        outcome = None
+        try:
+            yield
+        except BaseException as e:
+            outcome = e
+            raise
+        finally:
+            self.release(name, outcome)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts, limit=self.limits[name]) for name, counts in self._counts.items()}
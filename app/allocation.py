@@ -0,0 +1,373 @@
+# allocation.py
+import heapq
+import time
+import numpy as np
+from typing import List, Dict, Any, Sequence, NamedTuple, Optional, Callable
+
+# Match scores are rounded to 2 decimals, so the solver works on integer
+# hundredths of a point
+SCORE_SCALE = 100
+UNREACHABLE = np.iinfo(np.int64).max // 4
+CLOSED = np.iinfo(np.int64).min // 4  # benefit of a destination without slots
+
+
+class AllocationResult(NamedTuple):
+    """Outcome of a cohort allocation"""
+    assignment: np.ndarray      # destination index per refugee, -1 when unplaced
+    objective: float            # sum of match scores of the placed refugees
+    placed: int
+    unplaced: int
+    loads: np.ndarray           # refugees placed per destination
+    match_scores: np.ndarray    # score of each refugee's placement, NaN when unplaced
+    method: str
+    iterations: int
+    elapsed: float
+
+
+def allocation_result(scores: np.ndarray, assignment: np.ndarray, method: str,
+                      iterations: int, started: float) -> AllocationResult:
+    """Summarize an assignment vector against its score matrix"""
+    placed_rows = np.nonzero(assignment >= 0)[0]
+    objective = float(scores[placed_rows, assignment[placed_rows]].sum()) if len(placed_rows) else 0.0
+    loads = np.bincount(assignment[placed_rows], minlength=scores.shape[1])
+    match_scores = np.full(len(assignment), np.nan)
+    match_scores[placed_rows] = scores[placed_rows, assignment[placed_rows]]
+    return AllocationResult(
+        assignment=assignment,
+        objective=round(objective, 2),
+        placed=len(placed_rows),
+        unplaced=len(assignment) - len(placed_rows),
+        loads=loads,
+        match_scores=match_scores,
+        method=method,
+        iterations=iterations,
+        elapsed=time.perf_counter() - started
+    )
+
+
+class _SiteFlow:
+    """
+    Successive-shortest-path min-cost flow for the transportation problem
+    "classes of identical refugees -> capacitated destinations".
+
+    Destinations carry potentials (minus their price), so every class sits
+    at a destination maximizing benefit + potential. A class is inserted by
+    repeatedly sending its refugees along the cheapest path to a destination
+    with free slots, where each hop moves refugees of one class from one
+    destination to another. Paths run over destinations only, so a search
+    costs O(M^2) however large the cohort is.
+    """
+
+    def __init__(self, benefit: np.ndarray, supply: np.ndarray, capacities: np.ndarray):
+        self.classes, self.sites = benefit.shape
+        self.open_sites = capacities > 0
+        self.benefit = np.where(self.open_sites, benefit, CLOSED)
+        self.supply = supply
+        self.free = capacities.copy()
+        self.flow = np.zeros((self.sites, self.classes), dtype=np.int64)  # destination-major
+        self.potential = np.zeros(self.sites, dtype=np.int64)
+        self.sink_potential = 0
+        self.searches = 0
+
+        # Cheapest move a -> b: the class at a losing least by moving to b
+        self.move_cost = np.full((self.sites, self.sites), UNREACHABLE, dtype=np.int64)
+        self.move_class = np.full((self.sites, self.sites), -1, dtype=np.int64)
+        self.stale = np.zeros((self.sites, self.sites), dtype=bool)
+        # Lazy heaps of (loss, class) behind move_cost, for when the best mover leaves
+        self.move_heaps = [[[] for _ in range(self.sites)] for _ in range(self.sites)]
+
+    def _change(self, cls: int, site: int, amount: int):
+        before = self.flow[site, cls]
+        self.flow[site, cls] = before + amount
+        if before == 0:
+            loss = self.benefit[cls, site] - self.benefit[cls]
+            for other, value in enumerate(loss.tolist()):
+                heapq.heappush(self.move_heaps[site][other], (value, cls))
+            better = loss < self.move_cost[site]
+            self.move_cost[site, better] = loss[better]
+            self.move_class[site, better] = cls
+        elif before + amount == 0:
+            lost = self.move_class[site] == cls
+            self.stale[site] |= lost
+            self.move_cost[site, lost] = UNREACHABLE
+
+    def _refresh_moves(self):
+        for site, other in zip(*np.nonzero(self.stale)):
+            heap, held = self.move_heaps[site][other], self.flow[site]
+            while heap and held[heap[0][1]] == 0:
+                heapq.heappop(heap)
+            self.move_cost[site, other], self.move_class[site, other] = heap[0] if heap else (UNREACHABLE, -1)
+        self.stale[:] = False
+
+    def insert(self, cls: int):
+        """Place every refugee of a class, keeping the flow optimal"""
+        remaining = int(self.supply[cls])
+        while remaining:
+            value = self.benefit[cls] + self.potential
+            best_value = value.max()
+            # A best destination with free slots at the sink level is a zero-cost path
+            direct = np.nonzero((value == best_value) & (self.free > 0)
+                                & (self.potential == self.sink_potential))[0]
+            if len(direct):
+                site = int(direct[0])
+                amount = min(remaining, int(self.free[site]))
+                self._change(cls, site, amount)
+                self.free[site] -= amount
+                remaining -= amount
+                continue
+
+            path = self._shortest_path(best_value - value)
+            amount = min(remaining, int(self.free[path[-1]]))
+            moves = [(int(self.move_class[a, b]), a, b) for a, b in zip(path, path[1:])]
+            for mover, a, _ in moves:
+                amount = min(amount, int(self.flow[a, mover]))
+            self._change(cls, path[0], amount)
+            for mover, a, b in moves:
+                self._change(mover, a, -amount)
+                self._change(mover, b, amount)
+            self.free[path[-1]] -= amount
+            remaining -= amount
+
+    def _shortest_path(self, entry_cost: np.ndarray) -> List[int]:
+        """
+        Dijkstra over destinations on reduced costs; returns the destinations
+        from entry to the one with a free slot and updates the potentials
+        """
+        self.searches += 1
+        self._refresh_moves()
+        dist = np.where(self.open_sites, entry_cost, UNREACHABLE)
+        previous = np.full(self.sites, -1, dtype=np.int64)
+        done = np.zeros(self.sites, dtype=bool)
+        best, target = UNREACHABLE, -1
+        while True:
+            site = int(np.argmin(np.where(done, UNREACHABLE, dist)))
+            if done[site] or dist[site] >= best:
+                break
+            done[site] = True
+            if self.free[site] > 0 and dist[site] + self.potential[site] - self.sink_potential < best:
+                best, target = dist[site] + self.potential[site] - self.sink_potential, site
+            reachable = self.move_cost[site] < UNREACHABLE
+            candidate = dist[site] + self.move_cost[site] + self.potential[site] - self.potential
+            better = reachable & ~done & self.open_sites & (candidate < dist)
+            dist[better] = candidate[better]
+            previous[better] = site
+
+        self.potential += np.minimum(np.where(done, dist, best), best)
+        self.sink_potential += best
+        path = [target]
+        while previous[path[-1]] >= 0:
+            path.append(int(previous[path[-1]]))
+        return path[::-1]
+
+
+def solve_capacitated_assignment(scores: np.ndarray, capacities: Sequence[int],
+                                 check: Optional[Callable[[], Any]] = None) -> AllocationResult:
+    """
+    Maximum-total-score placement of N refugees into M capacitated destinations.
+
+    Solves the capacitated assignment (transportation) problem exactly as a
+    min-cost flow on integer hundredths of a point. Refugees with identical
+    score rows are merged into one class first; real cohorts have a few
+    hundred distinct rows, which is what keeps 50k-refugee cohorts fast.
+    Scores must be positive, as every match score is, so nobody is left
+    unplaced while a slot is free; when the cohort exceeds total capacity,
+    the refugees whose placement adds the least stay unplaced.
+
+    `check`, when given, is called between refugee classes; raise from it
+    (e.g. on a request deadline) to abandon the solve.
+    """
+    started = time.perf_counter()
+    scores = np.asarray(scores, dtype=np.float64)
+    n, m = scores.shape
+    capacities = np.asarray(capacities, dtype=np.int64)
+    if capacities.shape != (m,) or (capacities < 0).any():
+        raise ValueError("capacities must give a non-negative slot count for every destination")
+
+    if n == 0 or capacities.sum() == 0:
+        return allocation_result(scores, np.full(n, -1, dtype=np.int64), 'min_cost_flow', 0, started)
+
+    # Everyone fits at their favourite destination: nothing to solve
+    favourite = np.argmax(np.where(capacities > 0, scores, -np.inf), axis=1)
+    if (np.bincount(favourite, minlength=m) <= capacities).all():
+        return allocation_result(scores, favourite, 'min_cost_flow', 0, started)
+
+    # A zero-score "unplaced" destination absorbs whoever does not fit
+    capacities = np.minimum(capacities, n)
+    benefit = np.rint(scores * SCORE_SCALE).astype(np.int64)
+    overflow = n - int(capacities.sum())
+    if overflow > 0:
+        benefit = np.hstack([benefit, np.zeros((n, 1), dtype=np.int64)])
+        capacities = np.append(capacities, overflow)
+
+    classes, members, supply = np.unique(benefit, axis=0, return_inverse=True, return_counts=True)
+    flow = _SiteFlow(classes, supply, capacities)
+    for cls in np.argsort(-supply, kind='stable'):
+        if check is not None:
+            check()
+        flow.insert(int(cls))
+
+    # Hand each class's destinations out to its refugees in input order
+    assignment = np.empty(n, dtype=np.int64)
+    by_class = np.argsort(members.ravel(), kind='stable')
+    assignment[by_class] = np.concatenate(
+        [np.repeat(np.arange(flow.sites), flow.flow[:, cls]) for cls in range(len(classes))])
+    assignment[assignment >= m] = -1
+    return allocation_result(scores, assignment, 'min_cost_flow', flow.searches, started)
+
+
+class SearchProgress(NamedTuple):
+    """Snapshot passed to the local-search progress callback after every pass"""
+    passes: int
+    moves: int          # improving moves applied so far
+    objective: float
+    elapsed: float
+
+
+def greedy_assignment(scores: np.ndarray, capacities: Sequence[int]) -> np.ndarray:
+    """
+    Rounds of "every unplaced refugee asks for its best destination with free
+    slots; each destination keeps the highest scores". Every round fills at
+    least one destination, so it takes at most M + 1 vectorized rounds.
+    """
+    n, m = scores.shape
+    assignment = np.full(n, -1, dtype=np.int64)
+    free = np.asarray(capacities, dtype=np.int64).copy()
+    pending = np.arange(n)
+    while len(pending) and free.any():
+        values = np.where(free > 0, scores[pending], -np.inf)
+        choice = np.argmax(values, axis=1)
+        order = np.lexsort((-values[np.arange(len(pending)), choice], choice))
+        choice = choice[order]
+        rank = np.arange(len(choice)) - np.searchsorted(choice, choice, side='left')
+        accepted = rank < free[choice]
+        assignment[pending[order[accepted]]] = choice[accepted]
+        free -= np.bincount(choice[accepted], minlength=m)
+        pending = pending[order[~accepted]]
+    return assignment
+
+
+def _relocate_into_free_slots(benefit: np.ndarray, assignment: np.ndarray, current: np.ndarray,
+                              free: np.ndarray) -> int:
+    """Move the refugees gaining most into destinations with free slots"""
+    moves = 0
+    for site in np.nonzero(free > 0)[0]:
+        gain = benefit[:, site] - current
+        gain[assignment == site] = 0
+        wanted = min(int(free[site]), int(np.count_nonzero(gain > 0)))
+        if not wanted:
+            continue
+        movers = np.argpartition(-gain, wanted - 1)[:wanted]
+        left = assignment[movers]
+        np.add.at(free, left[left >= 0], 1)
+        free[site] -= wanted
+        assignment[movers] = site
+        current[movers] = benefit[movers, site]
+        moves += wanted
+    return moves
+
+
+def _swap_between(benefit: np.ndarray, assignment: np.ndarray, current: np.ndarray,
+                  a: int, b: int) -> int:
+    """
+    Best batch of pairwise swaps between destinations a and b (-1 = unplaced).
+    A swap's gain splits into one term per refugee, so pairing the largest
+    gains of each side in order finds every improving swap at once.
+    """
+    side_a, side_b = np.nonzero(assignment == a)[0], np.nonzero(assignment == b)[0]
+    if not len(side_a) or not len(side_b):
+        return 0
+    gain_a = (benefit[side_a, b] if b >= 0 else 0) - current[side_a]
+    gain_b = (benefit[side_b, a] if a >= 0 else 0) - current[side_b]
+    order_a, order_b = np.argsort(-gain_a), np.argsort(-gain_b)
+    size = min(len(side_a), len(side_b))
+    total = gain_a[order_a[:size]] + gain_b[order_b[:size]]
+    swaps = int(np.count_nonzero(total > 0))  # pair gains are non-increasing
+    if not swaps:
+        return 0
+    movers_a, movers_b = side_a[order_a[:swaps]], side_b[order_b[:swaps]]
+    assignment[movers_a], assignment[movers_b] = b, a
+    current[movers_a] = benefit[movers_a, b] if b >= 0 else 0
+    current[movers_b] = benefit[movers_b, a] if a >= 0 else 0
+    return swaps
+
+
+def improve_assignment(scores: np.ndarray, capacities: Sequence[int], time_budget: float = 1.0,
+                       assignment: Optional[np.ndarray] = None,
+                       progress: Optional[Callable[[SearchProgress], Any]] = None) -> AllocationResult:
+    """
+    Anytime allocator: start from a greedy assignment (or the one given) and
+    apply relocate and swap moves until no move improves the total score or
+    the time budget (seconds) runs out. Every applied move is improving, so
+    the assignment returned is always the best found so far.
+
+    `progress` is called with a SearchProgress after every pass; returning
+    False from it stops the search early.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    scores = np.asarray(scores, dtype=np.float64)
+    n, m = scores.shape
+    capacities = np.asarray(capacities, dtype=np.int64)
+    if capacities.shape != (m,) or (capacities < 0).any():
+        raise ValueError("capacities must give a non-negative slot count for every destination")
+
+    if assignment is None:
+        assignment = greedy_assignment(scores, capacities)
+    else:
+        assignment = np.asarray(assignment, dtype=np.int64).copy()
+    loads = np.bincount(assignment[assignment >= 0], minlength=m)
+    if (loads > capacities).any():
+        raise ValueError("initial assignment exceeds destination capacities")
+
+    # Integer hundredths, so gains are compared exactly
+    benefit = np.rint(scores * SCORE_SCALE).astype(np.int64)
+    current = np.where(assignment >= 0, benefit[np.arange(n), np.maximum(assignment, 0)], 0)
+    free = capacities - loads
+    sites = list(range(m)) + [-1]
+
+    passes = moves = 0
+    while time.perf_counter() < deadline:
+        passes += 1
+        pass_moves = _relocate_into_free_slots(benefit, assignment, current, free)
+        for i, a in enumerate(sites):
+            for b in sites[i + 1:]:
+                if time.perf_counter() >= deadline:
+                    break
+                pass_moves += _swap_between(benefit, assignment, current, a, b)
+        moves += pass_moves
+        if progress is not None:
+            snapshot = SearchProgress(passes, moves, round(int(current.sum()) / SCORE_SCALE, 2),
+                                      time.perf_counter() - started)
+            if progress(snapshot) is False:
+                break
+        if not pass_moves:
+            break  # local optimum
+
+    return allocation_result(scores, assignment, 'local_search', passes, started)
+
+
+def capacities_for(names: Sequence[str], capacities: Dict[str, int]) -> List[int]:
+    """Order a name -> slots mapping by destination; unknown names raise ValueError"""
+    unknown = set(capacities) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown destinations: {', '.join(sorted(unknown))}")
+    return [int(capacities.get(name, 0)) for name in names]
+
+
+def allocate_cohort(profiles: Sequence[Dict[str, Any]], capacities: Dict[str, int],
+                    catalog=None, time_budget: Optional[float] = None) -> AllocationResult:
+    """
+    Place a cohort into global cities with fixed slot capacities (city name ->
+    slots). With time_budget (seconds), run the anytime local search instead
+    of the exact solver.
+    """
+    from refugee_matcher import get_global_catalog
+    from batch_scoring import score_matrix
+
+    if catalog is None:
+        catalog = get_global_catalog()
+    slots = capacities_for([city.name for city in catalog], capacities)
+    scores = score_matrix(profiles, catalog, components=False)['total_score']
+    if time_budget is not None:
+        return improve_assignment(scores, slots, time_budget=time_budget)
+    return solve_capacitated_assignment(scores, slots)
@@ -0,0 +1,262 @@
+# batch_scoring.py
+import numpy as np
+from itertools import product
+from typing import List, Dict, Any, Sequence, Tuple, Optional, Iterable
+
+from refugee_matcher import GLOBAL_SCORE_WEIGHTS
+from ranking import top_k_indices
+
+# Overlap-scored components and the profile/destination field they count
+OVERLAP_COMPONENTS = {
+    'language_score': 'languages',
+    'job_score': 'job_skills',
+    'health_score': 'health_requirements',
+}
+MAX_OVERLAP = 4  # Every overlap of 4 or more is already capped at 10 points
+
+# Values of the remaining components, indexed by their encoded level
+EDUCATION_LEVELS = [5, 10]        # index: education level offered
+MENTAL_HEALTH_LEVELS = [0, 10]    # index: need is met
+CULTURAL_LEVELS = [5, 10]         # index: community present
+COST_LEVELS = [0, -1, -2]         # index: cost penalty
+
+
+class ScoringScheme:
+    """
+    Component levels, weights and total lookup table of one score function.
+
+    `weights` is the score function's weights dict (its order is the
+    summation order) and `overlap_points` the points per overlapping term of
+    each overlap component, e.g. {'language_score': 2.5, ...}.
+    """
+
+    def __init__(self, weights: Dict[str, float], overlap_points: Dict[str, float]):
+        self.weights = dict(weights)
+        self.components = list(self.weights)
+        fixed_levels = {
+            'education_score': EDUCATION_LEVELS,
+            'mental_health_score': MENTAL_HEALTH_LEVELS,
+            'cultural_score': CULTURAL_LEVELS,
+            'cost_adjustment': COST_LEVELS,
+        }
+        self.levels = {}
+        for key in self.components:
+            if key in OVERLAP_COMPONENTS:
+                points = overlap_points[key]
+                self.levels[key] = [min(10, count * points) for count in range(MAX_OVERLAP + 1)]
+            else:
+                self.levels[key] = fixed_levels[key]
+        self.level_values = {key: np.array(values, dtype=np.float64) for key, values in self.levels.items()}
+        self.total_table = self._build_total_table()
+
+    def uses(self, component: str) -> bool:
+        return component in self.weights
+
+    def _build_total_table(self) -> np.ndarray:
+        """Precompute the rounded total for every combination of component levels"""
+        shape = tuple(len(self.levels[key]) for key in self.components)
+        table = np.zeros(shape, dtype=np.float64)
+        for index in product(*(range(size) for size in shape)):
+            scores = {key: self.levels[key][level] for key, level in zip(self.components, index)}
+            # Same arithmetic as the per-pair function so totals are bit-identical
+            total_score = sum(scores[key] * weight for key, weight in self.weights.items())
+            table[index] = round(total_score, 2)
+        return table
+
+
+# calculate_global_match_score in refugee_matcher.py
+GLOBAL_SCHEME = ScoringScheme(GLOBAL_SCORE_WEIGHTS, {
+    'language_score': 2.5,
+    'job_score': 2.5,
+    'health_score': 3,
+})
+COMPONENT_ORDER = GLOBAL_SCHEME.components
+
+
+class EncodedCities:
+    """
+    Multi-hot encoding of a destination list, reusable across cohorts.
+
+    By default the vocabularies are built from the destinations. Passing
+    fixed `vocabularies` (field -> {term: row}) encodes the cities against
+    them instead, dropping destination terms they do not contain, so the
+    result lines up with profiles encoded against another EncodedCities.
+    """
+
+    def __init__(self, cities: Sequence[Dict[str, Any]],
+                 vocabularies: Optional[Dict[str, Dict[str, int]]] = None):
+        # Accepts raw city dicts or catalog Destinations (via their frozen record)
+        self.cities = [getattr(city, 'record', city) for city in cities]
+        self.size = len(self.cities)
+
+        # Vocabularies are taken from the destination side only: a refugee term
+        # that no destination offers can never contribute to an overlap
+        self.vocabularies = {}
+        self.matrices = {}
+        for field in list(OVERLAP_COMPONENTS.values()) + ['education_levels']:
+            if vocabularies is None:
+                vocab = {}
+                for city in self.cities:
+                    for term in city[field]:
+                        vocab.setdefault(term, len(vocab))
+            else:
+                vocab = vocabularies[field]
+            matrix = np.zeros((len(vocab) + 1, self.size), dtype=np.float32)
+            for col, city in enumerate(self.cities):
+                for term in city[field]:
+                    matrix[vocab.get(term, -1), col] = 1
+            matrix[-1] = 0
+            # The trailing all-zero row absorbs unknown terms (index -1)
+            self.vocabularies[field] = vocab
+            self.matrices[field] = matrix
+
+        self.mental_health_support = np.array(
+            [bool(city['mental_health_support']) for city in self.cities], dtype=bool)
+        # US states carry no cost of living; only schemes with a cost component need it
+        cost_of_living = [city.get('cost_of_living') for city in self.cities]
+        if None in cost_of_living:
+            self.cost_ge_7 = self.cost_ge_8 = None
+        else:
+            cost_of_living = np.array(cost_of_living)
+            self.cost_ge_7 = cost_of_living >= 7
+            self.cost_ge_8 = cost_of_living >= 8
+        self.communities_lower = [
+            [comm.lower() for comm in city.get('refugee_communities', [])] for city in self.cities
+        ]
+        self._cultural_cache = {}
+
+    def cultural_match(self, culture: str) -> np.ndarray:
+        """Boolean row of destinations whose communities contain the given culture"""
+        row = self._cultural_cache.get(culture)
+        if row is None:
+            row = np.array([any(culture in comm for comm in communities)
+                            for communities in self.communities_lower], dtype=bool)
+            self._cultural_cache[culture] = row
+        return row
+
+
+class EncodedProfiles:
+    """Multi-hot encoding of a refugee cohort against an EncodedCities vocabulary"""
+
+    def __init__(self, profiles: Sequence[Dict[str, Any]], cities: EncodedCities,
+                 scheme: ScoringScheme = GLOBAL_SCHEME):
+        self.size = len(profiles)
+        self.multi_hot = {}
+        for field in OVERLAP_COMPONENTS.values():
+            vocab = cities.vocabularies[field]
+            matrix = np.zeros((self.size, len(vocab) + 1), dtype=np.float32)
+            for row, refugee in enumerate(profiles):
+                for term in refugee.get(field, []):
+                    matrix[row, vocab.get(term, -1)] = 1
+            self.multi_hot[field] = matrix
+
+        edu_vocab = cities.vocabularies['education_levels']
+        self.education_index = np.array(
+            [edu_vocab.get(refugee.get('education_level', ''), -1) for refugee in profiles],
+            dtype=np.intp)
+        self.needs_mental_health = np.array(
+            [bool(refugee.get('mental_health_support_needed', False)) for refugee in profiles],
+            dtype=bool)
+
+        # Family size and culture are only read when the scheme scores them, as
+        # in the per-pair functions (the state score accepts None for both)
+        if scheme.uses('cost_adjustment'):
+            family_sizes = [refugee.get('family_size', 1) for refugee in profiles]
+            self.family_gt_3 = np.array([size > 3 for size in family_sizes], dtype=bool)
+            self.family_gt_2 = np.array([size > 2 for size in family_sizes], dtype=bool)
+
+        if scheme.uses('cultural_score'):
+            cultures = [refugee.get('cultural_background', '').lower() for refugee in profiles]
+            unique_cultures = {}
+            self.culture_index = np.array(
+                [unique_cultures.setdefault(culture, len(unique_cultures)) for culture in cultures],
+                dtype=np.intp)
+            self.cultures = list(unique_cultures)
+
+
+def _component_levels(profiles: EncodedProfiles, cities: EncodedCities,
+                      scheme: ScoringScheme, rows: slice,
+                      keys: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute the level index of every scheme component for a block of
+    profiles, or only of the components in `keys`
+    """
+    wanted = set(scheme.components if keys is None else keys)
+    levels = {}
+    for key, field in OVERLAP_COMPONENTS.items():
+        if key in wanted:
+            overlap = profiles.multi_hot[field][rows] @ cities.matrices[field]
+            levels[key] = np.minimum(overlap, MAX_OVERLAP).astype(np.intp)
+
+    if 'education_score' in wanted:
+        levels['education_score'] = cities.matrices['education_levels'][
+            profiles.education_index[rows]].astype(np.intp)
+
+    if 'mental_health_score' in wanted:
+        levels['mental_health_score'] = (
+            ~profiles.needs_mental_health[rows, None] | cities.mental_health_support[None, :]
+        ).astype(np.intp)
+
+    if 'cultural_score' in wanted and scheme.uses('cultural_score'):
+        cultural_rows = np.array([cities.cultural_match(culture) for culture in profiles.cultures],
+                                 dtype=bool).reshape(len(profiles.cultures), cities.size)
+        levels['cultural_score'] = cultural_rows[profiles.culture_index[rows]].astype(np.intp)
+
+    if 'cost_adjustment' in wanted and scheme.uses('cost_adjustment'):
+        # Mirrors the if/elif penalty: 2 for big families in expensive cities, else 1
+        big = profiles.family_gt_3[rows, None] & cities.cost_ge_8[None, :]
+        mid = profiles.family_gt_2[rows, None] & cities.cost_ge_7[None, :]
+        levels['cost_adjustment'] = np.where(big, 2, np.where(mid, 1, 0)).astype(np.intp)
+    return levels
+
+
+def score_matrix(profiles: Sequence[Dict[str, Any]], cities: Sequence[Dict[str, Any]],
+                 components: bool = True, chunk_size: int = 4096,
+                 scheme: ScoringScheme = GLOBAL_SCHEME) -> Dict[str, np.ndarray]:
+    """
+    Score every refugee profile against every city in one pass.
+
+    Returns a dict of N x M arrays keyed like calculate_global_match_score's
+    result ('language_score', ..., 'total_score'). Values are identical to
+    calling calculate_global_match_score for each pair. With components=False
+    only 'total_score' is returned. Pass another scheme (e.g. the state score
+    of RefugeeStateMatcher) to reproduce a different per-pair function.
+    """
+    encoded_cities = cities if isinstance(cities, EncodedCities) else EncodedCities(cities)
+    encoded_profiles = EncodedProfiles(profiles, encoded_cities, scheme)
+    n, m = encoded_profiles.size, encoded_cities.size
+
+    keys = scheme.components + ['total_score'] if components else ['total_score']
+    results = {key: np.empty((n, m), dtype=np.float64) for key in keys}
+    flat_table = scheme.total_table.ravel()
+
+    for start in range(0, n, chunk_size):
+        rows = slice(start, min(start + chunk_size, n))
+        levels = _component_levels(encoded_profiles, encoded_cities, scheme, rows)
+        flat_index = np.ravel_multi_index(tuple(levels[key] for key in scheme.components),
+                                          scheme.total_table.shape)
+        results['total_score'][rows] = flat_table[flat_index]
+        if components:
+            for key in scheme.components:
+                results[key][rows] = scheme.level_values[key][levels[key]]
+
+    return results
+
+
+def top_k_matrix(profiles: Sequence[Dict[str, Any]], cities: Sequence[Dict[str, Any]],
+                 top_k: int, scheme: ScoringScheme = GLOBAL_SCHEME) -> Tuple[np.ndarray, np.ndarray]:
+    """Best-first city indices (N x k) and their total scores for every profile"""
+    totals = score_matrix(profiles, cities, components=False, scheme=scheme)['total_score']
+    indices = top_k_indices(totals, top_k)
+    return indices, np.take_along_axis(totals, indices, axis=1)
+
+
+def score_pairs(profiles: Sequence[Dict[str, Any]], cities: Sequence[Dict[str, Any]],
+                scheme: ScoringScheme = GLOBAL_SCHEME) -> List[List[Dict[str, float]]]:
+    """Batch equivalent of [[calculate_global_match_score(p, c) for c in cities] for p in profiles]"""
+    matrix = score_matrix(profiles, cities, scheme=scheme)
+    keys = scheme.components + ['total_score']
+    return [
+        [{key: float(matrix[key][i, j]) for key in keys} for j in range(matrix['total_score'].shape[1])]
+        for i in range(matrix['total_score'].shape[0])
+    ]
@@ -0,0 +1,239 @@
+# catalog.py
+import bisect
+import hashlib
+import json
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, NamedTuple, Iterator, Tuple, Iterable
+
+# Destination attributes matched against a refugee profile's lists
+SET_FIELDS = ('languages', 'job_skills', 'education_levels', 'health_requirements')
+
+# Location attributes with a value -> destination IDs postings index
+LOCATION_FIELDS = ('region', 'country', 'sub_region')
+
+# Overlap-scored attributes with a term -> destination IDs postings index
+TERM_FIELDS = ('languages', 'job_skills', 'health_requirements')
+
+# Catalog versions sum per-destination digests modulo this, so replacing one
+# destination updates the version without hashing the others again
+VERSION_MODULUS = 1 << 160
+
+
+def _read_only(mapping: Dict) -> MappingProxyType:
+    """mapping as a read-only view, without stacking views on ones shared from another catalog"""
+    return mapping if isinstance(mapping, MappingProxyType) else MappingProxyType(mapping)
+
+
+def _record_digest(dest_id: int, record: Dict[str, Any]) -> int:
+    payload = json.dumps([dest_id, record], sort_keys=True, default=str).encode('utf-8')
+    return int.from_bytes(hashlib.sha1(payload).digest(), 'big')
+
+
+class Destination(NamedTuple):
+    """Precompiled, read-only view of one destination record"""
+    id: int
+    name: str
+    country: Optional[str]
+    region: Optional[str]
+    sub_region: Optional[str]
+    languages: frozenset
+    job_skills: frozenset
+    education_levels: frozenset
+    health_requirements: frozenset
+    mental_health_support: bool
+    refugee_communities: Tuple[str, ...]
+    communities_lower: Tuple[str, ...]
+    job_market_score: int
+    support_services_score: int
+    cost_of_living: Optional[int]
+    record: MappingProxyType
+
+    @classmethod
+    def from_record(cls, dest_id: int, record: Dict[str, Any], name_key: str = 'city') -> 'Destination':
+        """Build a destination from a raw city/state dict"""
+        frozen_record = {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in record.items()
+        }
+        communities = tuple(record.get('refugee_communities', []))
+        return cls(
+            id=dest_id,
+            name=record[name_key],
+            country=record.get('country'),
+            region=record.get('region'),
+            sub_region=record.get('sub_region'),
+            languages=frozenset(record['languages']),
+            job_skills=frozenset(record['job_skills']),
+            education_levels=frozenset(record['education_levels']),
+            health_requirements=frozenset(record['health_requirements']),
+            mental_health_support=bool(record['mental_health_support']),
+            refugee_communities=communities,
+            communities_lower=tuple(comm.lower() for comm in communities),
+            job_market_score=record['job_market_score'],
+            support_services_score=record['support_services_score'],
+            cost_of_living=record.get('cost_of_living'),
+            record=MappingProxyType(frozen_record)
+        )
+
+
+class DestinationCatalog:
+    """
+    Immutable destination catalog built once and shared by the matchers.
+
+    Holds pre-built attribute sets, lowercased community names, integer
+    destination IDs (positions in the catalog), region / country /
+    sub-region -> IDs postings and language / job skill / health requirement
+    -> IDs postings. `version` is a content hash, so two catalogs with the
+    same data share it.
+
+    Records must be JSON-like (lists, not tuples), as records() returns them.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], name_key: str = 'city'):
+        destinations = tuple(
+            Destination.from_record(dest_id, record, name_key)
+            for dest_id, record in enumerate(records)
+        )
+        postings = {field: {} for field in LOCATION_FIELDS}
+        term_postings = {field: {} for field in TERM_FIELDS}
+        for dest in destinations:
+            for field in LOCATION_FIELDS:
+                value = getattr(dest, field)
+                if value is not None:
+                    postings[field].setdefault(value, []).append(dest.id)
+            for field in TERM_FIELDS:
+                for term in getattr(dest, field):
+                    term_postings[field].setdefault(term, []).append(dest.id)
+
+        digests = sum(_record_digest(dest_id, record) for dest_id, record in enumerate(records))
+        self._set_state(
+            name_key, destinations, {dest.name: dest.id for dest in destinations},
+            {field: {value: frozenset(ids) for value, ids in index.items()} for field, index in postings.items()},
+            {field: {term: tuple(ids) for term, ids in index.items()} for field, index in term_postings.items()},
+            digests % VERSION_MODULUS)
+
+    def _set_state(self, name_key: str, destinations: Tuple[Destination, ...], ids_by_name: Dict[str, int],
+                   postings: Dict[str, Dict[Any, frozenset]], term_postings: Dict[str, Dict[str, tuple]],
+                   digests: int):
+        object.__setattr__(self, 'name_key', name_key)
+        object.__setattr__(self, 'destinations', destinations)
+        object.__setattr__(self, 'ids_by_name', _read_only(ids_by_name))
+        object.__setattr__(self, 'postings', MappingProxyType(
+            {field: _read_only(index) for field, index in postings.items()}))
+        object.__setattr__(self, 'term_postings', MappingProxyType(
+            {field: _read_only(index) for field, index in term_postings.items()}))
+        object.__setattr__(self, '_digests', digests)
+        object.__setattr__(self, 'version', ('%040x' % digests)[:12])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __len__(self) -> int:
+        return len(self.destinations)
+
+    def __iter__(self) -> Iterator[Destination]:
+        return iter(self.destinations)
+
+    def __getitem__(self, dest_id: int) -> Destination:
+        return self.destinations[dest_id]
+
+    def get(self, name: str) -> Optional[Destination]:
+        """Look up a destination by its exact name"""
+        dest_id = self.ids_by_name.get(name)
+        return None if dest_id is None else self.destinations[dest_id]
+
+    @property
+    def region_index(self) -> MappingProxyType:
+        """Region -> destination IDs"""
+        return self.postings['region']
+
+    def candidates(self, regions: Optional[Iterable[str]] = None,
+                   countries: Optional[Iterable[str]] = None,
+                   sub_regions: Optional[Iterable[str]] = None) -> List[int]:
+        """
+        IDs of destinations passing every location filter, in catalog order.
+
+        Each filter is a list of accepted values; an empty list, None or a
+        list containing 'Any' disables it. Values within a filter are unioned,
+        and the filters are combined by intersection.
+        """
+        selected = None
+        for field, wanted in (('region', regions), ('country', countries), ('sub_region', sub_regions)):
+            if not wanted or 'Any' in wanted:
+                continue
+            index = self.postings[field]
+            matched = frozenset().union(*(index.get(value, ()) for value in wanted))
+            selected = matched if selected is None else selected & matched
+            if not selected:
+                return []
+        if selected is None:
+            return list(range(len(self.destinations)))
+        return sorted(selected)
+
+    def replace(self, name: str, changes: Dict[str, Any]) -> 'DestinationCatalog':
+        """
+        Return a new catalog with some fields of the named destination changed.
+
+        Destination IDs keep their positions, so matrices indexed by ID stay
+        aligned; the new catalog gets its own content `version`. Only the
+        changed destination is rebuilt: the others, and every postings list
+        it is not in, are shared with this catalog.
+        """
+        dest_id = self.ids_by_name.get(name)
+        if dest_id is None:
+            raise ValueError(f"Unknown destination: {name}")
+        old = self.destinations[dest_id]
+        record = self._json_record(old)
+        record.update(changes)
+        new = Destination.from_record(dest_id, record, self.name_key)
+
+        ids_by_name = self.ids_by_name
+        if new.name != old.name:
+            ids_by_name = dict(ids_by_name)
+            del ids_by_name[old.name]
+            ids_by_name[new.name] = dest_id
+        postings = dict(self.postings)
+        for field in LOCATION_FIELDS:
+            before, after = getattr(old, field), getattr(new, field)
+            if before == after:
+                continue
+            index = postings[field] = dict(postings[field])
+            if before is not None:
+                remaining = index[before] - {dest_id}
+                if remaining:
+                    index[before] = remaining
+                else:
+                    del index[before]
+            if after is not None:
+                index[after] = index.get(after, frozenset()) | {dest_id}
+        term_postings = dict(self.term_postings)
+        for field in TERM_FIELDS:
+            before, after = getattr(old, field), getattr(new, field)
+            if before == after:
+                continue
+            index = term_postings[field] = dict(term_postings[field])
+            for term in before - after:
+                ids = tuple(other for other in index[term] if other != dest_id)
+                if ids:
+                    index[term] = ids
+                else:
+                    del index[term]
+            for term in after - before:
+                ids = list(index.get(term, ()))
+                bisect.insort(ids, dest_id)
+                index[term] = tuple(ids)
+
+        digests = (self._digests - _record_digest(dest_id, self._json_record(old))
+                   + _record_digest(dest_id, record)) % VERSION_MODULUS
+        destinations = self.destinations[:dest_id] + (new,) + self.destinations[dest_id + 1:]
+        catalog = object.__new__(DestinationCatalog)
+        catalog._set_state(self.name_key, destinations, ids_by_name, postings, term_postings, digests)
+        return catalog
+
+    @staticmethod
+    def _json_record(dest: Destination) -> Dict[str, Any]:
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in dest.record.items()}
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return fresh, mutable copies of the raw destination dicts"""
+        return [self._json_record(dest) for dest in self.destinations]
@@ -1,16 +1,103 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import pandas as pd
-import numpy as np
-import uvicorn
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse, Response
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from typing import List, Dict, Any, Optional, NamedTuple, Tuple, Iterator, AsyncIterator, Union, Literal, TYPE_CHECKING
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import json
+import os
+import sys
+import time
 from datetime import datetime
+from functools import lru_cache
+
+# src/ holds the shared packages (monitoring, scoring, ...); docker-compose puts it on PYTHONPATH
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(APP_DIR), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from monitoring.metrics import Registry, RequestMetricsMiddleware, FileVersion, info_values, CONTENT_TYPE
+from monitoring.profiling import RequestProfiler, profiled_call
+from monitoring.memory import MemoryTracker
+from scoring.state_masks import _popcount, MASK_FIELDS, STATE_SCORE_WEIGHTS, TermVocabulary, ProfileMasks
+from catalog import DestinationCatalog, Destination
+from ranking import select_top_k, top_k_indices
+from score_cache import ScoreCache, canonical_profile_key, STATE_PROFILE_FIELDS
+from worker_pool import WorkerPool, PoolSaturated
+from single_flight import SingleFlight
+from profile_decoding import BatchProfileDecoder
+from admission import (Deadline, DeadlineExceeded, RequestCancelled, ConcurrencyLimiter, LimitExceeded,
+                       deadline_from_headers)
+from serialization import (FastJSONResponse, dumps_json, Preserialized, preserialize, cached_json_response,
+                           JSON_ENCODER, JSON_TYPE, NDJSON_TYPE, BINARY_TYPES, media_type, format_available, negotiate)
+from wire_format import SCORE_COLUMNS, STATE_COLUMNS, batch_encoder, decode_profiles, encode_match_response
+
+if TYPE_CHECKING:
+    # Deferred to the code paths that need them, to keep the API's cold start short
+    import numpy as np
+    import pandas as pd  # only imported when a DataFrame is asked for
+
+# StateMatch column -> _calculate_match_score component
+STATE_BREAKDOWN_COLUMNS = {
+    'language_match': 'language_score',
+    'job_match': 'job_score',
+    'education_match': 'education_score',
+    'health_match': 'health_score',
+    'mental_health_match': 'mental_health_score'
+}
+
+class CohortChunk(NamedTuple):
+    """One chunk of RefugeeStateMatcher.match_cohort_columns"""
+    start: int  # position of the chunk's first profile
+    state_ids: 'np.ndarray'  # chunk x k catalog positions, best first
+    columns: Dict[str, 'np.ndarray']  # match_score and breakdown columns, chunk x k
+
+# Points per overlapping term in _calculate_match_score, for the batch scorer
+STATE_OVERLAP_POINTS = {
+    'language_score': 3,
+    'job_score': 2.5,
+    'health_score': 3
+}
+
+# Metrics served by GET /metrics
+metrics = Registry()
+MATCH_STAGE_SECONDS = metrics.histogram(
+    'match_stage_duration_seconds', 'Time spent in each stage of POST /match', ('stage',))
+STAGE_VALIDATION, STAGE_SCORING, STAGE_SORTING, STAGE_BREAKDOWN, STAGE_SERIALIZATION = (
+    MATCH_STAGE_SECONDS.labels(stage=stage)
+    for stage in ('validation', 'scoring', 'sorting', 'breakdown', 'serialization')
+)
+# Stages timed on the worker, observed here when the result comes back
+WORKER_STAGES = {'scoring': STAGE_SCORING, 'sorting': STAGE_SORTING, 'breakdown': STAGE_BREAKDOWN}
+
+@lru_cache(maxsize=None)
+def _state_total(component_scores) -> float:
+    """Weighted, rounded total of the state components in STATE_SCORE_WEIGHTS order"""
+    total_score = sum(score * weight for score, weight in zip(component_scores, STATE_SCORE_WEIGHTS.values()))
+    return round(total_score, 2)
 
 # Your existing RefugeeStateMatcher class
 class RefugeeStateMatcher:
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024):
         self.states_data = self._initialize_states_data()
-        self.df = pd.DataFrame(self.states_data)
+        self.catalog = DestinationCatalog(self.states_data, name_key='state')
+        self._df = None
+        # Case-insensitive state name -> record, for O(1) lookups
+        self.states_by_name = {state['state'].lower(): state for state in self.states_data}
+        self.vocabularies = {
+            field: TermVocabulary(term for state in self.catalog for term in getattr(state, field))
+            for field in MASK_FIELDS
+        }
+        self.state_masks = [self._encode_state(state) for state in self.catalog]
+        # Batch scoring for cohorts is built on first use
+        self._state_scheme = None
+        self._encoded_states = None
+        # Profiles that score identically (e.g. differ only by name) share results
+        self.match_cache = ScoreCache(cache_size)
     
     def _initialize_states_data(self) -> List[Dict[str, Any]]:
         """Initialize comprehensive US states demographic data"""
@@ -127,81 +214,226 @@ class RefugeeStateMatcher:
             }
         ]
     
-    def match_refugee_to_states(self, refugee_profile: Dict[str, Any]) -> pd.DataFrame:
+    @property
+    def df(self) -> 'pd.DataFrame':
+        """All states as a DataFrame, built (and pandas imported) on first access"""
+        if self._df is None:
+            import pandas as pd
+            self._df = pd.DataFrame(self.states_data)
+        return self._df
+    
+    def match_refugee_to_states(self, refugee_profile: Dict[str, Any], top_k: Optional[int] = None,
+                                as_frame: bool = False, timings: Optional[Dict[str, float]] = None
+                                ) -> Union[List[Dict[str, Any]], 'pd.DataFrame']:
+        """
+        Match a refugee profile to suitable US states based on multiple criteria.
+        With top_k, only the k best states are kept (partial selection, no full sort).
+        Results are cached per canonical profile and catalog version.
+        Returns ranked row dicts; as_frame=True returns them as a DataFrame
+        indexed by the states' catalog positions. A timings dict receives the
+        seconds spent scoring, sorting and building the breakdown (nothing on
+        a cache hit).
         """
-        Match a refugee profile to suitable US states based on multiple criteria
+        key = (canonical_profile_key(refugee_profile, STATE_PROFILE_FIELDS), top_k)
+        ranked, rows = self.match_cache.get_or_compute(
+            key, self.catalog.version, lambda: self._rank_states(refugee_profile, top_k, timings))
+        if as_frame:
+            import pandas as pd
+            return pd.DataFrame(list(rows), index=list(ranked))
+        return [dict(row) for row in rows]
+    
+    def _rank_states(self, refugee_profile: Dict[str, Any], top_k: Optional[int],
+                     timings: Optional[Dict[str, float]] = None) -> tuple:
         """
-        scores = []
+        Rank every state on total scores, then build the breakdown rows for the
+        top_k: (state positions, rows), both best first. Stage durations go
+        into timings when given.
+        """
+        started = time.perf_counter()
+        refugee_masks = self._encode_refugee(refugee_profile)
+        totals = [self._calculate_total_score(refugee_masks, state_masks) for state_masks in self.state_masks]
+        scored = time.perf_counter()
         
-        for state in self.states_data:
-            score = self._calculate_match_score(refugee_profile, state)
-            scores.append({
-                'state': state['state'],
-                'match_score': score['total_score'],
-                'language_match': score['language_score'],
-                'job_match': score['job_score'],
-                'education_match': score['education_score'],
-                'health_match': score['health_score'],
-                'mental_health_match': score['mental_health_score'],
-                'job_market_score': state['job_market_score'],
-                'support_services_score': state['support_services_score']
-            })
+        # Ties keep catalog order; the index still refers to the state's position
+        ranked = select_top_k(range(len(totals)), top_k, key=totals.__getitem__)
+        sorted_at = time.perf_counter()
         
-        results_df = pd.DataFrame(scores)
-        return results_df.sort_values('match_score', ascending=False)
+        rows = []
+        for idx in ranked:
+            state = self.catalog[idx]
+            score = self._calculate_match_score(refugee_masks, self.state_masks[idx])
+            # Floats throughout, as StateMatch declares them
+            rows.append({
+                'state': state.name,
+                'match_score': float(score['total_score']),
+                'language_match': float(score['language_score']),
+                'job_match': float(score['job_score']),
+                'education_match': float(score['education_score']),
+                'health_match': float(score['health_score']),
+                'mental_health_match': float(score['mental_health_score']),
+                'job_market_score': state.job_market_score,
+                'support_services_score': state.support_services_score
+            })
+        if timings is not None:
+            timings.update(scoring=scored - started, sorting=sorted_at - scored,
+                           breakdown=time.perf_counter() - sorted_at)
+        return tuple(ranked), tuple(rows)
+    
+    def _encode_state(self, state: Destination) -> ProfileMasks:
+        """Encode a catalog state's offerings as bitmasks over the interned vocabularies"""
+        return ProfileMasks(
+            languages=self.vocabularies['languages'].encode(state.languages),
+            job_skills=self.vocabularies['job_skills'].encode(state.job_skills),
+            health_requirements=self.vocabularies['health_requirements'].encode(state.health_requirements),
+            education_levels=self.vocabularies['education_levels'].encode(state.education_levels),
+            mental_health=state.mental_health_support
+        )
+    
+    def _encode_refugee(self, refugee: Dict) -> ProfileMasks:
+        """Encode a refugee profile once per request so each state costs an AND plus a popcount"""
+        return ProfileMasks(
+            languages=self.vocabularies['languages'].encode(refugee.get('languages', [])),
+            job_skills=self.vocabularies['job_skills'].encode(refugee.get('job_skills', [])),
+            health_requirements=self.vocabularies['health_requirements'].encode(refugee.get('health_requirements', [])),
+            education_levels=self.vocabularies['education_levels'].bits.get(refugee.get('education_level', ''), 0),
+            mental_health=bool(refugee.get('mental_health_support_needed', False))
+        )
     
-    def _calculate_match_score(self, refugee: Dict, state: Dict) -> Dict[str, float]:
+    def _calculate_match_score(self, refugee: ProfileMasks, state: ProfileMasks) -> Dict[str, float]:
         """Calculate matching scores for different criteria"""
         scores = {}
         
         # Language matching (30% weight)
-        refugee_langs = set(refugee.get('languages', []))
-        state_langs = set(state['languages'])
-        language_overlap = len(refugee_langs.intersection(state_langs))
+        language_overlap = _popcount(refugee.languages & state.languages)
         scores['language_score'] = min(10, language_overlap * 3)  # Max 10 points
         
         # Job skills matching (25% weight)
-        refugee_skills = set(refugee.get('job_skills', []))
-        state_skills = set(state['job_skills'])
-        job_overlap = len(refugee_skills.intersection(state_skills))
+        job_overlap = _popcount(refugee.job_skills & state.job_skills)
         scores['job_score'] = min(10, job_overlap * 2.5)  # Max 10 points
         
         # Education level matching (15% weight)
-        refugee_edu = refugee.get('education_level', '')
-        state_edus = state['education_levels']
-        scores['education_score'] = 10 if refugee_edu in state_edus else 5
+        scores['education_score'] = 10 if refugee.education_levels & state.education_levels else 5
         
         # Health requirements matching (15% weight)
-        refugee_health = set(refugee.get('health_requirements', []))
-        state_health = set(state['health_requirements'])
-        health_overlap = len(refugee_health.intersection(state_health))
+        health_overlap = _popcount(refugee.health_requirements & state.health_requirements)
         scores['health_score'] = min(10, health_overlap * 3)
         
         # Mental health support (15% weight)
-        refugee_needs_mental = refugee.get('mental_health_support_needed', False)
-        state_has_mental = state['mental_health_support']
-        scores['mental_health_score'] = 10 if (not refugee_needs_mental or state_has_mental) else 0
+        scores['mental_health_score'] = 10 if (not refugee.mental_health or state.mental_health) else 0
         
         # Calculate total weighted score
-        weights = {
-            'language_score': 0.3,
-            'job_score': 0.25,
-            'education_score': 0.15,
-            'health_score': 0.15,
-            'mental_health_score': 0.15
-        }
-        
-        total_score = sum(scores[key] * weights[key] for key in scores)
+        total_score = sum(scores[key] * STATE_SCORE_WEIGHTS[key] for key in scores)
         scores['total_score'] = round(total_score, 2)
         
         return scores
     
+    def _calculate_total_score(self, refugee: ProfileMasks, state: ProfileMasks) -> float:
+        """Total of _calculate_match_score without building the breakdown dict"""
+        return _state_total((
+            min(10, _popcount(refugee.languages & state.languages) * 3),
+            min(10, _popcount(refugee.job_skills & state.job_skills) * 2.5),
+            10 if refugee.education_levels & state.education_levels else 5,
+            min(10, _popcount(refugee.health_requirements & state.health_requirements) * 3),
+            10 if (not refugee.mental_health or state.mental_health) else 0
+        ))
+    
+    def _batch_scorer(self):
+        """State ScoringScheme and encoded states for the vectorized scorer, built on first use"""
+        from batch_scoring import ScoringScheme, EncodedCities
+        if self._state_scheme is None:
+            self._state_scheme = ScoringScheme(STATE_SCORE_WEIGHTS, STATE_OVERLAP_POINTS)
+            self._encoded_states = EncodedCities(self.catalog)
+        return self._state_scheme, self._encoded_states
+    
+    def score_cohort(self, profiles: List[Dict[str, Any]]) -> 'np.ndarray':
+        """N x states total scores, identical to _calculate_match_score for each pair"""
+        from batch_scoring import score_matrix
+        scheme, states = self._batch_scorer()
+        return score_matrix(profiles, states, components=False, scheme=scheme)['total_score']
+    
+    def match_cohort_columns(self, profiles: List[Dict[str, Any]], top_k: Optional[int] = None,
+                             chunk_size: int = 1024, deadline: Optional[Deadline] = None) -> Iterator[CohortChunk]:
+        """
+        Scores chunk_size profiles at a time and yields, per chunk, the ranked
+        catalog positions and StateMatch score columns as chunk x k arrays.
+        A deadline is checked before every chunk.
+        """
+        import numpy as np
+        from batch_scoring import score_matrix
+        scheme, states = self._batch_scorer()
+        k = len(self.catalog) if top_k is None else top_k
+        for start in range(0, len(profiles), chunk_size):
+            if deadline is not None:
+                deadline.check()
+            scores = score_matrix(profiles[start:start + chunk_size], states, scheme=scheme)
+            ranked = top_k_indices(scores['total_score'], k)
+            columns = {'match_score': np.take_along_axis(scores['total_score'], ranked, axis=1)}
+            for column, component in STATE_BREAKDOWN_COLUMNS.items():
+                columns[column] = np.take_along_axis(scores[component], ranked, axis=1)
+            yield CohortChunk(start, ranked, columns)
+    
+    def match_cohort(self, profiles: List[Dict[str, Any]], top_k: Optional[int] = None,
+                     chunk_size: int = 1024, deadline: Optional[Deadline] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Vectorized match_refugee_to_states for many profiles. Yields, per chunk
+        of match_cohort_columns, each profile's ranked state rows (same rows
+        and order as match_refugee_to_states) in input order.
+        """
+        for cohort_chunk in self.match_cohort_columns(profiles, top_k, chunk_size, deadline):
+            columns = {column: values.tolist() for column, values in cohort_chunk.columns.items()}
+            chunk = []
+            for row, state_ids in enumerate(cohort_chunk.state_ids.tolist()):
+                matches = []
+                for rank, state_id in enumerate(state_ids):
+                    state = self.catalog[state_id]
+                    match = {'state': state.name}
+                    for column in SCORE_COLUMNS:
+                        match[column] = columns[column][row][rank]
+                    match['job_market_score'] = state.job_market_score
+                    match['support_services_score'] = state.support_services_score
+                    matches.append(match)
+                chunk.append(matches)
+            yield chunk
+    
+    def state_columns(self) -> Dict[str, List[Any]]:
+        """State names and per-state scores, in catalog order (the positions match_cohort_columns ranks)"""
+        return {
+            'state': [state.name for state in self.catalog],
+            **{column: [getattr(state, column) for state in self.catalog] for column in STATE_COLUMNS},
+        }
+    
+    def allocate_cohort(self, profiles: List[Dict[str, Any]], capacities: Dict[str, int],
+                        time_budget: Optional[float] = None, deadline: Optional[Deadline] = None):
+        """
+        Place a whole cohort into states with fixed slot capacities (state name ->
+        slots), maximizing the total match score. Unknown state names raise ValueError.
+        With time_budget (seconds), the anytime local search replaces the exact solver.
+        With a deadline, the exact solver stops with DeadlineExceeded / RequestCancelled,
+        and the local search returns its best assignment when time runs out.
+        """
+        from allocation import solve_capacitated_assignment, improve_assignment, capacities_for
+        slots = capacities_for([state.name for state in self.catalog], capacities)
+        if deadline is not None:
+            deadline.check()
+        scores = self.score_cohort(profiles)
+        if deadline is None:
+            if time_budget is not None:
+                return improve_assignment(scores, slots, time_budget=time_budget)
+            return solve_capacitated_assignment(scores, slots)
+
+        deadline.check()
+        if time_budget is not None:
+            def keep_searching(progress) -> bool:
+                if deadline.cancelled:
+                    deadline.check()
+                return not deadline.expired()
+            return improve_assignment(scores, slots, time_budget=min(time_budget, deadline.remaining()),
+                                      progress=keep_searching)
+        return solve_capacitated_assignment(scores, slots, check=deadline.check)
+    
     def get_detailed_state_info(self, state_name: str) -> Dict:
         """Get detailed information for a specific state"""
-        for state in self.states_data:
-            if state['state'].lower() == state_name.lower():
-                return state
-        return {}
+        return self.states_by_name.get(state_name.lower(), {})
     
     def get_all_states(self) -> List[Dict]:
         """Get information for all states"""
@@ -236,6 +468,31 @@ class MatchResponse(BaseModel):
     timestamp: str
     total_states_evaluated: int
 
+class ProfilingSettings(BaseModel):
+    sample_rate: Optional[float] = None
+    allow_header: Optional[bool] = None
+    mode: Optional[str] = None
+    interval: Optional[float] = None
+
+class AllocationRequest(BaseModel):
+    profiles: List[RefugeeProfile]
+    capacities: Dict[str, int]
+
+class Placement(BaseModel):
+    refugee_name: str
+    state: Optional[str] = None
+    match_score: Optional[float] = None
+
+class AllocationResponse(BaseModel):
+    placements: List[Placement]
+    objective: float
+    placed: int
+    unplaced: int
+    state_loads: Dict[str, int]
+    method: str
+    elapsed_seconds: float
+    timestamp: str
+
 class StateInfoResponse(BaseModel):
     state: str
     languages: List[str]
@@ -247,16 +504,229 @@ class StateInfoResponse(BaseModel):
     job_market_score: int
     support_services_score: int
 
+# Scoring runs on a bounded worker pool so the event loop (and /health) stays
+# responsive; MATCH_POOL_KIND / MATCH_POOL_WORKERS / MATCH_POOL_QUEUE configure it
+pool = WorkerPool.from_env()
+POOL_WAIT_SECONDS = metrics.histogram('worker_pool_wait_seconds', 'Time calls waited for a worker')
+POOL_RUN_SECONDS = metrics.histogram('worker_pool_run_seconds', 'Time calls ran on a worker')
+
+def _observe_pool_call(wait: float, run: float):
+    POOL_WAIT_SECONDS.observe(wait)
+    POOL_RUN_SECONDS.observe(run)
+
+pool.observer = _observe_pool_call
+
+# Off unless PROFILE_SAMPLE_RATE / PROFILE_ALLOW_HEADER are set or PUT /admin/profiling enables it
+profiler = RequestProfiler.from_env(default_dir=os.path.join(APP_DIR, 'profiles'))
+memory = MemoryTracker()
+# Identical /match requests in flight at the same time share one computation
+match_flights = SingleFlight()
+
+# Per-class caps on concurrent requests (CONCURRENCY_<CLASS> overrides), so batch and
+# allocation requests cannot take every worker from single matches
+limiter = ConcurrencyLimiter.from_env({'match': 256, 'batch': 2, 'allocate': 2})
+# Seconds each class gets unless X-Request-Timeout asks for another deadline
+DEFAULT_DEADLINES = {'match': 5.0, 'batch': 300.0, 'allocate': 120.0}
+MAX_DEADLINE_SECONDS = 600.0
+DISCONNECT_POLL_SECONDS = 0.1
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    pool.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Refugee State Matching API",
     description="API for matching refugees to suitable US states based on demographics and skills",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_middleware(RequestMetricsMiddleware, registry=metrics)
 
 # Initialize the matcher
 matcher = RefugeeStateMatcher()
 
+# Saved RL models, reported by content hash so a retrained model shows up in /metrics
+RL_MODEL_VERSIONS = {
+    'q_table': FileVersion(os.path.join(APP_DIR, 'rl_model.json')),
+    'real_model': FileVersion(os.path.join(APP_DIR, 'rl_real_model.pkl'))
+}
+
+# What this worker process holds, per component; None when not loaded here
+def _loaded_module(name: str):
+    return sys.modules.get(name)
+
+def _global_match_cache():
+    module = _loaded_module('refugee_matcher')
+    return module.GLOBAL_MATCH_CACHE if module else None
+
+def _q_tables():
+    module = _loaded_module('rl_matcher')
+    return [agent.q_table for agent in module.LIVE_AGENTS] if module and module.LIVE_AGENTS else None
+
+memory.register('catalog', lambda: matcher.catalog)
+memory.register('state_records', lambda: (matcher.states_data, matcher.states_by_name))
+memory.register('state_masks', lambda: (matcher.vocabularies, matcher.state_masks))
+memory.register('batch_encoding', lambda: matcher._encoded_states)
+memory.register('match_cache', lambda: matcher.match_cache)
+memory.register('global_match_cache', _global_match_cache)
+memory.register('state_payloads', lambda: _state_payloads)
+memory.register('q_table', _q_tables)
+memory.register('states_df', lambda: matcher._df)  # unused by the API; only built on demand
+
+# Match cache counters as last reported by each process that served /match, by pid
+_worker_cache_stats: Dict[int, Dict[str, Any]] = {}
+CACHE_COUNTERS = ('size', 'hits', 'misses', 'evictions', 'invalidations')
+
+def _match_cache_stats() -> Dict[str, Any]:
+    """
+    Counters of the match cache that serves /match. With a thread pool that
+    is this process's cache. Each process-pool worker fills its own cache,
+    so there the counters are summed over the workers' latest reports (sent
+    back with every result, so as of each worker's last /match) and listed
+    per pid under 'processes'.
+    """
+    if pool.kind != 'process':
+        return matcher.match_cache.stats()
+    reports = dict(_worker_cache_stats)
+    stats = {key: sum(report[key] for report in reports.values()) for key in CACHE_COUNTERS}
+    lookups = stats['hits'] + stats['misses']
+    versions = {report['catalog_version'] for report in reports.values()}
+    stats.update(
+        maxsize=matcher.match_cache.maxsize,  # per worker
+        hit_rate=round(stats['hits'] / lookups, 4) if lookups else None,
+        catalog_version=versions.pop() if len(versions) == 1 else None,
+        processes={str(pid): report for pid, report in sorted(reports.items())},
+    )
+    return stats
+
+# Read at scrape time from the cache, pool and catalog themselves
+def _cache_stat(key: str):
+    return lambda: _match_cache_stats()[key]
+
+metrics.callback('match_cache_hits_total', 'Match cache hits', _cache_stat('hits'), 'counter')
+metrics.callback('match_cache_misses_total', 'Match cache misses', _cache_stat('misses'), 'counter')
+metrics.callback('match_cache_evictions_total', 'Match cache LRU evictions', _cache_stat('evictions'), 'counter')
+metrics.callback('match_cache_invalidations_total', 'Match cache clears on catalog version change',
+                 _cache_stat('invalidations'), 'counter')
+metrics.callback('match_cache_entries', 'Match cache entries', _cache_stat('size'))
+metrics.callback('match_cache_hit_ratio', 'Match cache hits / lookups', _cache_stat('hit_rate'))
+metrics.callback('worker_pool_queue_depth', 'Calls waiting for a worker', lambda: pool.queue_depth)
+metrics.callback('worker_pool_in_flight', 'Calls queued or running', lambda: pool.in_flight)
+metrics.callback('worker_pool_rejected_total', 'Calls rejected with 503 because the pool was saturated',
+                 lambda: pool.rejected, 'counter')
+metrics.callback('match_coalesced_total', '/match requests that shared an identical in-flight computation',
+                 lambda: match_flights.coalesced, 'counter')
+metrics.callback('match_flight_leaders_total', '/match computations started', lambda: match_flights.leaders,
+                 'counter')
+def _admission_counts(key: str):
+    return lambda: {(name,): counts[key] for name, counts in limiter.stats().items()}
+
+metrics.callback('admission_in_flight', 'Requests in flight per endpoint class',
+                 _admission_counts('in_flight'), labelnames=('endpoint_class',))
+metrics.callback('admission_rejected_total', 'Requests rejected at the concurrency limit',
+                 _admission_counts('rejected'), 'counter', ('endpoint_class',))
+metrics.callback('admission_deadline_exceeded_total', 'Requests stopped at their deadline',
+                 _admission_counts('deadline_exceeded'), 'counter', ('endpoint_class',))
+metrics.callback('admission_cancelled_total', 'Requests stopped because the client disconnected',
+                 _admission_counts('cancelled'), 'counter', ('endpoint_class',))
+metrics.callback('admission_failed_total', 'Admitted requests that ended with any other error',
+                 _admission_counts('failed'), 'counter', ('endpoint_class',))
+metrics.callback('catalog_info', 'State catalog version', lambda: {(matcher.catalog.version,): 1},
+                 labelnames=('version',))
+metrics.callback('json_encoder_info', 'JSON encoder used for responses (orjson, or the stdlib json fallback)',
+                 lambda: {(JSON_ENCODER,): 1}, labelnames=('encoder',))
+metrics.callback('rl_model_info', 'Content hash of each saved RL model', lambda: info_values(RL_MODEL_VERSIONS),
+                 labelnames=('model', 'version'))
+
+class WorkerMatch(NamedTuple):
+    """_match_records result, with what the worker that computed it reports back"""
+    rows: List[Dict[str, Any]]
+    pid: int
+    cache_stats: Dict[str, Any]
+    stage_seconds: Dict[str, float]  # empty on a cache hit
+
+# Worker-side calls: module-level so a process pool can pickle them
+def _match_records(refugee: Dict[str, Any], top_k: Optional[int],
+                   deadline: Optional[Deadline] = None) -> WorkerMatch:
+    """Ranked state rows as plain dicts, cheap to send back from a worker"""
+    if deadline is not None:
+        deadline.check()  # expired while queued for a worker: skip the work
+    timings = {}
+    rows = matcher.match_refugee_to_states(refugee, top_k=top_k, timings=timings)
+    return WorkerMatch(rows, os.getpid(), matcher.match_cache.stats(), timings)
+
+def _allocate(profiles: List[Dict[str, Any]], capacities: Dict[str, int], time_budget: Optional[float],
+              deadline: Optional[Deadline] = None):
+    return matcher.allocate_cohort(profiles, capacities, time_budget=time_budget, deadline=deadline)
+
+async def _run_on_pool(request: Request, name: str, fn, *args):
+    """pool.run(fn, *args), under the profiler when this request is chosen for profiling"""
+    target = profiler.target(request.headers, name)
+    if target is None:
+        return await pool.run(fn, *args)
+    return await pool.run(profiled_call, target, fn, *args)
+
+async def _match_on_pool(request: Request, refugee: Dict[str, Any], top_k: Optional[int],
+                         deadline: Optional[Deadline]) -> List[Dict[str, Any]]:
+    """_match_records on the worker pool, recording the worker's report and stage timings"""
+    result = await _run_on_pool(request, 'match', _match_records, refugee, top_k, deadline)
+    _worker_cache_stats[result.pid] = result.cache_stats
+    for stage, seconds in result.stage_seconds.items():
+        WORKER_STAGES[stage].observe(seconds)
+    return result.rows
+
+def _require_admin(request: Request):
+    """Admin endpoints need ADMIN_TOKEN set and sent as X-Admin-Token; without it they stay closed"""
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: ADMIN_TOKEN is not set")
+    sent = request.headers.get('x-admin-token', '')
+    if not hmac.compare_digest(sent.encode('utf-8'), token.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def _saturated(e: Union[PoolSaturated, LimitExceeded]) -> HTTPException:
+    return HTTPException(status_code=503, detail=f"Server busy: {str(e)}", headers={"Retry-After": "1"})
+
+def _aborted(e: Union[DeadlineExceeded, RequestCancelled]) -> HTTPException:
+    # 499 (client closed request) is only logged: nobody is left to read it
+    status_code = 504 if isinstance(e, DeadlineExceeded) else 499
+    return HTTPException(status_code=status_code, detail=str(e))
+
+def _deadline(request: Request, endpoint_class: str) -> Deadline:
+    return deadline_from_headers(request.headers, DEFAULT_DEADLINES[endpoint_class], MAX_DEADLINE_SECONDS)
+
+@asynccontextmanager
+async def _cancel_on_disconnect(request: Request, deadline: Deadline):
+    """
+    If the client goes away during the block, cancel the deadline, and so
+    the work checking it, and stop waiting: the block raises
+    RequestCancelled. Process workers get a copy of the deadline without
+    the cancel flag, so work already running there stops only at the
+    deadline itself.
+    """
+    task = asyncio.current_task()
+    disconnected = False
+
+    async def watch():
+        nonlocal disconnected
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        disconnected = True
+        deadline.cancel('cancelled: client disconnected')
+        task.cancel()
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        yield
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        raise RequestCancelled(f"Request {deadline.reason}") from None
+    finally:
+        watcher.cancel()
+
 @app.get("/")
 async def root():
     return {
@@ -264,8 +734,20 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /match": "Match refugee to states",
+            "POST /match/batch": "Match many refugees (JSON list or NDJSON), streamed as NDJSON",
+            "POST /allocate": "Place a cohort into states with slot capacities",
             "GET /states": "Get all states data",
             "GET /states/{state_name}": "Get specific state info",
+            "GET /cache/stats": "Match cache hit / miss / eviction counters",
+            "GET /pool/stats": "Worker pool queue depth and wait times",
+            "GET /coalescing/stats": "Identical concurrent /match requests served by one computation",
+            "GET /admission/stats": "Concurrency limits and deadline / cancellation counts per endpoint class",
+            "GET /metrics": "Prometheus metrics",
+            "GET /admin/profiling": "Request profiling settings and recent profiles",
+            "PUT /admin/profiling": "Change request profiling settings",
+            "GET /admin/memory": "Memory held per component by this worker",
+            "POST /admin/memory/snapshots": "Take a named tracemalloc snapshot",
+            "GET /admin/memory/diff": "Allocation growth between two snapshots",
             "GET /health": "Health check"
         }
     }
@@ -275,54 +757,461 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "states_loaded": len(matcher.states_data)
+        "states_loaded": len(matcher.states_data),
+        "json_encoder": JSON_ENCODER
     }
 
-@app.post("/match", response_model=MatchResponse)
-async def match_refugee(refugee: RefugeeProfile):
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Counters of the canonical-profile match cache; with a process pool,
+    summed over the workers' caches and listed per worker pid
+    """
+    return _match_cache_stats()
+
+@app.get("/pool/stats")
+async def pool_stats():
     """
-    Match a refugee profile to suitable US states
+    Queue depth, counters and wait / run times of the scoring worker pool
     """
+    return pool.stats()
+
+@app.get("/coalescing/stats")
+async def coalescing_stats():
+    """
+    How many /match requests shared an in-flight computation, and how long they waited for it
+    """
+    return match_flights.stats()
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """
+    Concurrency limit, in-flight, rejected, deadline-exceeded, cancelled and
+    failed counts per endpoint class (match, batch, allocate)
+    """
+    return limiter.stats()
+
+@app.get("/admin/profiling")
+async def get_profiling(request: Request):
+    """
+    Request profiling settings and the most recent profile files
+    """
+    _require_admin(request)
+    return profiler.status()
+
+@app.put("/admin/profiling")
+async def set_profiling(settings: ProfilingSettings, request: Request):
+    """
+    Profile a fraction of /match and /allocate requests (sample_rate), or
+    those sent with `X-Profile: 1` (allow_header), under cProfile or the
+    stack sampler (mode)
+    """
+    _require_admin(request)
+    try:
+        profiler.configure(**settings.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return profiler.status()
+
+# The memory endpoints walk object graphs and tracemalloc snapshots: plain
+# def handlers, so that runs on the threadpool instead of stalling the event loop
+@app.get("/admin/memory")
+def get_memory(request: Request):
+    """
+    RSS and the memory held per component (catalog, caches, Q-table,
+    DataFrame) by the worker process that serves this request
+    """
+    _require_admin(request)
+    return memory.report()
+
+@app.post("/admin/memory/snapshots")
+def take_memory_snapshot(request: Request, label: str = Query(..., min_length=1, max_length=64)):
+    """
+    Take a named tracemalloc snapshot; the first one starts tracing, which
+    slows allocations down until DELETE /admin/memory/snapshots
+    """
+    _require_admin(request)
+    return memory.snapshot(label)
+
+@app.delete("/admin/memory/snapshots")
+def reset_memory_snapshots(request: Request):
+    """
+    Drop all snapshots and stop tracing
+    """
+    _require_admin(request)
+    memory.reset()
+    return {'tracing': False}
+
+@app.get("/admin/memory/diff")
+def diff_memory_snapshots(request: Request, start: str, end: str,
+                                top: int = Query(20, ge=1, le=500),
+                                group_by: Literal['lineno', 'filename', 'traceback'] = 'lineno'):
+    """
+    Allocation sites that grew the most between two snapshots
+    """
+    _require_admin(request)
+    try:
+        return memory.diff(start, end, top=top, key_type=group_by)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus text-format metrics: request counts and latencies, /match stage
+    latencies, cache, worker pool, catalog and RL model versions
+    """
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+async def _match_profile(request: Request) -> RefugeeProfile:
+    """
+    The /match body: a JSON profile or, by Content-Type, a MessagePack map
+    or a one-row Arrow IPC stream. Binary bodies take the /match/batch path
+    (decode_profiles, then _validate_profiles); JSON bodies get the errors
+    FastAPI gives a RefugeeProfile body parameter.
+    """
+    content_type = request.headers.get('content-type', '')
+    media = media_type(content_type)
+    if not format_available(media):
+        raise HTTPException(status_code=415, detail=f"{media} bodies are not supported here")
+    body = await request.body()
+    if media in BINARY_TYPES:
+        try:
+            items = decode_profiles(body, media, single=True)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid body: {str(e)}")
+        return RefugeeProfile.model_construct(**_validate_profiles(items)[0])
+    if not body:
+        raise RequestValidationError([{'type': 'missing', 'loc': ('body',), 'msg': 'Field required', 'input': None}])
+    try:
+        item = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise RequestValidationError([{'type': 'json_invalid', 'loc': ('body', e.pos), 'msg': 'JSON decode error',
+                                       'input': {}, 'ctx': {'error': e.msg}}], body=e.doc)
+    try:
+        return RefugeeProfile.model_validate(item)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, 'loc': ('body',) + tuple(error['loc'])}
+             for error in e.errors(include_url=False, include_context=False)], body=item)
+
+# The body is read by _match_profile; documented here as before, plus the binary formats
+MATCH_REQUEST_BODY = {'requestBody': {'required': True, 'content': {
+    media: {'schema': {'$ref': '#/components/schemas/RefugeeProfile'}} for media in (JSON_TYPE,) + BINARY_TYPES
+}}}
+
+@app.post("/match", response_model=MatchResponse, openapi_extra=MATCH_REQUEST_BODY)
+async def match_refugee(request: Request, refugee: RefugeeProfile = Depends(_match_profile),
+                        top_k: Optional[int] = Query(None, ge=1, description="Return only the k best states")):
+    """
+    Match a refugee profile to suitable US states. The body is a JSON
+    profile or, by Content-Type, a MessagePack map or a one-row Arrow IPC
+    stream. With `Accept: application/msgpack` or
+    `application/vnd.apache.arrow.stream` the response is binary, its
+    matches as columns (see wire_format).
+    """
+    # Body read, parsing and validation happen in _match_profile, before the endpoint runs
+    received_at = getattr(request.state, 'received_at', None)
+    if received_at is not None:
+        STAGE_VALIDATION.observe(time.perf_counter() - received_at)
+    response_type = negotiate(request.headers.get('accept'), JSON_TYPE)
+    if response_type is None:
+        raise HTTPException(status_code=406, detail="Acceptable formats: " + ', '.join(
+            [JSON_TYPE] + [media for media in BINARY_TYPES if format_available(media)]))
     try:
         # Convert Pydantic model to dict
-        refugee_dict = refugee.dict()
-        
-        # Perform matching
-        matches_df = matcher.match_refugee_to_states(refugee_dict)
+        refugee_dict = refugee.model_dump()
         
-        # Convert matches to list of dictionaries
-        matches_list = matches_df.to_dict('records')
+        # Perform matching on the worker pool, coalesced with any identical request
+        # in flight (same canonical profile, top_k and catalog). The shared work runs
+        # under the latest deadline of the requests waiting for it; each request
+        # still answers 504 at its own, and stops waiting if its client leaves.
+        deadline = _deadline(request, 'match')
+        flight_key = (canonical_profile_key(refugee_dict, STATE_PROFILE_FIELDS), top_k, matcher.catalog.version)
+        with limiter.admit('match'):
+            async with _cancel_on_disconnect(request, deadline):
+                matches_list = await match_flights.do(
+                    flight_key, lambda shared: _match_on_pool(request, refugee_dict, top_k, shared), deadline)
         
         # Get top match
         top_match = matches_list[0] if matches_list else None
         
-        return MatchResponse(
-            refugee_name=refugee.name,
-            matches=matches_list,
-            top_match=top_match,
-            timestamp=datetime.now().isoformat(),
-            total_states_evaluated=len(matches_list)
-        )
+        # Rows already have the StateMatch shape: serialize directly, no model pass
+        with STAGE_SERIALIZATION.time():
+            content = {
+                'refugee_name': refugee.name,
+                'matches': matches_list,
+                'top_match': top_match,
+                'timestamp': datetime.now().isoformat(),
+                'total_states_evaluated': len(matcher.catalog)
+            }
+            if response_type == JSON_TYPE:
+                return FastJSONResponse(content, headers={'Vary': 'Accept'})
+            return Response(encode_match_response(content, response_type, matcher.state_columns()),
+                            media_type=response_type, headers={'Vary': 'Accept'})
         
+    except (PoolSaturated, LimitExceeded) as e:
+        raise _saturated(e)
+    except (DeadlineExceeded, RequestCancelled) as e:
+        raise _aborted(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+# Whole-body decoder for /match/batch; invalid bodies fall through to the per-profile path
+batch_decoder = BatchProfileDecoder(RefugeeProfile)
+
+def _parse_batch_profiles(body: bytes, content_type: str) -> List[Dict[str, Any]]:
+    """
+    Validate a JSON list (or {"profiles": [...]}), NDJSON, MessagePack or
+    Arrow IPC stream body of RefugeeProfiles
+    """
+    media = media_type(content_type)
+    if media in BINARY_TYPES:
+        return _validate_profiles(decode_profiles(body, media))
+    ndjson = media == NDJSON_TYPE or 'ndjson' in content_type
+    profiles = batch_decoder.decode(body, ndjson)
+    if profiles is not None:
+        return profiles
+
+    # Per-profile validation: the exact error locations and messages for bad bodies
+    if ndjson:
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        items = json.loads(body) if body.strip() else []
+        if isinstance(items, dict) and 'profiles' in items:
+            items = items['profiles']
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON list of profiles or an NDJSON body")
+    return _validate_profiles(items)
+
+def _validate_profiles(items: List[Any]) -> List[Dict[str, Any]]:
+    """RefugeeProfile(**item).model_dump() per item, with every item's errors located in the body"""
+    profiles, errors = [], []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'loc': ('body', position), 'msg': 'Profile must be a JSON object',
+                           'type': 'dict_type'})
+            continue
+        try:
+            profiles.append(RefugeeProfile(**item).model_dump())
+        except ValidationError as e:
+            for error in e.errors(include_url=False, include_context=False):
+                errors.append({**error, 'loc': ('body', position) + tuple(error['loc'])})
+    if errors:
+        raise RequestValidationError(errors)
+    return profiles
+
+def _stream_batch_matches(profiles: List[Dict[str, Any]], top_k: Optional[int],
+                          chunk_size: int, deadline: Optional[Deadline] = None) -> Iterator[Tuple[bytes, int]]:
+    """NDJSON lines shaped like MatchResponse, one chunk of profiles per yield (with its line count)"""
+    position = 0
+    for chunk in matcher.match_cohort(profiles, top_k=top_k, chunk_size=chunk_size, deadline=deadline):
+        timestamp = datetime.now().isoformat()
+        lines = []
+        for matches in chunk:
+            lines.append(dumps_json({
+                'refugee_name': profiles[position]['name'],
+                'matches': matches,
+                'top_match': matches[0] if matches else None,
+                'timestamp': timestamp,
+                'total_states_evaluated': len(matcher.catalog)
+            }))
+            position += 1
+        yield b'\n'.join(lines) + b'\n', len(lines)
+
+def _stream_batch_columns(profiles: List[Dict[str, Any]], top_k: Optional[int], chunk_size: int,
+                          encoder, deadline: Optional[Deadline] = None) -> Iterator[Tuple[bytes, int]]:
+    """
+    MessagePack / Arrow IPC stream of the score columns straight from
+    match_cohort_columns, one chunk of profiles per yield (with its profile count)
+    """
+    yield encoder.start(), 0
+    for chunk in matcher.match_cohort_columns(profiles, top_k=top_k, chunk_size=chunk_size, deadline=deadline):
+        names = [profile['name'] for profile in profiles[chunk.start:chunk.start + len(chunk.state_ids)]]
+        yield encoder.chunk(names, chunk.state_ids, chunk.columns, datetime.now().isoformat()), len(names)
+    yield encoder.finish(), 0
+
+def _ndjson_error(message: str, completed: int) -> bytes:
+    return dumps_json({'error': message, 'completed': completed}) + b'\n'
+
+async def _admitted_stream(response: 'AdmittedStreamingResponse', error_chunk) -> AsyncIterator[bytes]:
+    """
+    Stream response.chunks, computed on a thread. When the deadline stops
+    the work, error_chunk(message, <profiles sent>) ends the stream (a final
+    {"error": ..., "completed": ...} NDJSON line by default), as does any
+    other error, with message 'internal error'. response.outcome records
+    how the stream ended.
+    """
+    completed = 0
+    try:
+        async for chunk, profiles in iterate_in_threadpool(response.chunks):
+            completed += profiles
+            yield chunk
+        response.outcome = None
+    except (DeadlineExceeded, RequestCancelled) as e:
+        response.outcome = e
+        yield error_chunk(str(e), completed)
+    except Exception as e:
+        # The status line is already sent: end the stream with the error instead
+        response.outcome = e
+        yield error_chunk('internal error', completed)
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    Streams chunks (see _admitted_stream) holding a concurrency slot of
+    endpoint_class, acquired by the endpoint, until the response is sent or
+    abandoned. The slot is released by sending the response rather than by
+    the stream: when the client leaves before the first chunk, the stream
+    never starts. When the client leaves early, the deadline is cancelled.
+    """
+    def __init__(self, chunks: Iterator[Tuple[bytes, int]], endpoint_class: str, deadline: Deadline,
+                 error_chunk=_ndjson_error, **kwargs):
+        self.chunks = chunks
+        self.endpoint_class = endpoint_class
+        self.deadline = deadline
+        # Until the stream reaches its end, the client is taken to have left
+        self.outcome = RequestCancelled()
+        super().__init__(_admitted_stream(self, error_chunk), **kwargs)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Stops a stream left mid-way; one that never started has nothing to stop
+            await self.body_iterator.aclose()
+            self.chunks.close()
+            if isinstance(self.outcome, RequestCancelled) and not self.deadline.cancelled:
+                self.deadline.cancel('cancelled: client disconnected')
+            limiter.release(self.endpoint_class, self.outcome)
+
+@app.post("/match/batch")
+async def match_refugee_batch(request: Request,
+                              top_k: Optional[int] = Query(None, ge=1, description="Return only the k best states"),
+                              chunk_size: int = Query(1024, ge=1, le=65536, description="Profiles scored per chunk")):
+    """
+    Match many refugee profiles in one request. The body is a JSON list of
+    profiles, or NDJSON (one profile per line) with an application/x-ndjson
+    content type, or, by Content-Type, a MessagePack array of profile maps
+    or an Arrow IPC stream with one row per profile. Results stream back as
+    NDJSON, one MatchResponse-shaped line per profile in input order, as
+    each chunk is scored; clients sending `Accept: application/msgpack` or
+    `application/vnd.apache.arrow.stream` get the score table as columns
+    instead (see wire_format).
+    """
+    content_type = request.headers.get('content-type', '')
+    if not format_available(media_type(content_type)):
+        raise HTTPException(status_code=415, detail=f"{media_type(content_type)} bodies are not supported here")
+    response_type = negotiate(request.headers.get('accept'), NDJSON_TYPE)
+    if response_type is None:
+        raise HTTPException(status_code=406, detail="Acceptable formats: " + ', '.join(
+            [NDJSON_TYPE] + [media for media in BINARY_TYPES if format_available(media)]))
+    if response_type != NDJSON_TYPE:
+        states = matcher.state_columns()
+        encoder = batch_encoder(response_type, states, min(top_k or len(states['state']), len(states['state'])))
+    deadline = _deadline(request, 'batch')
+    try:
+        limiter.acquire('batch')
+    except LimitExceeded as e:
+        raise _saturated(e)
+    try:
+        body = await request.body()
+        # Decoding and validating a large body takes long enough to stall the event loop
+        profiles = await run_in_threadpool(_parse_batch_profiles, body, content_type)
+    except ValueError as e:
+        limiter.release('batch')
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {str(e)}")
+    except BaseException:
+        limiter.release('batch')
+        raise
+    # The slot is released by the response, once the last chunk is sent or the client leaves
+    headers = {'Vary': 'Accept'}
+    if response_type == NDJSON_TYPE:
+        return AdmittedStreamingResponse(_stream_batch_matches(profiles, top_k, chunk_size, deadline), 'batch',
+                                         deadline, media_type=NDJSON_TYPE, headers=headers)
+    return AdmittedStreamingResponse(_stream_batch_columns(profiles, top_k, chunk_size, encoder, deadline), 'batch',
+                                     deadline, encoder.error, media_type=response_type, headers=headers)
+
+@app.post("/allocate", response_model=AllocationResponse)
+async def allocate_cohort(request: AllocationRequest, http_request: Request,
+                          time_budget: Optional[float] = Query(
+                              None, gt=0, description="Seconds for the anytime local search instead of the exact solver")):
+    """
+    Place a whole cohort into states with fixed slot capacities, maximizing
+    the total match score
+    """
+    deadline = _deadline(http_request, 'allocate')
+    try:
+        with limiter.admit('allocate'):
+            async with _cancel_on_disconnect(http_request, deadline):
+                result = await _run_on_pool(http_request, 'allocate', _allocate,
+                                            [profile.model_dump() for profile in request.profiles],
+                                            request.capacities, time_budget, deadline)
+    except (PoolSaturated, LimitExceeded) as e:
+        raise _saturated(e)
+    except (DeadlineExceeded, RequestCancelled) as e:
+        raise _aborted(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+    names = [state.name for state in matcher.catalog]
+    placements = []
+    for profile, site, score in zip(request.profiles, result.assignment.tolist(), result.match_scores.tolist()):
+        if site < 0:
+            placements.append(Placement(refugee_name=profile.name))
+        else:
+            placements.append(Placement(refugee_name=profile.name, state=names[site], match_score=score))
+
+    return AllocationResponse(
+        placements=placements,
+        objective=result.objective,
+        placed=result.placed,
+        unplaced=result.unplaced,
+        state_loads={name: load for name, load in zip(names, result.loads.tolist()) if load},
+        method=result.method,
+        elapsed_seconds=round(result.elapsed, 4),
+        timestamp=datetime.now().isoformat()
+    )
+
+class StatePayloads(NamedTuple):
+    """/states and /states/{state_name} bodies rendered for one catalog version"""
+    version: str
+    all_states: Preserialized
+    by_name: Dict[str, Preserialized]
+
+_state_payloads: Optional[StatePayloads] = None
+
+def get_state_payloads() -> StatePayloads:
+    """Validate and serialize the state responses once per catalog version"""
+    global _state_payloads
+    if _state_payloads is None or _state_payloads.version != matcher.catalog.version:
+        states = [StateInfoResponse(**state).model_dump() for state in matcher.get_all_states()]
+        _state_payloads = StatePayloads(
+            version=matcher.catalog.version,
+            all_states=preserialize(states),
+            by_name={state['state'].lower(): preserialize(state) for state in states}
+        )
+    return _state_payloads
+
 @app.get("/states", response_model=List[StateInfoResponse])
-async def get_all_states():
+async def get_all_states(request: Request):
     """
     Get demographic information for all available states
+    (ETag / If-None-Match aware)
     """
-    return matcher.get_all_states()
+    return cached_json_response(request, get_state_payloads().all_states)
 
 @app.get("/states/{state_name}", response_model=StateInfoResponse)
-async def get_state_info(state_name: str):
+async def get_state_info(state_name: str, request: Request):
     """
     Get detailed information for a specific state
+    (case-insensitive, ETag / If-None-Match aware)
     """
-    state_info = matcher.get_detailed_state_info(state_name)
-    if not state_info:
+    payload = get_state_payloads().by_name.get(state_name.lower())
+    if payload is None:
         raise HTTPException(status_code=404, detail=f"State '{state_name}' not found")
-    return state_info
+    return cached_json_response(request, payload)
 
 @app.get("/example-profiles")
 async def get_example_profiles():
@@ -365,4 +1254,5 @@ async def get_example_profiles():
 
 # Run the server
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
@@ -0,0 +1,72 @@
+# profile_decoding.py
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+# Pydantic 2 validates whole JSON documents in its Rust core; on pydantic 1
+# every body takes the caller's per-profile path
+try:
+    from pydantic import TypeAdapter
+    from typing_extensions import NotRequired, TypedDict
+except ImportError:
+    TypeAdapter = None
+
+
+class BatchProfileDecoder:
+    """
+    Decodes a JSON list (or {"profiles": [...]}) or NDJSON body of `model`
+    records straight into plain dicts, equal to model(**item).model_dump() for
+    every item, without json.loads or a model instance per profile.
+
+    The model's fields are mirrored as a TypedDict, so the whole body is
+    parsed and validated in one pass by pydantic's JSON validator, which
+    also shares the string objects of repeated short values (languages,
+    skills, ...). decode() returns None whenever the body is not valid, or
+    not in a shape it handles: the caller then runs its per-profile path,
+    so error responses stay exactly as they were.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.defaults = {}
+        if TypeAdapter is None:
+            self._list = self._wrapped = None
+            return
+        fields = {}
+        for name, field in model.model_fields.items():
+            if field.is_required():
+                fields[name] = field.annotation
+            else:
+                fields[name] = NotRequired[field.annotation]
+                self.defaults[name] = field.get_default(call_default_factory=True)
+        record = TypedDict(f'{model.__name__}Record', fields)
+        self._list = TypeAdapter(List[record])
+        self._wrapped = TypeAdapter(TypedDict(f'{model.__name__}Batch', {'profiles': List[record]}))
+
+    @property
+    def available(self) -> bool:
+        return self._list is not None
+
+    def decode(self, body: bytes, ndjson: bool = False) -> Optional[List[Dict[str, Any]]]:
+        if self._list is None:
+            return None
+        try:
+            if ndjson:
+                lines = [line for line in body.splitlines() if line.strip()]
+                records = self._list.validate_json(b'[' + b','.join(lines) + b']')
+                # One record per line, or a line held several values (or half of one)
+                if len(records) != len(lines):
+                    return None
+            else:
+                start = body.lstrip()[:1]
+                if start == b'[':
+                    records = self._list.validate_json(body)
+                elif start == b'{':
+                    records = self._wrapped.validate_json(body)['profiles']
+                else:
+                    return None
+        except ValidationError:
+            return None
+        for record in records:
+            for name, default in self.defaults.items():
+                record.setdefault(name, default)
+        return records
@@ -0,0 +1,111 @@
+# pruned_search.py
+import heapq
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from catalog import DestinationCatalog, TERM_FIELDS
+from refugee_matcher import calculate_global_match_score, calculate_global_total_score, GLOBAL_SCORE_WEIGHTS
+
+MAX_OVERLAP = 4  # Every overlap of 4 or more is already capped at 10 points
+
+
+@lru_cache(maxsize=None)
+def score_upper_bound(language_overlap: int, job_overlap: int, health_overlap: int) -> float:
+    """
+    Highest total calculate_global_match_score can give a destination with
+    these overlap counts: education, mental health and culture at 10 points
+    and no cost penalty. Uses the same arithmetic and rounding as the real
+    score, so round() monotonicity keeps the bound exact.
+    """
+    scores = {
+        'language_score': min(10, language_overlap * 2.5),
+        'job_score': min(10, job_overlap * 2.5),
+        'education_score': 10,
+        'health_score': min(10, health_overlap * 3),
+        'mental_health_score': 10,
+        'cultural_score': 10,
+        'cost_adjustment': 0
+    }
+    total_score = sum(scores[key] * weight for key, weight in GLOBAL_SCORE_WEIGHTS.items())
+    return round(total_score, 2)
+
+
+def _overlap_counts(refugee: Dict[str, Any], catalog: DestinationCatalog,
+                    allowed: Optional[set]) -> Dict[int, List[int]]:
+    """Walk the term postings once: destination ID -> [language, job, health] overlaps"""
+    counts = {}
+    for slot, field in enumerate(TERM_FIELDS):
+        postings = catalog.term_postings[field]
+        for term in set(refugee.get(field, [])):
+            for dest_id in postings.get(term, ()):
+                if allowed is not None and dest_id not in allowed:
+                    continue
+                row = counts.get(dest_id)
+                if row is None:
+                    row = counts[dest_id] = [0, 0, 0]
+                row[slot] += 1
+    return counts
+
+
+def pruned_top_k(refugee: Dict[str, Any], catalog: DestinationCatalog, top_k: int,
+                 candidate_ids: Optional[Sequence[int]] = None,
+                 breakdown: bool = True) -> List[Tuple[int, Any]]:
+    """
+    Exact top-k destinations for one refugee without scoring the whole catalog.
+
+    Destinations are visited in decreasing order of their score upper bound
+    (threshold / WAND-style) and the search stops as soon as no remaining
+    bound can reach the current k-th best score. Returns (destination ID,
+    calculate_global_match_score result) pairs ordered best first, with ties
+    in catalog order - the same rows a brute-force stable sort would return.
+    Visited destinations are ranked on total scores only; with
+    breakdown=False the pairs hold the total instead of the full result.
+    """
+    if top_k <= 0:
+        return []
+    allowed = None if candidate_ids is None else set(candidate_ids)
+    counts = _overlap_counts(refugee, catalog, allowed)
+
+    # Bucket the touched destinations by upper bound; buckets are visited best
+    # first and IDs within a bucket in catalog order
+    buckets = {}
+    for dest_id, (language, job, health) in counts.items():
+        bound = score_upper_bound(min(language, MAX_OVERLAP), min(job, MAX_OVERLAP), min(health, MAX_OVERLAP))
+        buckets.setdefault(bound, []).append(dest_id)
+
+    # Min-heap of the best k as (score, -id): the root is the current k-th best
+    heap = []
+
+    def visit(dest_id: int) -> None:
+        entry = (calculate_global_total_score(refugee, catalog[dest_id]), -dest_id)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def can_reach(bound: float) -> bool:
+        # Equal scores still matter: a lower ID ranks ahead of the current k-th
+        return len(heap) < top_k or bound >= heap[0][0]
+
+    for bound in sorted(buckets, reverse=True):
+        if not can_reach(bound):
+            break
+        for dest_id in sorted(buckets[bound]):
+            if not can_reach(bound):
+                break
+            visit(dest_id)
+
+    # Destinations sharing no language, skill or health term all have the same bound
+    untouched_bound = score_upper_bound(0, 0, 0)
+    if can_reach(untouched_bound):
+        universe = range(len(catalog)) if candidate_ids is None else sorted(allowed)
+        for dest_id in universe:
+            if not can_reach(untouched_bound):
+                break
+            if dest_id not in counts:
+                visit(dest_id)
+
+    ranked = sorted(heap, key=lambda entry: (-entry[0], -entry[1]))
+    if not breakdown:
+        return [(-neg_id, total_score) for total_score, neg_id in ranked]
+    return [(-neg_id, calculate_global_match_score(refugee, catalog[-neg_id])) for _, neg_id in ranked]
@@ -0,0 +1,53 @@
+# ranking.py
+import heapq
+from typing import List, Any, Callable, Iterable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np  # imported on first use, so select_top_k callers do not pay for it
+
+
+def select_top_k(items: Iterable[Any], top_k: Optional[int], key: Callable[[Any], float]) -> List[Any]:
+    """
+    Return items ordered best-first by key, keeping only the top_k best.
+
+    Uses a bounded heap (O(M log k)) when top_k is set and a full sort
+    otherwise. Equal keys keep their input order in both cases, so a top_k
+    result is always a prefix of the full ranking.
+    """
+    if top_k is None:
+        return sorted(items, key=key, reverse=True)
+    return heapq.nlargest(top_k, items, key=key)
+
+
+def top_k_indices(scores: 'np.ndarray', top_k: int) -> 'np.ndarray':
+    """
+    Row-wise column indices of the top_k highest scores, best first.
+
+    Selection uses argpartition-style partial selection (O(M) per row) and
+    only the k selected values are sorted. Ties keep column order, matching
+    a stable descending sort. A 1-D score vector returns a 1-D index vector.
+    """
+    import numpy as np
+    scores = np.asarray(scores)
+    squeeze = scores.ndim == 1
+    scores = np.atleast_2d(scores)
+    n, m = scores.shape
+    k = max(0, min(top_k, m))
+
+    if k == 0:
+        cols = np.empty((n, 0), dtype=np.intp)
+    elif k < m:
+        # k-th largest value per row, then everything strictly better plus the
+        # earliest boundary ties, so the selection is deterministic
+        kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+        better = scores > kth
+        ties = scores == kth
+        needed = k - better.sum(axis=1, keepdims=True)
+        selected = better | (ties & (np.cumsum(ties, axis=1) <= needed))
+        cols = np.nonzero(selected)[1].reshape(n, k)
+    else:
+        cols = np.broadcast_to(np.arange(m), (n, m))
+
+    order = np.argsort(-np.take_along_axis(scores, cols, axis=1), axis=1, kind='stable')
+    result = np.take_along_axis(cols, order, axis=1)
+    return result[0] if squeeze else result
@@ -1,7 +1,12 @@
-import requests
-import json
-import matplotlib.pyplot as plt
-import numpy as np
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, List, NamedTuple
+
+from catalog import DestinationCatalog, Destination
+from ranking import select_top_k
+from score_cache import ScoreCache, canonical_profile_key, GLOBAL_PROFILE_FIELDS
 
 def get_refugee_details():
     """Prompt user for refugee details"""
@@ -245,106 +250,195 @@ def get_global_cities_data():
         ]
     }
 
-def calculate_global_match_score(refugee, city):
-    """Calculate matching scores for global cities"""
-    scores = {}
-    
+# Component weights for the global city score (shared with batch_scoring)
+GLOBAL_SCORE_WEIGHTS = {
+    'language_score': 0.25,
+    'job_score': 0.25,
+    'education_score': 0.15,
+    'health_score': 0.15,
+    'mental_health_score': 0.10,
+    'cultural_score': 0.05,
+    'cost_adjustment': 0.05
+}
+
+@lru_cache(maxsize=None)
+def get_global_catalog() -> DestinationCatalog:
+    """Build the global city catalog once; shared by the matchers and the RL agent"""
+    return DestinationCatalog(get_global_cities_data()['cities'], name_key='city')
+
+def _global_component_scores(refugee, city):
+    """Component scores of a refugee / catalog city pair, in GLOBAL_SCORE_WEIGHTS order"""
     # Language matching (25% weight)
-    refugee_langs = set(refugee.get('languages', []))
-    city_langs = set(city['languages'])
-    language_overlap = len(refugee_langs.intersection(city_langs))
-    scores['language_score'] = min(10, language_overlap * 2.5)
+    language_overlap = len(city.languages.intersection(refugee.get('languages', [])))
+    language_score = min(10, language_overlap * 2.5)
     
     # Job skills matching (25% weight)
-    refugee_skills = set(refugee.get('job_skills', []))
-    city_skills = set(city['job_skills'])
-    job_overlap = len(refugee_skills.intersection(city_skills))
-    scores['job_score'] = min(10, job_overlap * 2.5)
+    job_overlap = len(city.job_skills.intersection(refugee.get('job_skills', [])))
+    job_score = min(10, job_overlap * 2.5)
     
     # Education level matching (15% weight)
     refugee_edu = refugee.get('education_level', '')
-    city_edus = city['education_levels']
-    scores['education_score'] = 10 if refugee_edu in city_edus else 5
+    education_score = 10 if refugee_edu in city.education_levels else 5
     
     # Health requirements matching (15% weight)
-    refugee_health = set(refugee.get('health_requirements', []))
-    city_health = set(city['health_requirements'])
-    health_overlap = len(refugee_health.intersection(city_health))
-    scores['health_score'] = min(10, health_overlap * 3)
+    health_overlap = len(city.health_requirements.intersection(refugee.get('health_requirements', [])))
+    health_score = min(10, health_overlap * 3)
     
     # Mental health support (10% weight)
     refugee_needs_mental = refugee.get('mental_health_support_needed', False)
-    city_has_mental = city['mental_health_support']
-    scores['mental_health_score'] = 10 if (not refugee_needs_mental or city_has_mental) else 0
+    mental_health_score = 10 if (not refugee_needs_mental or city.mental_health_support) else 0
     
     # Cultural community matching (5% weight)
     refugee_culture = refugee.get('cultural_background', '').lower()
-    city_communities = [comm.lower() for comm in city['refugee_communities']]
-    scores['cultural_score'] = 10 if any(refugee_culture in comm for comm in city_communities) else 5
+    cultural_score = 10 if any(refugee_culture in comm for comm in city.communities_lower) else 5
     
     # Cost of living adjustment (5% weight) - penalize high cost for large families
     family_size = refugee.get('family_size', 1)
-    cost_of_living = city['cost_of_living']
+    cost_of_living = city.cost_of_living
     cost_penalty = 0
     if family_size > 3 and cost_of_living >= 8:
         cost_penalty = 2
     elif family_size > 2 and cost_of_living >= 7:
         cost_penalty = 1
-    scores['cost_adjustment'] = -cost_penalty
     
-    # Calculate total weighted score
-    weights = {
-        'language_score': 0.25,
-        'job_score': 0.25,
-        'education_score': 0.15,
-        'health_score': 0.15,
-        'mental_health_score': 0.10,
-        'cultural_score': 0.05,
-        'cost_adjustment': 0.05
-    }
+    return (language_score, job_score, education_score, health_score,
+            mental_health_score, cultural_score, -cost_penalty)
+
+@lru_cache(maxsize=None)
+def _global_total(component_scores):
+    """Weighted, rounded total; few distinct component combinations exist, so it is memoized"""
+    total_score = sum(score * weight for score, weight in zip(component_scores, GLOBAL_SCORE_WEIGHTS.values()))
+    return round(total_score, 2)
+
+class _CityView(NamedTuple):
+    """The Destination attributes _global_component_scores reads, taken straight from a raw city dict"""
+    languages: frozenset
+    job_skills: frozenset
+    education_levels: Any
+    health_requirements: frozenset
+    mental_health_support: bool
+    communities_lower: List[str]
+    cost_of_living: int
+
+def _as_destination(city):
+    """
+    Catalog Destinations pass through; raw dicts get a _CityView instead of
+    a full Destination.from_record, which copies the whole record and needs
+    keys the score never reads
+    """
+    if isinstance(city, Destination):
+        return city
+    return _CityView(
+        frozenset(city['languages']),
+        frozenset(city['job_skills']),
+        city['education_levels'],
+        frozenset(city['health_requirements']),
+        city['mental_health_support'],
+        [comm.lower() for comm in city['refugee_communities']],
+        city['cost_of_living']
+    )
+
+def calculate_global_match_score(refugee, city):
+    """Calculate matching scores for global cities (city: catalog Destination or raw dict)"""
+    component_scores = _global_component_scores(refugee, _as_destination(city))
+    scores = dict(zip(GLOBAL_SCORE_WEIGHTS, component_scores))
     
-    total_score = sum(scores[key] * weights[key] for key in weights)
-    scores['total_score'] = round(total_score, 2)
+    # Calculate total weighted score
+    scores['total_score'] = _global_total(component_scores)
     
     return scores
 
-def find_global_matches(refugee_data):
-    """Find best global city matches"""
-    cities_data = get_global_cities_data()
+def calculate_global_total_score(refugee, city):
+    """
+    Total of calculate_global_match_score without the per-component breakdown:
+    the fast path for ranking, identical to its 'total_score'
+    """
+    return _global_total(_global_component_scores(refugee, _as_destination(city)))
+
+# Candidate count above which top_k searches skip cities via score upper bounds
+PRUNED_SEARCH_MIN_CANDIDATES = 1000
+
+# Result row column -> calculate_global_match_score component
+BREAKDOWN_COLUMNS = {
+    'language_match': 'language_score',
+    'job_match': 'job_score',
+    'education_match': 'education_score',
+    'health_match': 'health_score',
+    'mental_health_match': 'mental_health_score',
+    'cultural_match': 'cultural_score'
+}
+
+def _global_match_row(city, total_score, score=None):
+    """Flatten a catalog city and its score into a result row (breakdown columns None without a breakdown)"""
+    row = {
+        'city': city.name,
+        'country': city.country,
+        'region': city.region,
+        'match_score': total_score
+    }
+    for column, component in BREAKDOWN_COLUMNS.items():
+        row[column] = None if score is None else score[component]
+    row['job_market_score'] = city.job_market_score
+    row['support_services_score'] = city.support_services_score
+    row['cost_of_living'] = city.cost_of_living
+    return row
+
+# find_global_matches results per canonical profile, for the current catalog version
+GLOBAL_MATCH_CACHE = ScoreCache(maxsize=1024)
+
+def find_global_matches(refugee_data, top_k=None, catalog=None, detail_top_k=None):
+    """
+    Find best global city matches (only the top_k best when top_k is set).
+    Cities are ranked on total scores alone; the per-component breakdown is
+    only computed for the first detail_top_k rows (all rows when None), the
+    other rows carry None in the breakdown columns.
+    """
+    if catalog is None:
+        catalog = get_global_catalog()
+    key = (canonical_profile_key(refugee_data, GLOBAL_PROFILE_FIELDS), top_k, detail_top_k)
+    matches = GLOBAL_MATCH_CACHE.get_or_compute(
+        key, catalog.version, lambda: _rank_global_matches(refugee_data, top_k, catalog, detail_top_k))
+    # Rows are handed out as copies so callers cannot alter cached results
+    return [dict(row) for row in matches]
+
+def _rank_global_matches(refugee_data, top_k, catalog, detail_top_k=None):
+    """Score the candidate cities of one profile and keep the top_k best"""
+    # Only cities in the preferred regions / countries / sub-regions are scored
+    candidate_ids = catalog.candidates(
+        regions=refugee_data.get('preferred_regions', []),
+        countries=refugee_data.get('preferred_countries', []),
+        sub_regions=refugee_data.get('preferred_sub_regions', [])
+    )
+    
+    # Large catalogs: only score cities whose upper bound can still reach the top_k
+    if top_k is not None and len(candidate_ids) >= PRUNED_SEARCH_MIN_CANDIDATES:
+        from pruned_search import pruned_top_k
+        ranked = pruned_top_k(refugee_data, catalog, top_k, candidate_ids, breakdown=False)
+    else:
+        # Phase one: totals only; a bounded heap avoids a full sort when top_k is set
+        totals = [(city_id, calculate_global_total_score(refugee_data, catalog[city_id]))
+                  for city_id in candidate_ids]
+        ranked = select_top_k(totals, top_k, key=lambda item: item[1])
+    
+    # Phase two: the per-component breakdown, only for the rows that are shown
     matches = []
-    
-    preferred_regions = refugee_data.get('preferred_regions', [])
-    
-    for city in cities_data['cities']:
-        # Filter by preferred regions if specified
-        if preferred_regions and 'Any' not in preferred_regions:
-            if city['region'] not in preferred_regions:
-                continue
-        
-        score = calculate_global_match_score(refugee_data, city)
-        
-        matches.append({
-            'city': city['city'],
-            'country': city['country'],
-            'region': city['region'],
-            'match_score': score['total_score'],
-            'language_match': score['language_score'],
-            'job_match': score['job_score'],
-            'education_match': score['education_score'],
-            'health_match': score['health_score'],
-            'mental_health_match': score['mental_health_score'],
-            'cultural_match': score['cultural_score'],
-            'job_market_score': city['job_market_score'],
-            'support_services_score': city['support_services_score'],
-            'cost_of_living': city['cost_of_living']
-        })
-    
-    # Sort by match score
-    matches.sort(key=lambda x: x['match_score'], reverse=True)
+    for rank, (city_id, total_score) in enumerate(ranked):
+        city = catalog[city_id]
+        score = None
+        if detail_top_k is None or rank < detail_top_k:
+            score = calculate_global_match_score(refugee_data, city)
+        matches.append(_global_match_row(city, total_score, score))
     return matches
 
 def plot_match_results(refugee_name, matches, top_n=8):
     """Create matplotlib visualizations of the matching results"""
+    # Plotting libraries load only when something is plotted
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("📦 Charts need matplotlib: pip install matplotlib")
+        return
+    import numpy as np
     
     if not matches:
         print("❌ No matches to plot.")
@@ -454,6 +548,8 @@ def plot_match_results(refugee_name, matches, top_n=8):
 
 def plot_detailed_city_analysis(top_city):
     """Create a detailed radar chart for the top matching city"""
+    import matplotlib.pyplot as plt
+    import numpy as np
     
     categories = ['Language\nMatch', 'Job\nMatch', 'Education\nMatch', 
                   'Healthcare\nMatch', 'Cultural\nFit', 'Job\nMarket', 
@@ -523,6 +619,20 @@ def display_global_results(refugee_name, matches):
         print(f"   🛠️  Support Services: {match['support_services_score']}/10")
         print(f"   💰 Cost of Living: {match['cost_of_living']}/10")
 
+def _profiled_find_global_matches(refugee_data, profile_dir, **kwargs):
+    """find_global_matches under cProfile, written to profile_dir for later analysis"""
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    if src_dir not in sys.path:
+        sys.path.append(src_dir)
+    from monitoring.profiling import ProfileTarget, profiled_call, DEFAULT_SAMPLE_INTERVAL
+
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"{datetime.now():%Y%m%d-%H%M%S}-global-{os.getpid()}")
+    target = ProfileTarget(path, 'cprofile', DEFAULT_SAMPLE_INTERVAL)
+    matches = profiled_call(target, find_global_matches, refugee_data, **kwargs)
+    print(f"🧪 Profile written to {target.path}.pstats")
+    return matches
+
 def main():
     try:
         # Get refugee details from user
@@ -533,7 +643,13 @@ def main():
         print("Please wait while we analyze cities worldwide...")
         
         # Find global matches
-        all_matches = find_global_matches(refugee_data)
+        # Every city is ranked, but only the plotted top 8 need a breakdown
+        # PROFILE_DIR=<dir> runs the search under cProfile
+        profile_dir = os.environ.get('PROFILE_DIR')
+        if profile_dir:
+            all_matches = _profiled_find_global_matches(refugee_data, profile_dir, detail_top_k=8)
+        else:
+            all_matches = find_global_matches(refugee_data, detail_top_k=8)
         
         # Display results
         display_global_results(refugee_data['name'], all_matches)
@@ -546,25 +662,15 @@ def main():
         print(f"\n{'='*70}")
         see_all = input("\n🔍 Would you like to see all available cities? (yes/no): ").strip().lower()
         if see_all in ['yes', 'y']:
-            cities_data = get_global_cities_data()
             print(f"\n🏙️  ALL AVAILABLE CITIES:")
-            for city in cities_data['cities']:
-                print(f"   • {city['city']}, {city['country']} ({city['region']})")
+            for city in get_global_catalog():
+                print(f"   • {city.name}, {city.country} ({city.region})")
             
     except Exception as e:
         print(f"❌ An error occurred: {e}")
 
 # Run the interactive global matching system
 if __name__ == "__main__":
-    # Install required package if not already installed
-    try:
-        import matplotlib.pyplot as plt
-    except ImportError:
-        print("📦 Installing matplotlib...")
-        import subprocess
-        subprocess.check_call(["pip", "install", "matplotlib"])
-        import matplotlib.pyplot as plt
-    
     main()
     
     # Ask if user wants to run another match
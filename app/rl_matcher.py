@@ -1,14 +1,18 @@
 # rl_matcher.py
 import numpy as np
-import pandas as pd
 from typing import List, Dict, Any, Tuple
 import random
 from collections import defaultdict
 import json
 import os
+import weakref
+
+# Every agent alive in this process, for memory accounting (GET /admin/memory)
+LIVE_AGENTS = weakref.WeakSet()
 
 class RefugeeMatchingRL:
     def __init__(self, state_size=50, action_size=12):  # Larger state space for more precision
+        LIVE_AGENTS.add(self)
         self.state_size = state_size
         self.action_size = action_size
         self.q_table = np.zeros((state_size, action_size))
@@ -32,17 +36,16 @@ class RefugeeMatchingRL:
         self.load_model()
         
     def _load_city_data(self) -> Dict[str, Any]:
-        """Load city data matching your existing system"""
-        from global_matcher import get_global_cities_data  # Import your existing function
+        """Load city data from the shared global catalog"""
+        from refugee_matcher import get_global_catalog
         
-        cities_data = get_global_cities_data()
         city_info = {}
-        for city in cities_data['cities']:
-            city_info[city['city']] = {
-                'cost_of_living': city['cost_of_living'],
-                'mental_health_support': city['mental_health_support'],
-                'job_market_score': city['job_market_score'],
-                'support_services_score': city['support_services_score']
+        for city in get_global_catalog():
+            city_info[city.name] = {
+                'cost_of_living': city.cost_of_living,
+                'mental_health_support': city.mental_health_support,
+                'job_market_score': city.job_market_score,
+                'support_services_score': city.support_services_score
             }
         return city_info
         
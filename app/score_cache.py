@@ -0,0 +1,117 @@
+# score_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Tuple
+
+# Profile attributes read by _calculate_match_score (RefugeeStateMatcher), with
+# the value a missing attribute is treated as
+STATE_PROFILE_FIELDS = {
+    'languages': (),
+    'job_skills': (),
+    'health_requirements': (),
+    'education_level': '',
+    'mental_health_support_needed': False,
+}
+
+# Profile attributes read by find_global_matches / calculate_global_match_score
+GLOBAL_PROFILE_FIELDS = {
+    'languages': (),
+    'job_skills': (),
+    'health_requirements': (),
+    'education_level': '',
+    'mental_health_support_needed': False,
+    'cultural_background': '',
+    'family_size': 1,
+    'preferred_regions': (),
+    'preferred_countries': (),
+    'preferred_sub_regions': (),
+}
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        # Every list attribute is only used as a set of terms
+        return tuple(sorted(set(value)))
+    return value
+
+
+def canonical_profile_key(profile: Dict[str, Any], fields: Dict[str, Any]) -> str:
+    """
+    Hash of the attributes a score function reads, ignoring everything else
+    (name, origin, ...). List attributes are compared as sorted, de-duplicated
+    sets, and a missing attribute equals its default, so profiles that
+    score identically share a key.
+    """
+    canonical = []
+    for field, default in fields.items():
+        value = _normalize(profile.get(field, default))
+        if field == 'cultural_background' and isinstance(value, str):
+            value = value.lower()  # the cultural score lowercases it too
+        elif field == 'mental_health_support_needed':
+            value = bool(value)
+        canonical.append((field, value))
+    return hashlib.sha1(repr(canonical).encode('utf-8')).hexdigest()
+
+
+class ScoreCache:
+    """
+    Bounded LRU cache of match results for one catalog version.
+
+    Entries are keyed by (canonical profile key, extra key), e.g. top_k. A
+    lookup with a different catalog version clears the cache first, so
+    results never outlive the destination data they were computed from.
+    Safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get_or_compute(self, key: Tuple[Hashable, ...], version: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = version
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            if version == self.version and self.maxsize > 0:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit / miss / eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'catalog_version': self.version,
+            }
@@ -0,0 +1,114 @@
+# score_store.py
+import numpy as np
+from typing import List, Dict, Any, Sequence, Tuple, NamedTuple
+
+from catalog import DestinationCatalog
+from batch_scoring import (EncodedCities, EncodedProfiles, ScoringScheme, GLOBAL_SCHEME,
+                           OVERLAP_COMPONENTS, _component_levels)
+from ranking import top_k_indices
+
+# Destination field -> score components that read it
+FIELD_DEPENDENCIES = {
+    'languages': ('language_score',),
+    'job_skills': ('job_score',),
+    'health_requirements': ('health_score',),
+    'education_levels': ('education_score',),
+    'mental_health_support': ('mental_health_score',),
+    'refugee_communities': ('cultural_score',),
+    'cost_of_living': ('cost_adjustment',),
+}
+
+
+class RescoreResult(NamedTuple):
+    """What one destination update touched"""
+    destination: str
+    version: str
+    components: Tuple[str, ...]
+    changed_rows: int
+    reranked_rows: int
+
+
+class ScoreStore:
+    """
+    Stored cohort x catalog score matrix that follows destination updates.
+
+    Keeps the level of every score component for every (profile,
+    destination) pair, the totals and each profile's top-k destination IDs.
+    update_destination() recomputes a single column, and only the
+    components that depend on the changed fields (FIELD_DEPENDENCIES), then
+    reselects the top-k of the profiles whose ranking can have changed.
+    Totals stay identical to a full score_matrix() over the updated catalog.
+    """
+
+    def __init__(self, profiles: Sequence[Dict[str, Any]], catalog: DestinationCatalog,
+                 top_k: int = 10, scheme: ScoringScheme = GLOBAL_SCHEME):
+        self.catalog = catalog
+        self.scheme = scheme
+        self.top_k = top_k
+
+        # Profile terms are part of the vocabularies so that a term a
+        # destination gains later still lines up with the encoded profiles
+        self.vocabularies = {}
+        for field in list(OVERLAP_COMPONENTS.values()) + ['education_levels']:
+            vocab = {}
+            for dest in catalog:
+                for term in dest.record[field]:
+                    vocab.setdefault(term, len(vocab))
+            for refugee in profiles:
+                terms = ([refugee.get('education_level', '')] if field == 'education_levels'
+                         else refugee.get(field, []))
+                for term in terms:
+                    vocab.setdefault(term, len(vocab))
+            self.vocabularies[field] = vocab
+
+        cities = EncodedCities(catalog, self.vocabularies)
+        self.profiles = EncodedProfiles(profiles, cities, scheme)
+        levels = _component_levels(self.profiles, cities, scheme, slice(None))
+        self.levels = {key: levels[key].astype(np.int8) for key in scheme.components}
+        self.totals = self._totals(self.levels)
+        self.rankings = top_k_indices(self.totals, top_k)
+
+    def _totals(self, levels: Dict[str, np.ndarray]) -> np.ndarray:
+        flat_index = np.ravel_multi_index(tuple(levels[key] for key in self.scheme.components),
+                                          self.scheme.total_table.shape)
+        return self.scheme.total_table.ravel()[flat_index]
+
+    def components_for(self, fields: Sequence[str]) -> Tuple[str, ...]:
+        """Scheme components that depend on any of the given destination fields"""
+        affected = {key for field in fields for key in FIELD_DEPENDENCIES.get(field, ())}
+        return tuple(key for key in self.scheme.components if key in affected)
+
+    def update_destination(self, name: str, changes: Dict[str, Any]) -> RescoreResult:
+        """Apply field changes to one destination and rescore only what they affect"""
+        catalog = self.catalog.replace(name, changes)
+        dest_id = self.catalog.ids_by_name[name]
+        self.catalog = catalog
+        components = self.components_for(list(changes))
+        if not components:
+            return RescoreResult(name, catalog.version, components, 0, 0)
+
+        column = EncodedCities([catalog[dest_id]], self.vocabularies)
+        levels = _component_levels(self.profiles, column, self.scheme, slice(None), components)
+        for key in components:
+            self.levels[key][:, dest_id] = levels[key][:, 0]
+        old = self.totals[:, dest_id].copy()
+        self.totals[:, dest_id] = self._totals({key: self.levels[key][:, dest_id]
+                                                for key in self.scheme.components})
+
+        changed = old != self.totals[:, dest_id]
+        # Only rows where the destination was ranked, or now reaches the k-th
+        # best score, can have a different top-k
+        if self.rankings.shape[1] < self.totals.shape[1]:
+            ranked = (self.rankings == dest_id).any(axis=1)
+            kth = np.take_along_axis(self.totals, self.rankings[:, -1:], axis=1)[:, 0]
+            changed &= ranked | (self.totals[:, dest_id] >= kth)
+        rows = np.nonzero(changed)[0]
+        if len(rows):
+            self.rankings[rows] = top_k_indices(self.totals[rows], self.top_k)
+        return RescoreResult(name, catalog.version, components,
+                             int(np.count_nonzero(old != self.totals[:, dest_id])), len(rows))
+
+    def top_matches(self, row: int) -> List[Tuple[str, float]]:
+        """(destination name, total score) pairs of one profile's top-k, best first"""
+        return [(self.catalog[dest_id].name, float(self.totals[row, dest_id]))
+                for dest_id in self.rankings[row]]
@@ -0,0 +1,146 @@
+# serialization.py
+import hashlib
+import importlib.util
+import json
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Sequence
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# orjson is optional: several times faster than the stdlib encoder when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+# Encoder behind FastJSONResponse and dumps_json, reported by /health and /metrics
+JSON_ENCODER = 'orjson' if orjson is not None else 'json'
+
+# msgpack and pyarrow are optional too: the binary wire formats are offered
+# only when installed. pyarrow is imported on first use, not at startup.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = 'application/json'
+NDJSON_TYPE = 'application/x-ndjson'
+MSGPACK_TYPE = 'application/msgpack'
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+MEDIA_TYPE_ALIASES = {
+    'application/x-msgpack': MSGPACK_TYPE,
+    'application/vnd.msgpack': MSGPACK_TYPE,
+    'application/jsonlines': NDJSON_TYPE,
+    'application/x-jsonlines': NDJSON_TYPE,
+}
+BINARY_TYPES = (MSGPACK_TYPE, ARROW_STREAM_TYPE)
+
+
+@lru_cache(maxsize=None)
+def load_pyarrow():
+    """The pyarrow module, or None when it is not installed"""
+    if importlib.util.find_spec('pyarrow') is None:
+        return None
+    import pyarrow
+    import pyarrow.ipc  # noqa: F401
+    return pyarrow
+
+
+def media_type(header: Optional[str]) -> str:
+    """Bare, lowercased media type of a Content-Type / Accept entry, aliases resolved"""
+    value = (header or '').split(';', 1)[0].strip().lower()
+    return MEDIA_TYPE_ALIASES.get(value, value)
+
+
+def format_available(media: str) -> bool:
+    if media == MSGPACK_TYPE:
+        return msgpack is not None
+    if media == ARROW_STREAM_TYPE:
+        return importlib.util.find_spec('pyarrow') is not None
+    return True
+
+
+def negotiate(accept: Optional[str], default: str, offered: Sequence[str] = BINARY_TYPES) -> Optional[str]:
+    """
+    Response media type for an Accept header: the highest-q offered binary
+    type whose library is installed, else default. Wildcards, JSON and
+    unknown types all get default, as before content negotiation existed;
+    None (406) only when the header asks for offered types that are all
+    unavailable and nothing else.
+    """
+    if not accept:
+        return default
+    entries = []
+    for position, entry in enumerate(accept.split(',')):
+        q = 1.0
+        for param in entry.split(';')[1:]:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            entries.append((-q, position, media_type(entry)))
+    unavailable = False
+    for _, _, media in sorted(entries):
+        if media in offered:
+            if format_available(media):
+                return media
+            unavailable = True
+        else:
+            return default
+    return None if unavailable else default
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+
+def dumps_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps_json. Endpoints returning one skip the
+    response_model validation pass, so content must already have the
+    documented shape (plain dicts, lists, str, int, float, bool, None).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class Preserialized(NamedTuple):
+    """A JSON body rendered once, with the strong ETag of its bytes"""
+    body: bytes
+    etag: str
+
+
+def preserialize(content: Any) -> Preserialized:
+    body = dumps_json(content)
+    return Preserialized(body, '"%s"' % hashlib.sha1(body).hexdigest()[:16])
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match lists this ETag (weak or strong) or '*'"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.replace('W/', '', 1) == etag:
+            return True
+    return False
+
+
+def cached_json_response(request: Request, payload: Preserialized) -> Response:
+    """200 with the pre-rendered body, or an empty 304 when the client already has it"""
+    headers = {'ETag': payload.etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type='application/json', headers=headers)
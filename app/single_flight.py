@@ -0,0 +1,104 @@
+# single_flight.py
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from admission import Deadline, DeadlineExceeded
+from stats import TIMING_WINDOW, percentile
+
+
+class _Flight:
+    """One shared computation: its task, the deadline it runs under and how many calls await it"""
+    __slots__ = ('task', 'deadline', 'waiters')
+
+    def __init__(self, deadline: Optional[Deadline]):
+        self.task = None
+        self.deadline = deadline
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls on one event loop.
+
+    The first call for a key (the leader) starts the computation; calls
+    with the same key that arrive while it is running (followers) await
+    the same result, or the same exception, instead of computing it
+    again. The computation runs as its own task, so a cancelled request
+    does not cancel it for the others. Nothing is kept after it finishes:
+    caching is left to the caller.
+
+    With deadlines, compute gets a Deadline of its own, extended to the
+    latest deadline among the calls waiting for it, and each call still
+    stops at its own deadline with DeadlineExceeded. Once no call is left
+    waiting, the shared deadline is cancelled, so work checking it stops,
+    and the next call for the key starts a new computation.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self.leaders = self.coalesced = self.failed = 0
+        self._follower_waits = deque(maxlen=TIMING_WINDOW)
+
+    async def do(self, key: Hashable, compute: Callable[[Optional[Deadline]], Awaitable[Any]],
+                 deadline: Optional[Deadline] = None) -> Any:
+        """
+        Result of compute(shared deadline) for key, shared with every
+        concurrent call for the same key; awaited until this call's deadline
+        """
+        flight = self._in_flight.get(key)
+        leader = flight is None
+        if leader:
+            self.leaders += 1
+            flight = _Flight(Deadline(deadline.remaining()) if deadline is not None else None)
+            flight.task = asyncio.ensure_future(compute(flight.deadline))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda done: self._finish(key, flight))
+        else:
+            self.coalesced += 1
+            if flight.deadline is not None:
+                flight.deadline.extend(deadline)
+
+        started = time.monotonic()
+        flight.waiters += 1
+        try:
+            if deadline is None:
+                return await asyncio.shield(flight.task)
+            try:
+                return await asyncio.wait_for(asyncio.shield(flight.task), deadline.remaining())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Request deadline exceeded") from None
+        finally:
+            flight.waiters -= 1
+            if not leader:
+                self._follower_waits.append(time.monotonic() - started)
+            if flight.waiters == 0 and not flight.task.done() and flight.deadline is not None:
+                # Every caller gave up: stop the work, and let the next call start afresh
+                flight.deadline.cancel('cancelled: no request waiting for it')
+                if self._in_flight.get(key) is flight:
+                    del self._in_flight[key]
+
+    def _finish(self, key: Hashable, flight: _Flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        task = flight.task
+        if task.cancelled() or task.exception() is not None:
+            self.failed += 1
+
+    def stats(self) -> Dict[str, Optional[Any]]:
+        """Leader / coalesced counts and how long coalesced calls waited (seconds)"""
+        calls = self.leaders + self.coalesced
+        waits = list(self._follower_waits)
+        return {
+            'in_flight': len(self._in_flight),
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+            'coalesced_rate': round(self.coalesced / calls, 4) if calls else None,
+            'follower_wait_seconds': {
+                'p50': percentile(waits, 0.5),
+                'p95': percentile(waits, 0.95),
+                'max': round(max(waits), 6) if waits else None,
+            },
+        }
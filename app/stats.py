@@ -0,0 +1,13 @@
+# stats.py
+from typing import Optional, Sequence
+
+# Recent timings kept by the pools and counters that report percentiles
+TIMING_WINDOW = 1024
+
+
+def percentile(values: Sequence[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of values (fraction in [0, 1]), rounded to microseconds; None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 6)
@@ -0,0 +1,184 @@
+# wire_format.py
+from typing import Any, Dict, List, Optional
+
+from serialization import MSGPACK_TYPE, ARROW_STREAM_TYPE, msgpack, dumps_msgpack, load_pyarrow
+
+# Per (profile, state) score columns, in StateMatch order
+SCORE_COLUMNS = ('match_score', 'language_match', 'job_match', 'education_match', 'health_match',
+                 'mental_health_match')
+# Per state columns, the same for every profile
+STATE_COLUMNS = ('job_market_score', 'support_services_score')
+
+
+def match_columns(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """StateMatch rows as one list per field"""
+    return {column: [row[column] for row in rows] for column in ('state',) + SCORE_COLUMNS + STATE_COLUMNS}
+
+
+def decode_profiles(body: bytes, media: str, single: bool = False) -> List[Any]:
+    """
+    Profile items of a MessagePack body (an array of maps, or {"profiles":
+    [...]}) or an Arrow IPC stream (one row per profile). With single, the
+    body holds exactly one profile: a MessagePack map or a one-row Arrow
+    stream. Items still need validating; undecodable bodies raise ValueError.
+    """
+    try:
+        if media == MSGPACK_TYPE:
+            items = msgpack.unpackb(body, raw=False) if body else []
+            if single and isinstance(items, dict):
+                items = [items]
+            elif isinstance(items, dict) and 'profiles' in items:
+                items = items['profiles']
+        else:
+            pa = load_pyarrow()
+            items = pa.ipc.open_stream(body).read_all().to_pylist() if body else []
+    except Exception as e:
+        raise ValueError(f"Undecodable {media} body: {e}") from e
+    if single:
+        if not isinstance(items, list) or len(items) != 1:
+            raise ValueError("Expected one profile: a MessagePack map or a one-row Arrow stream")
+    elif not isinstance(items, list):
+        raise ValueError("Expected a MessagePack array of profiles")
+    return items
+
+
+class MsgpackBatchEncoder:
+    """
+    Batch results as a stream of MessagePack maps: a header with the state
+    table and k, then one map per chunk of profiles with flat row-major
+    (profile x rank) columns: state_index into the header's states, and
+    the score columns. A final {"error", "completed"} map means the stream
+    was cut short.
+    """
+    media_type = MSGPACK_TYPE
+
+    def __init__(self, states: Dict[str, List[Any]], top_k: int):
+        self.states = states
+        self.top_k = top_k
+
+    def start(self) -> bytes:
+        return dumps_msgpack({
+            'states': self.states['state'],
+            **{column: self.states[column] for column in STATE_COLUMNS},
+            'top_k': self.top_k,
+            'total_states_evaluated': len(self.states['state']),
+        })
+
+    def chunk(self, names: List[str], state_ids, scores: Dict[str, Any], timestamp: str) -> bytes:
+        content = {'refugee_name': names, 'timestamp': timestamp, 'state_index': state_ids.ravel().tolist()}
+        for column in SCORE_COLUMNS:
+            content[column] = scores[column].ravel().tolist()
+        return dumps_msgpack(content)
+
+    def error(self, message: str, completed: int) -> bytes:
+        return dumps_msgpack({'error': message, 'completed': completed})
+
+    def finish(self) -> bytes:
+        return b''
+
+
+class _ChunkSink:
+    """Writable file collecting what the Arrow stream writer emits, drained per chunk"""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+class ArrowBatchEncoder:
+    """
+    Batch results as an Arrow IPC stream, one record batch per chunk of
+    profiles and one row per profile: refugee_name, then fixed-size lists
+    of k entries, best first, for the state (dictionary-encoded), score and
+    state columns. Each batch carries its timestamp as custom metadata; an
+    empty batch with "error" and "completed" metadata means the stream was
+    cut short.
+    """
+    media_type = ARROW_STREAM_TYPE
+
+    def __init__(self, states: Dict[str, List[Any]], top_k: int):
+        import numpy as np
+        pa = self._pa = load_pyarrow()
+        self.top_k = top_k
+        self._state_names = pa.array(states['state'], pa.string())
+        self._state_values = {column: np.asarray(states[column], dtype=np.int64) for column in STATE_COLUMNS}
+        fields = [pa.field('refugee_name', pa.string()),
+                  pa.field('state', pa.list_(pa.dictionary(pa.int32(), pa.string()), top_k))]
+        fields += [pa.field(column, pa.list_(pa.float64(), top_k)) for column in SCORE_COLUMNS]
+        fields += [pa.field(column, pa.list_(pa.int64(), top_k)) for column in STATE_COLUMNS]
+        self.schema = pa.schema(fields, metadata={'top_k': str(top_k),
+                                                  'total_states_evaluated': str(len(states['state']))})
+        self._sink = _ChunkSink()
+        self._writer = None
+
+    def start(self) -> bytes:
+        self._writer = self._pa.ipc.new_stream(self._sink, self.schema)
+        return self._sink.drain()
+
+    def chunk(self, names: List[str], state_ids, scores: Dict[str, Any], timestamp: str) -> bytes:
+        import numpy as np
+        pa, k = self._pa, self.top_k
+        flat_ids = np.ascontiguousarray(state_ids, dtype=np.int32).ravel()
+        columns = [pa.array(names, pa.string()),
+                   pa.FixedSizeListArray.from_arrays(
+                       pa.DictionaryArray.from_arrays(pa.array(flat_ids), self._state_names), k)]
+        columns += [pa.FixedSizeListArray.from_arrays(
+                        pa.array(np.ascontiguousarray(scores[column], dtype=np.float64).ravel()), k)
+                    for column in SCORE_COLUMNS]
+        columns += [pa.FixedSizeListArray.from_arrays(pa.array(self._state_values[column][flat_ids]), k)
+                    for column in STATE_COLUMNS]
+        self._writer.write_batch(pa.record_batch(columns, schema=self.schema),
+                                 custom_metadata={'timestamp': timestamp})
+        return self._sink.drain()
+
+    def error(self, message: str, completed: int) -> bytes:
+        empty = self._pa.record_batch([self._pa.array([], field.type) for field in self.schema], schema=self.schema)
+        self._writer.write_batch(empty, custom_metadata={'error': message, 'completed': str(completed)})
+        return self.finish()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def batch_encoder(media: str, states: Dict[str, List[Any]], top_k: int):
+    """Streaming encoder for media (MSGPACK_TYPE or ARROW_STREAM_TYPE)"""
+    if media == MSGPACK_TYPE:
+        return MsgpackBatchEncoder(states, top_k)
+    return ArrowBatchEncoder(states, top_k)
+
+
+def encode_match_response(response: Dict[str, Any], media: str,
+                          states: Optional[Dict[str, List[Any]]] = None) -> bytes:
+    """
+    One MatchResponse dict in media. MessagePack keeps the MatchResponse
+    shape with matches as columns (match_columns); Arrow is the one-row
+    stream of ArrowBatchEncoder, which needs the catalog's states table.
+    """
+    matches = response['matches']
+    if media == MSGPACK_TYPE:
+        return dumps_msgpack(dict(response, matches=match_columns(matches)))
+
+    import numpy as np
+    ids_by_name = {name: position for position, name in enumerate(states['state'])}
+    encoder = ArrowBatchEncoder(states, len(matches))
+    state_ids = np.array([[ids_by_name[row['state']] for row in matches]], dtype=np.int32).reshape(1, -1)
+    scores = {column: np.array([[row[column] for row in matches]], dtype=np.float64).reshape(1, -1)
+              for column in SCORE_COLUMNS}
+    return (encoder.start() + encoder.chunk([response['refugee_name']], state_ids, scores, response['timestamp'])
+            + encoder.finish())
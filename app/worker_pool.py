@@ -0,0 +1,142 @@
+# worker_pool.py
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from stats import TIMING_WINDOW, percentile
+
+
+class PoolSaturated(RuntimeError):
+    """Raised instead of queueing when every worker is busy and the queue is full"""
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    """Runs in the worker: the start time tells how long the call waited in the queue"""
+    started = time.monotonic()
+    return started, fn(*args, **kwargs)
+
+
+class WorkerPool:
+    """
+    Bounded pool that runs CPU-bound scoring off the asyncio event loop.
+
+    kind is 'thread' or 'process'. At most max_workers calls run at once and
+    at most max_queue more wait for a worker; beyond that run() raises
+    PoolSaturated right away, so overload turns into fast 503s instead of
+    an ever-growing backlog. In process mode, fn and its arguments must be
+    picklable (module-level functions) and each worker process keeps its
+    own copy of any module state, caches included.
+
+    observer, when set, is called with (wait seconds, run seconds) after
+    every completed call, from the thread that completes it.
+    """
+
+    def __init__(self, kind: str = 'thread', max_workers: Optional[int] = None, max_queue: int = 64,
+                 observer: Optional[Callable[[float, float], None]] = None):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+        if max_queue < 0:
+            raise ValueError("max_queue must be >= 0")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.observer = observer
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = self.completed = self.failed = self.rejected = 0
+        self._wait_times = deque(maxlen=TIMING_WINDOW)
+        self._run_times = deque(maxlen=TIMING_WINDOW)
+
+    @classmethod
+    def from_env(cls, prefix: str = 'MATCH_POOL_') -> 'WorkerPool':
+        """Configure from <prefix>KIND, <prefix>WORKERS and <prefix>QUEUE environment variables"""
+        workers = os.environ.get(prefix + 'WORKERS')
+        return cls(kind=os.environ.get(prefix + 'KIND', 'thread'),
+                   max_workers=int(workers) if workers else None,
+                   max_queue=int(os.environ.get(prefix + 'QUEUE', 64)))
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='match-worker')
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls accepted but still waiting for a free worker"""
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on a worker and await its result"""
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(
+                    f"All {self.max_workers} workers busy and {self.max_queue} requests queued")
+            self.in_flight += 1
+            self.submitted += 1
+        submitted = time.monotonic()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args, kwargs)
+        except BaseException:
+            self._release(None, submitted)
+            raise
+        # Released when the worker is done, not when the caller stops waiting:
+        # a cancelled request keeps its slot until its call has really finished
+        future.add_done_callback(lambda done: self._release(done, submitted))
+        _, result = await asyncio.wrap_future(future)
+        return result
+
+    def _release(self, future, submitted: float):
+        finished = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            if future is None or future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            started, _ = future.result()
+            wait, run = max(0.0, started - submitted), finished - started
+            self.completed += 1
+            self._wait_times.append(wait)
+            self._run_times.append(run)
+        if self.observer is not None:
+            self.observer(wait, run)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, counters and recent wait / run time percentiles (seconds)"""
+        with self._lock:
+            waits, runs = list(self._wait_times), list(self._run_times)
+            return {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'queue_depth': self.queue_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'wait_seconds': {
+                    'p50': percentile(waits, 0.5),
+                    'p95': percentile(waits, 0.95),
+                    'max': round(max(waits), 6) if waits else None,
+                },
+                'run_seconds': {
+                    'p50': percentile(runs, 0.5),
+                    'p95': percentile(runs, 0.95),
+                    'max': round(max(runs), 6) if runs else None,
+                },
+            }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
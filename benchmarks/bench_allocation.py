@@ -0,0 +1,91 @@
+"""
+Benchmark: capacity-constrained cohort allocation over the global cities.
+
+Scores a synthetic cohort, splits --capacity-ratio x cohort slots evenly
+across the cities and solves the allocation exactly, then runs the anytime
+local search under --time-budget for comparison. When scipy is installed, a
+subsample is cross-checked against an exact slot-expanded assignment.
+
+Usage (from the repository root):
+    python benchmarks/bench_allocation.py --profiles 50000 --capacity-ratio 0.9
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from synthetic import synthetic_cohort
+
+from refugee_matcher import get_global_catalog  # noqa: E402
+from batch_scoring import score_matrix  # noqa: E402
+from allocation import solve_capacitated_assignment, improve_assignment  # noqa: E402
+
+
+def even_capacities(total, destinations):
+    """Split total slots as evenly as possible"""
+    base, extra = divmod(total, destinations)
+    return [base + (i < extra) for i in range(destinations)]
+
+
+def exact_objective(scores, capacities):
+    """Reference optimum via one column per slot plus one 'unplaced' column per refugee"""
+    from scipy.optimize import linear_sum_assignment
+    slot_site = np.repeat(np.arange(scores.shape[1]), capacities)
+    cost = np.zeros((scores.shape[0], len(slot_site) + scores.shape[0]))
+    cost[:, :len(slot_site)] = -np.rint(scores * 100)[:, slot_site]
+    rows, cols = linear_sum_assignment(cost)
+    return round(-cost[rows, cols].sum() / 100, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', type=int, default=50000)
+    parser.add_argument('--capacity-ratio', type=float, default=0.9)
+    parser.add_argument('--time-budget', type=float, default=1.0)
+    parser.add_argument('--check-profiles', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    catalog = get_global_catalog()
+    cohort = synthetic_cohort(args.profiles, args.seed)
+
+    start = time.perf_counter()
+    scores = score_matrix(cohort, catalog, components=False)['total_score']
+    score_time = time.perf_counter() - start
+
+    capacities = even_capacities(int(len(cohort) * args.capacity_ratio), len(catalog))
+    result = solve_capacitated_assignment(scores, capacities)
+
+    favourite_loads = np.bincount(np.argmax(scores, axis=1), minlength=len(catalog))
+    print(f"Cohort:            {len(cohort):,} profiles x {len(catalog)} cities, "
+          f"{sum(capacities):,} slots")
+    print(f"Scoring:           {score_time:.3f}s")
+    print(f"Allocation:        {result.elapsed:.3f}s ({result.method}, {result.iterations} path searches)")
+    print(f"Placed:            {result.placed:,} ({result.unplaced:,} unplaced)")
+    print(f"Objective:         {result.objective:,.2f}")
+    print(f"Overflow:          {int(np.maximum(favourite_loads - capacities, 0).sum()):,} "
+          f"refugees over capacity if everyone took their best city")
+
+    search = improve_assignment(scores, capacities, time_budget=args.time_budget)
+    print(f"Local search:      {search.elapsed:.3f}s ({search.iterations} passes), objective "
+          f"{search.objective:,.2f} ({result.objective - search.objective:,.2f} below optimum)")
+
+    mismatches = 0
+    try:
+        import scipy  # noqa: F401
+    except ImportError:
+        print("Exactness check:   skipped (scipy not installed)")
+    else:
+        rng = np.random.default_rng(args.seed)
+        sample = scores[rng.choice(len(cohort), min(args.check_profiles, len(cohort)), replace=False)]
+        sample_capacities = even_capacities(int(len(sample) * args.capacity_ratio), len(catalog))
+        expected = exact_objective(sample, sample_capacities)
+        actual = solve_capacitated_assignment(sample, sample_capacities).objective
+        mismatches = int(abs(actual - expected) > 1e-6)
+        print(f"Exactness check:   {actual:,.2f} vs {expected:,.2f} on {len(sample)} profiles")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Benchmark: /match/batch body decoding, per-profile RefugeeProfile(**item).model_dump()
+after json.loads vs. the whole-body BatchProfileDecoder.
+
+Also times what the decoded dicts still cost the scorer: EncodedProfiles
+turns them into multi-hot rows against the state vocabularies, which the
+JSON validator cannot do as it parses.
+
+Usage (from the repository root):
+    python benchmarks/bench_batch_decoding.py --profiles 50000
+"""
+import argparse
+import json
+import sys
+import time
+
+from synthetic import synthetic_cohort
+
+from batch_scoring import EncodedProfiles
+from main import RefugeeProfile, batch_decoder, matcher  # noqa: E402
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if not batch_decoder.available:
+        print("BatchProfileDecoder needs pydantic 2; every body takes the per-profile path")
+        return 1
+
+    cohort = synthetic_cohort(args.profiles, args.seed)
+    body = json.dumps(cohort).encode('utf-8')
+    ndjson = b'\n'.join(json.dumps(profile).encode('utf-8') for profile in cohort)
+
+    per_profile_time, expected = best_of(
+        args.repeat, lambda: [RefugeeProfile(**item).model_dump() for item in json.loads(body)])
+    list_time, decoded = best_of(args.repeat, lambda: batch_decoder.decode(body))
+    ndjson_time, decoded_ndjson = best_of(args.repeat, lambda: batch_decoder.decode(ndjson, ndjson=True))
+    scheme, states = matcher._batch_scorer()
+    encode_time, _ = best_of(args.repeat, lambda: EncodedProfiles(decoded, states, scheme))
+
+    mismatches = sum(a != b for a, b in zip(expected, decoded)) + sum(
+        a != b for a, b in zip(expected, decoded_ndjson))
+    mb = len(body) / 1e6
+    print(f"Body:            {args.profiles:,} profiles, {mb:.1f} MB")
+    print(f"Per-profile:     {per_profile_time * 1000:8.1f} ms ({mb / per_profile_time:.0f} MB/s)")
+    print(f"Decoder (JSON):  {list_time * 1000:8.1f} ms ({mb / list_time:.0f} MB/s, "
+          f"{per_profile_time / list_time:.1f}x)")
+    print(f"Decoder (NDJSON):{ndjson_time * 1000:8.1f} ms ({per_profile_time / ndjson_time:.1f}x)")
+    print(f"Encoding:        {encode_time * 1000:8.1f} ms ({encode_time / args.profiles * 1e6:.2f} us/profile, "
+          f"{encode_time / list_time:.0%} of decoding)")
+    print(f"Mismatches:      {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
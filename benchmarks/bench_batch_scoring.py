@@ -0,0 +1,52 @@
+"""
+Benchmark: per-pair calculate_global_match_score loop vs. the vectorized
+N x M batch engine in app/batch_scoring.py.
+
+Usage (from the repository root):
+    python benchmarks/bench_batch_scoring.py --profiles 10000
+"""
+import argparse
+import sys
+import time
+
+from synthetic import synthetic_cohort
+
+from refugee_matcher import get_global_cities_data, calculate_global_match_score  # noqa: E402
+from batch_scoring import score_matrix, COMPONENT_ORDER  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cities = get_global_cities_data()['cities']
+    cohort = synthetic_cohort(args.profiles, args.seed)
+
+    start = time.perf_counter()
+    loop_scores = [[calculate_global_match_score(p, c) for c in cities] for p in cohort]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_scores = score_matrix(cohort, cities)
+    batch_time = time.perf_counter() - start
+
+    mismatches = 0
+    for i, row in enumerate(loop_scores):
+        for j, expected in enumerate(row):
+            for key in COMPONENT_ORDER + ['total_score']:
+                if batch_scores[key][i, j] != expected[key]:
+                    mismatches += 1
+
+    pairs = len(cohort) * len(cities)
+    print(f"Pairs scored:      {pairs:,} ({len(cohort):,} profiles x {len(cities)} cities)")
+    print(f"Per-pair loop:     {loop_time:.3f}s ({pairs / loop_time:,.0f} pairs/s)")
+    print(f"Batch engine:      {batch_time:.3f}s ({pairs / batch_time:,.0f} pairs/s)")
+    print(f"Speedup:           {loop_time / batch_time:.1f}x")
+    print(f"Mismatched values: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Benchmark: API cold start, from process launch to the first GET /health 200.
+
+Each run starts a fresh `uvicorn main:app` in app/ on a free port and polls
+/health until it answers. Also times a bare `import main` and checks that
+the heavy libraries deferred to their code paths (numpy, pandas,
+matplotlib, requests) are not loaded at import. Exits non-zero when the
+median cold start exceeds --budget seconds or a deferred library is
+imported eagerly.
+
+Usage (from the repository root):
+    python benchmarks/bench_cold_start.py --runs 5 --budget 1.5
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from synthetic import APP_DIR
+
+# Libraries each API / CLI module must not load at import time
+DEFERRED_MODULES = {
+    'main': ('numpy', 'pandas', 'matplotlib', 'requests'),
+    'refugee_matcher': ('numpy', 'pandas', 'matplotlib', 'requests'),
+    'rl_matcher': ('pandas', 'matplotlib', 'requests'),  # its Q-table needs numpy
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_import(module):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {module}'], cwd=APP_DIR, check=True)
+    return time.perf_counter() - start
+
+
+def eager_imports(module, deferred):
+    """Deferred libraries that importing module still loads"""
+    code = (f"import sys, {module}; "
+            f"print(' '.join(m for m in {deferred!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=APP_DIR, check=True,
+                            capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def time_to_health(timeout):
+    """Seconds from launching uvicorn until /health returns 200"""
+    port = free_port()
+    url = f'http://127.0.0.1:{port}/health'
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.5,
+                        help='Maximum median seconds from launch to the first /health 200')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    interpreter = statistics.median(time_import('sys') for _ in range(args.runs))
+    imports = statistics.median(time_import('main') for _ in range(args.runs))
+    cold_starts = [time_to_health(args.timeout) for _ in range(args.runs)]
+    median = statistics.median(cold_starts)
+
+    eager = {module: eager_imports(module, deferred) for module, deferred in DEFERRED_MODULES.items()}
+    print(f"Interpreter start: {interpreter:.3f}s")
+    print(f"import main:       {imports:.3f}s ({imports - interpreter:.3f}s over a bare interpreter)")
+    print(f"Cold start:        {median:.3f}s median to first /health 200 "
+          f"(min {min(cold_starts):.3f}s, max {max(cold_starts):.3f}s, budget {args.budget:.2f}s)")
+    for module, loaded in eager.items():
+        print(f"Eager imports:     {module}: {', '.join(loaded) or 'none'}")
+
+    failed = median > args.budget or any(eager.values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
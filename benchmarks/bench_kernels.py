@@ -0,0 +1,315 @@
+"""
+Benchmark: scoring-kernel suite with JSON baselines and regression checks.
+
+Times calculate_global_match_score, RefugeeStateMatcher.match_refugee_to_states,
+find_global_matches, RefugeeMatchingRL.train_episode and
+RefugeeMatchingRL.predict_best_cities over a grid of synthetic scales
+(profiles x destinations). Match caches are disabled so every call does
+the full work.
+
+Every kernel does work per profile, so a case is one kernel at one
+destination scale, timed on a fixed batch of min(--batch-profiles,
+--max-pairs / destinations) profiles and reported as seconds per profile.
+The profile scales are not measured separately: their totals are derived
+from that rate (estimated_total_seconds), as a 100k x 100k case is only
+ever measured on a few profiles. The RL kernels choose among a fixed 12
+cities, so they only run at 12 destinations.
+
+Each case is the median of --repeat timed runs, each looped to at least
+MIN_RUN_SECONDS, with the median absolute deviation (MAD) as its noise.
+Shared and frequency-scaled machines drift by tens of percent between
+(and during) runs, so every timed run is paired with a run of a fixed
+calibration loop, and cases are compared by their time relative to it.
+--save writes the results as the baseline; otherwise they are compared
+with it and the run fails when a case's median relative time exceeds the
+baseline's by more than --tolerance (relative) plus NOISE_MADS times the
+two runs' MADs plus ABS_FLOOR_SECONDS of run time. Baselines are still
+machine-specific: save one on the machine that runs the comparison.
+
+Usage (from the repository root):
+    python benchmarks/bench_kernels.py --save
+    python benchmarks/bench_kernels.py --tolerance 0.25
+    python benchmarks/bench_kernels.py --kernels global_score,find_global --destinations 12,1000
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from synthetic import synthetic_cohort, synthetic_cities
+
+from catalog import DestinationCatalog  # noqa: E402
+import refugee_matcher  # noqa: E402
+from refugee_matcher import calculate_global_match_score, find_global_matches  # noqa: E402
+from main import RefugeeStateMatcher  # noqa: E402
+from rl_matcher import RefugeeMatchingRL  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'kernels.json')
+PROFILE_SCALES = (1, 1000, 100000)
+DESTINATION_SCALES = (12, 1000, 100000)
+RL_DESTINATIONS = 12
+# Shortest timed run; small batches are looped until they take this long
+MIN_RUN_SECONDS = 0.2
+# Slack of a regression check on top of --tolerance: this many MADs of the
+# baseline and the new run, plus this much time per timed run
+NOISE_MADS = 3
+ABS_FLOOR_SECONDS = 0.002
+# Iterations of the calibration loop timed next to every run
+CALIBRATION_ITERATIONS = 100000
+
+
+class SyntheticStateMatcher(RefugeeStateMatcher):
+    """RefugeeStateMatcher over generated states instead of the built-in twelve"""
+
+    def __init__(self, states):
+        self._synthetic_states = states
+        super().__init__(cache_size=0)
+
+    def _initialize_states_data(self):
+        return self._synthetic_states
+
+
+def synthetic_states(size, seed):
+    states = []
+    for city in synthetic_cities(size, seed):
+        state = {key: value for key, value in city.items() if key not in ('city', 'country', 'region')}
+        state['state'] = city['city']
+        states.append(state)
+    return states
+
+
+def rl_agent(seed):
+    """Agent with a fresh Q-table and seeded exploration, whatever model file is on disk"""
+    agent = RefugeeMatchingRL()
+    agent.q_table[:] = 0.0
+    random.seed(seed)
+    return agent
+
+
+# name -> (setup(destinations, seed) -> run(profiles), destination scales)
+def setup_global_score(destinations, seed):
+    cities = synthetic_cities(destinations, seed)
+
+    def run(batch):
+        for profile in batch:
+            for city in cities:
+                calculate_global_match_score(profile, city)
+    return run
+
+
+def setup_state_match(destinations, seed):
+    matcher = SyntheticStateMatcher(synthetic_states(destinations, seed))
+
+    def run(batch):
+        for profile in batch:
+            matcher.match_refugee_to_states(profile)
+    return run
+
+
+def setup_find_global(destinations, seed):
+    catalog = DestinationCatalog(synthetic_cities(destinations, seed))
+
+    def run(batch):
+        for profile in batch:
+            find_global_matches(profile, top_k=10, catalog=catalog)
+    return run
+
+
+def setup_rl_train(destinations, seed):
+    agent = rl_agent(seed)
+    rng = random.Random(seed)
+
+    def run(batch):
+        for profile in batch:
+            agent.train_episode(profile, rng.random())
+    return run
+
+
+def setup_rl_predict(destinations, seed):
+    agent = rl_agent(seed)
+    rng = random.Random(seed)
+    for profile in synthetic_cohort(500, seed):
+        agent.train_episode(profile, rng.random())
+
+    def run(batch):
+        for profile in batch:
+            agent.predict_best_cities(profile, top_k=3)
+    return run
+
+
+KERNELS = {
+    'global_score': (setup_global_score, DESTINATION_SCALES),
+    'state_match': (setup_state_match, DESTINATION_SCALES),
+    'find_global': (setup_find_global, DESTINATION_SCALES),
+    'rl_train': (setup_rl_train, (RL_DESTINATIONS,)),
+    'rl_predict': (setup_rl_predict, (RL_DESTINATIONS,)),
+}
+
+
+def calibration_seconds():
+    """
+    Time a fixed interpreter-bound loop (dict lookups, float arithmetic,
+    a small sort), the same kind of work as the kernels, to measure how
+    fast the machine is running right now.
+    """
+    weights = {f'k{i}': i / 7 for i in range(32)}
+    keys = list(weights)
+    start = time.perf_counter()
+    total = 0.0
+    for i in range(CALIBRATION_ITERATIONS):
+        total += weights[keys[i % 32]] * 1.5 + min(i % 13, 5)
+        if i % 500 == 0:
+            sorted(keys, key=weights.get, reverse=True)
+    return time.perf_counter() - start
+
+
+def case_id(kernel, destinations):
+    return f'{kernel}/d{destinations}'
+
+
+def time_case(run, kernel, destinations, profile_scales, batch_profiles, max_pairs, repeat, seed):
+    batch_size = max(1, min(batch_profiles, max_pairs // destinations))
+    batch = synthetic_cohort(batch_size, seed)
+    # Repeat small batches until one timed run is long enough to measure reliably
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run(batch)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_SECONDS:
+            break
+        loops = max(loops * 2, int(loops * MIN_RUN_SECONDS / max(elapsed, 1e-9)) + 1)
+    per_profile = []
+    relative = []
+    for _ in range(repeat):
+        calibration = calibration_seconds()
+        start = time.perf_counter()
+        for _ in range(loops):
+            run(batch)
+        seconds = (time.perf_counter() - start) / loops / batch_size
+        per_profile.append(seconds)
+        relative.append(seconds / calibration)
+    median = statistics.median(per_profile)
+    relative_median = statistics.median(relative)
+    return {
+        'kernel': kernel,
+        'destinations': destinations,
+        'measured_profiles': batch_size,
+        'loops': loops,
+        'repeat': repeat,
+        'seconds_per_profile': median,
+        # Per-profile time in calibration loops, which is what is compared
+        'relative_per_profile': relative_median,
+        'mad_relative_per_profile': statistics.median(abs(value - relative_median) for value in relative),
+        'estimated_total_seconds': {str(profiles): round(median * profiles, 6) for profiles in profile_scales},
+    }
+
+
+def allowed_slowdown(previous, result, tolerance):
+    """Largest relative-per-profile increase over the baseline that is still noise"""
+    floor = ABS_FLOOR_SECONDS / (result['loops'] * result['measured_profiles'])
+    return (tolerance * previous['relative_per_profile']
+            + NOISE_MADS * (previous['mad_relative_per_profile'] + result['mad_relative_per_profile'])
+            + floor * result['relative_per_profile'] / result['seconds_per_profile'])
+
+
+def parse_scales(text, default):
+    return tuple(int(value) for value in text.split(',')) if text else default
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--kernels', default=','.join(KERNELS), help='Comma-separated kernels to run')
+    parser.add_argument('--profiles', help='Comma-separated profile scales to estimate totals for '
+                                           '(default 1,1000,100000)')
+    parser.add_argument('--destinations', help='Comma-separated destination scales (default 12,1000,100000)')
+    parser.add_argument('--batch-profiles', type=int, default=1000, help='Most profiles timed per case')
+    parser.add_argument('--max-pairs', type=int, default=200000,
+                        help='Most profile x destination pairs timed per case')
+    parser.add_argument('--repeat', type=int, default=9, help='Median of this many runs per case')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative slowdown per case before the run fails')
+    args = parser.parse_args()
+
+    kernels = [name.strip() for name in args.kernels.split(',') if name.strip()]
+    unknown = [name for name in kernels if name not in KERNELS]
+    if unknown:
+        parser.error(f"unknown kernels: {', '.join(unknown)} (choose from {', '.join(KERNELS)})")
+    profile_scales = parse_scales(args.profiles, PROFILE_SCALES)
+    destination_scales = parse_scales(args.destinations, DESTINATION_SCALES)
+
+    # Every call must do the full work, not return a cached ranking
+    refugee_matcher.GLOBAL_MATCH_CACHE.maxsize = 0
+
+    results = {}
+    for kernel in kernels:
+        for destinations in destination_scales:
+            setup, scales = KERNELS[kernel]
+            if destinations not in scales:
+                continue
+            run = setup(destinations, args.seed)
+            results[case_id(kernel, destinations)] = time_case(
+                run, kernel, destinations, profile_scales, args.batch_profiles, args.max_pairs, args.repeat,
+                args.seed)
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('cases', {})
+
+    regressions = []
+    print(f"{'case':<24} {'per profile':>14} {'noise':>7} {'measured':>9} {'baseline':>14} {'change':>8}")
+    for case, result in results.items():
+        per_profile = result['seconds_per_profile']
+        relative = result['relative_per_profile']
+        line = (f"{case:<24} {per_profile * 1e6:>11.1f} us "
+                f"{result['mad_relative_per_profile'] / relative:>6.1%} {result['measured_profiles']:>9}")
+        previous = baseline.get(case)
+        if previous and 'relative_per_profile' in previous:
+            change = relative / previous['relative_per_profile'] - 1
+            line += f" {previous['seconds_per_profile'] * 1e6:>11.1f} us {change:>+7.0%}"
+            if relative - previous['relative_per_profile'] > allowed_slowdown(previous, result, args.tolerance):
+                regressions.append(case)
+                line += '  REGRESSION'
+        print(line)
+        estimates = ', '.join(f"p{profiles}: {seconds:.3g}s"
+                              for profiles, seconds in result['estimated_total_seconds'].items())
+        print(f"{'':<24} estimated totals {estimates}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'environment': {
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'cpu_count': os.cpu_count(),
+                },
+                'batch_profiles': args.batch_profiles,
+                'max_pairs': args.max_pairs,
+                'repeat': args.repeat,
+                'seed': args.seed,
+                'cases': results,
+            }, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {os.path.relpath(args.baseline)}")
+    elif not baseline:
+        print(f"No baseline at {os.path.relpath(args.baseline)}; run with --save to create one")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%} plus noise: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+"""
+Benchmark: replay refugee profiles against the API and report latency.
+
+Profiles come from a JSON list (default app/refugee_data.json) or a JSON
+Lines file with one profile per line, either bare or under a "profile"
+key; other lines are skipped. They are replayed round-robin, as POST
+bodies to --endpoint, either open-loop at --rate requests per second or
+closed-loop by --concurrency clients. Unless --url is given, a fresh
+uvicorn is launched in app/ for the run.
+
+With --replay unique (the default) every request is a new profile to the
+server's match cache: it gets a unique name and an extra, unknown job
+skill, which changes the cache key but not the scores. --replay exact
+sends the profiles unchanged, so after the first round every request is
+a cache hit and the run measures the cache rather than matching.
+
+Open-loop latency is measured from each request's scheduled start, so a
+server that falls behind shows up in the percentiles instead of silently
+lowering the offered rate.
+
+The JSON report (--output, or stdout) holds throughput, p50/p95/p99
+latency of the 200 responses and error rates. --baseline compares it with
+an earlier report and exits non-zero when p99 latency regresses by more
+than --max-regression, or the error rate grows by more than
+--max-error-increase: a release that fails fast would otherwise look
+faster. Reports taken under a different load (endpoint, mode, rate or
+concurrency, replay) are not compared.
+
+Usage (from the repository root):
+    python benchmarks/bench_load.py --rate 200 --duration 20 --output load.json
+    python benchmarks/bench_load.py --concurrency 32 --baseline load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from urllib.parse import urlsplit
+
+from synthetic import APP_DIR
+from bench_cold_start import free_port
+
+
+def load_profiles(path):
+    """Profiles from a JSON list or a JSON Lines file"""
+    with open(path) as f:
+        text = f.read()
+    try:
+        records = json.loads(text)
+    except json.JSONDecodeError:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(records, dict):
+        records = [records]
+    profiles = []
+    for record in records:
+        if isinstance(record, dict) and isinstance(record.get('profile'), dict):
+            record = record['profile']
+        if isinstance(record, dict) and 'languages' in record:
+            profiles.append(record)
+    if not profiles:
+        raise SystemExit(f"No refugee profiles in {path}")
+    return profiles
+
+
+def request_bodies(profiles, replay):
+    """body_for(i) -> the i-th request body, cycling through profiles"""
+    if replay == 'exact':
+        bodies = [json.dumps(profile).encode('utf-8') for profile in profiles]
+        return lambda i: bodies[i % len(bodies)]
+
+    def body_for(i):
+        profile = dict(profiles[i % len(profiles)])
+        profile['name'] = f"{profile.get('name', 'Refugee')}-{i}"
+        # No destination offers this skill: the scores stay the same, the cache key does not
+        profile['job_skills'] = list(profile.get('job_skills', [])) + [f'replay-{i}']
+        return json.dumps(profile).encode('utf-8')
+    return body_for
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client connection"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection') == 'close':
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class LoadRun:
+    """Sends the requests and records (latency, status) per request"""
+
+    def __init__(self, url, endpoint, body_for, timeout):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.endpoint = endpoint
+        self.body_for = body_for
+        self.timeout = timeout
+        self.idle = []
+        self.opened = 0
+        self.sent = 0
+        self.results = []
+        self.recording = False
+
+    async def one(self, scheduled):
+        body = self.body_for(self.sent)
+        self.sent += 1
+        connection = self.idle.pop() if self.idle else Connection(self.host, self.port)
+        if connection.writer is None:
+            self.opened += 1
+        try:
+            status = await asyncio.wait_for(connection.request('POST', self.endpoint, body), self.timeout)
+            self.idle.append(connection)
+        except asyncio.TimeoutError:
+            connection.close()
+            status = 'timeout'
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+            connection.close()
+            status = type(e).__name__
+        if self.recording:
+            self.results.append((time.perf_counter() - scheduled, status))
+
+    async def open_loop(self, rate, duration):
+        """rate requests per second for duration seconds, whatever the response times"""
+        interval = 1.0 / rate
+        start = time.perf_counter()
+        pending = set()
+        for i in range(int(rate * duration)):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.ensure_future(self.one(scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.wait(pending)
+
+    async def closed_loop(self, concurrency, duration):
+        """concurrency clients, each sending its next request when the last one returns"""
+        deadline = time.perf_counter() + duration
+
+        async def client():
+            while time.perf_counter() < deadline:
+                await self.one(time.perf_counter())
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    def close(self):
+        for connection in self.idle:
+            connection.close()
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(results, elapsed):
+    latencies = sorted(latency for latency, status in results if status == 200)
+    statuses = Counter(str(status) for _, status in results)
+    errors = {status: count for status, count in statuses.items() if status != '200'}
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': len(results),
+        'ok': len(latencies),
+        'errors': errors,
+        'error_rate': round(sum(errors.values()) / len(results), 6) if results else None,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': ms(statistics.fmean(latencies)) if latencies else None,
+            'p50': ms(percentile(latencies, 0.50)),
+            'p95': ms(percentile(latencies, 0.95)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+
+def start_server(port, timeout):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1):
+                return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError(f"/health did not answer within {timeout}s")
+
+
+async def run_load(args, url, body_for):
+    load = LoadRun(url, args.endpoint, body_for, args.timeout)
+    try:
+        if args.warmup:
+            if args.rate:
+                await load.open_loop(args.rate, args.warmup)
+            else:
+                await load.closed_loop(args.concurrency, args.warmup)
+        load.recording = True
+        start = time.perf_counter()
+        if args.rate:
+            await load.open_loop(args.rate, args.duration)
+        else:
+            await load.closed_loop(args.concurrency, args.duration)
+        elapsed = time.perf_counter() - start
+    finally:
+        load.close()
+    report = summarize(load.results, elapsed)
+    report['connections_opened'] = load.opened
+    return report
+
+
+def compare(report, baseline, max_regression, max_error_increase):
+    """
+    Relative change per metric (absolute for the error rate); True when p99
+    latency regressed past max_regression or the error rate grew past
+    max_error_increase
+    """
+    changes = {}
+    for key in ('throughput_rps',):
+        old, new = baseline['results'].get(key), report['results'].get(key)
+        if old and new is not None:
+            changes[key] = round(new / old - 1, 4)
+    for key in ('p50', 'p95', 'p99'):
+        old, new = baseline['results']['latency_ms'].get(key), report['results']['latency_ms'].get(key)
+        if old and new is not None:
+            changes[f'latency_{key}'] = round(new / old - 1, 4)
+    old_errors = baseline['results'].get('error_rate') or 0.0
+    new_errors = report['results'].get('error_rate')
+    if new_errors is not None:
+        changes['error_rate'] = round(new_errors - old_errors, 6)
+    regressed = (changes.get('latency_p99', 0.0) > max_regression
+                 or changes.get('error_rate', 0.0) > max_error_increase)
+    return changes, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', default=os.path.join(APP_DIR, 'refugee_data.json'),
+                        help='JSON list or JSON Lines file of refugee profiles to replay')
+    parser.add_argument('--endpoint', default='/match', help='Path to POST each profile to')
+    parser.add_argument('--replay', choices=('unique', 'exact'), default='unique',
+                        help='unique: every request misses the match cache (compare releases with this); '
+                             'exact: replay the profiles as they are')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--rate', type=float, help='Open loop: requests per second')
+    mode.add_argument('--concurrency', type=int, default=16, help='Closed loop: concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds before the run')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds')
+    parser.add_argument('--url', help='Existing server to test instead of launching uvicorn')
+    parser.add_argument('--label', default='', help='Free-form label stored in the report, e.g. a release')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare with')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed relative p99 increase over --baseline')
+    parser.add_argument('--max-error-increase', type=float, default=0.01,
+                        help='Allowed absolute error rate increase over --baseline')
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.profiles)
+    body_for = request_bodies(profiles, args.replay)
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(port, args.timeout * 3)
+        url = f'http://127.0.0.1:{port}'
+    try:
+        results = asyncio.run(run_load(args, url, body_for))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        'label': args.label,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'endpoint': args.endpoint,
+            'mode': 'open' if args.rate else 'closed',
+            'rate': args.rate,
+            'concurrency': None if args.rate else args.concurrency,
+            'duration_seconds': args.duration,
+            'warmup_seconds': args.warmup,
+            'profiles': os.path.relpath(args.profiles),
+            'distinct_profiles': len(profiles),
+            'replay': args.replay,
+            'server': args.url or 'local uvicorn',
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    regressed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        same_load = all(baseline['config'].get(key) == report['config'][key]
+                        for key in ('endpoint', 'mode', 'rate', 'concurrency', 'replay'))
+        changes = None
+        if same_load:
+            changes, regressed = compare(report, baseline, args.max_regression, args.max_error_increase)
+        else:
+            print(f"Not comparing with {args.baseline}: it was taken under a different load", file=sys.stderr)
+        report['baseline'] = {'label': baseline.get('label', ''), 'path': args.baseline,
+                              'same_load': same_load, 'changes': changes, 'regressed': regressed}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        latency = results['latency_ms']
+        print(f"{results['throughput_rps']} req/s, p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+              f"p99 {latency['p99']} ms, error rate {results['error_rate']} -> {args.output}")
+    else:
+        print(text)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Benchmark: brute-force top-k vs. postings + upper-bound pruned top-k on a
+large synthetic destination catalog.
+
+Usage (from the repository root):
+    python benchmarks/bench_pruned_search.py --destinations 100000 --profiles 50 --top-k 10
+"""
+import argparse
+import sys
+import time
+
+from synthetic import synthetic_cohort, synthetic_cities
+
+from catalog import DestinationCatalog  # noqa: E402
+from refugee_matcher import calculate_global_match_score  # noqa: E402
+from ranking import select_top_k  # noqa: E402
+from pruned_search import pruned_top_k  # noqa: E402
+
+
+def brute_force_top_k(refugee, catalog, top_k):
+    """Score every destination and keep the top_k (stable on ties)"""
+    scored = [(dest.id, calculate_global_match_score(refugee, dest)) for dest in catalog]
+    return select_top_k(scored, top_k, key=lambda item: item[1]['total_score'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--destinations', type=int, default=100000)
+    parser.add_argument('--profiles', type=int, default=50)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = DestinationCatalog(synthetic_cities(args.destinations, args.seed))
+    print(f"Catalog build:     {time.perf_counter() - start:.2f}s ({len(catalog):,} destinations)")
+    cohort = synthetic_cohort(args.profiles, args.seed)
+
+    brute_time = pruned_time = 0.0
+    mismatches = 0
+    for refugee in cohort:
+        start = time.perf_counter()
+        expected = brute_force_top_k(refugee, catalog, args.top_k)
+        brute_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = pruned_top_k(refugee, catalog, args.top_k)
+        pruned_time += time.perf_counter() - start
+
+        mismatches += actual != expected
+
+    print(f"Brute force:       {brute_time / len(cohort) * 1000:.1f} ms/profile")
+    print(f"Pruned search:     {pruned_time / len(cohort) * 1000:.1f} ms/profile")
+    print(f"Speedup:           {brute_time / pruned_time:.1f}x")
+    print(f"Mismatched top-k:  {mismatches} of {len(cohort)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
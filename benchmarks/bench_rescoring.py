@@ -0,0 +1,79 @@
+"""
+Benchmark: full rescoring vs. incremental ScoreStore updates after single
+destination changes.
+
+Builds a ScoreStore for a synthetic cohort over a synthetic catalog, then
+changes cost_of_living, job_skills or languages of random destinations and
+compares each update with a full score_matrix() + top-k over the updated
+catalog.
+
+Usage (from the repository root):
+    python benchmarks/bench_rescoring.py --profiles 50000 --destinations 200 --updates 20
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from synthetic import synthetic_cohort, synthetic_cities, LANGUAGES, JOB_SKILLS
+
+from catalog import DestinationCatalog  # noqa: E402
+from batch_scoring import score_matrix  # noqa: E402
+from ranking import top_k_indices  # noqa: E402
+from score_store import ScoreStore  # noqa: E402
+
+
+def random_change(rng):
+    """One field change of the kind the nightly data refresh produces"""
+    field = rng.choice(['cost_of_living', 'job_skills', 'languages'])
+    if field == 'cost_of_living':
+        return {field: rng.randint(3, 10)}
+    vocabulary = JOB_SKILLS if field == 'job_skills' else LANGUAGES
+    return {field: rng.sample(vocabulary, rng.randint(1, 5))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', type=int, default=50000)
+    parser.add_argument('--destinations', type=int, default=200)
+    parser.add_argument('--updates', type=int, default=20)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    catalog = DestinationCatalog(synthetic_cities(args.destinations, args.seed))
+    cohort = synthetic_cohort(args.profiles, args.seed)
+
+    start = time.perf_counter()
+    store = ScoreStore(cohort, catalog, top_k=args.top_k)
+    print(f"Store build:       {time.perf_counter() - start:.2f}s "
+          f"({len(cohort):,} profiles x {len(catalog):,} destinations)")
+
+    rng = random.Random(args.seed)
+    update_time = full_time = 0.0
+    reranked = mismatches = 0
+    for _ in range(args.updates):
+        name = rng.choice(list(store.catalog)).name
+        start = time.perf_counter()
+        result = store.update_destination(name, random_change(rng))
+        update_time += time.perf_counter() - start
+        reranked += result.reranked_rows
+
+        start = time.perf_counter()
+        totals = score_matrix(cohort, store.catalog, components=False)['total_score']
+        rankings = top_k_indices(totals, args.top_k)
+        full_time += time.perf_counter() - start
+        mismatches += not (np.array_equal(totals, store.totals) and np.array_equal(rankings, store.rankings))
+
+    print(f"Full rescore:      {full_time / args.updates * 1000:.1f} ms/update")
+    print(f"Incremental:       {update_time / args.updates * 1000:.1f} ms/update "
+          f"({reranked / args.updates:,.0f} rankings reselected per update)")
+    print(f"Speedup:           {full_time / update_time:.1f}x")
+    print(f"Mismatched stores: {mismatches} of {args.updates}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Benchmark: /match/batch response encoding, NDJSON rows vs. the MessagePack
+and Arrow IPC column streams, in bytes and encode time.
+
+Usage (from the repository root):
+    python benchmarks/bench_wire_formats.py --profiles 50000 --top-k 10
+"""
+import argparse
+import sys
+import time
+
+from synthetic import synthetic_cohort
+
+from serialization import MSGPACK_TYPE, ARROW_STREAM_TYPE, format_available  # noqa: E402
+from wire_format import batch_encoder  # noqa: E402
+from main import matcher, _stream_batch_matches, _stream_batch_columns  # noqa: E402
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', type=int, default=50000)
+    parser.add_argument('--top-k', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cohort = synthetic_cohort(args.profiles, args.seed)
+    states = matcher.state_columns()
+    k = min(args.top_k or len(states['state']), len(states['state']))
+
+    def ndjson():
+        return sum(len(chunk) for chunk, _ in _stream_batch_matches(cohort, args.top_k, args.chunk_size))
+
+    def columns(media):
+        encoder = batch_encoder(media, states, k)
+        return sum(len(chunk) for chunk, _ in _stream_batch_columns(cohort, args.top_k, args.chunk_size, encoder))
+
+    ndjson_time, ndjson_bytes = best_of(args.repeat, ndjson)
+    print(f"{args.profiles:,} profiles, top {k} of {len(states['state'])} states")
+    print(f"{'format':<10} {'bytes':>14} {'size':>7} {'time':>11} {'speed':>7}")
+    print(f"{'ndjson':<10} {ndjson_bytes:>14,} {1:>7.2f} {ndjson_time * 1000:>8.1f} ms {1:>6.1f}x")
+    for name, media in (('msgpack', MSGPACK_TYPE), ('arrow', ARROW_STREAM_TYPE)):
+        if not format_available(media):
+            print(f"{name:<10} not installed")
+            continue
+        elapsed, size = best_of(args.repeat, lambda: columns(media))
+        print(f"{name:<10} {size:>14,} {size / ndjson_bytes:>7.2f} {elapsed * 1000:>8.1f} ms "
+              f"{ndjson_time / elapsed:>6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Synthetic cohorts and destination catalogs for the benchmarks.
+
+Importing this module puts app/ on sys.path so benchmarks can import the
+application modules the same way they import each other.
+"""
+import json
+import os
+import random
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+LANGUAGES = [
+    'English', 'Spanish', 'French', 'German', 'Arabic', 'Chinese', 'Russian', 'Portuguese',
+    'Italian', 'Polish', 'Turkish', 'Persian', 'Somali', 'Swahili', 'Dutch', 'Swedish',
+    'Vietnamese', 'Korean', 'Punjabi', 'Greek', 'Ukrainian', 'Pashto', 'Dari', 'Tigrinya',
+    'Amharic', 'Urdu', 'Hindi', 'Bengali', 'Kurdish', 'Haitian Creole'
+]
+JOB_SKILLS = [
+    'technology', 'engineering', 'healthcare', 'creative', 'education', 'finance', 'tourism',
+    'logistics', 'construction', 'manufacturing', 'agriculture', 'clean_energy', 'film',
+    'aerospace', 'gaming', 'entertainment', 'textiles', 'driving', 'mechanics', 'hospitality',
+    'retail', 'security', 'administration', 'fishing', 'livestock', 'trade'
+]
+HEALTH_REQUIREMENTS = ['general', 'mental_health', 'specialized', 'disability']
+EDUCATION_LEVELS = ['primary', 'secondary', 'vocational', 'bachelors', 'graduate']
+COMMUNITIES = ['Middle Eastern', 'African', 'Asian', 'Eastern European', 'European',
+               'Latin American', 'Caribbean']
+REGIONS = {
+    'Europe': ['Germany', 'France', 'Sweden', 'Netherlands', 'United Kingdom', 'Italy', 'Spain'],
+    'Canada': ['Canada'],
+    'Australia': ['Australia'],
+    'USA': ['USA'],
+}
+
+
+def synthetic_cohort(size, seed=0):
+    """Build a cohort by resampling the generated profiles in app/refugee_data.json"""
+    with open(os.path.join(APP_DIR, 'refugee_data.json')) as f:
+        base_profiles = json.load(f)
+    rng = random.Random(seed)
+    cohort = []
+    for i in range(size):
+        profile = dict(rng.choice(base_profiles))
+        profile['name'] = f"Refugee_{i}"
+        profile['cultural_background'] = rng.choice(
+            ['Middle Eastern', 'Asian', 'African', 'Latin American', profile['cultural_background']])
+        cohort.append(profile)
+    return cohort
+
+
+def synthetic_cities(size, seed=0):
+    """Generate city records shaped like get_global_cities_data() entries"""
+    rng = random.Random(seed)
+    cities = []
+    for i in range(size):
+        region = rng.choice(list(REGIONS))
+        cities.append({
+            "city": f"City_{i}",
+            "country": rng.choice(REGIONS[region]),
+            "region": region,
+            "languages": rng.sample(LANGUAGES, rng.randint(2, 5)),
+            "job_skills": rng.sample(JOB_SKILLS, rng.randint(2, 5)),
+            "education_levels": sorted(rng.sample(EDUCATION_LEVELS, rng.randint(1, 5))),
+            "health_requirements": rng.sample(HEALTH_REQUIREMENTS, rng.randint(1, 3)),
+            "mental_health_support": rng.random() < 0.8,
+            "refugee_communities": rng.sample(COMMUNITIES, rng.randint(1, 4)),
+            "job_market_score": rng.randint(4, 9),
+            "support_services_score": rng.randint(4, 9),
+            "cost_of_living": rng.randint(3, 9)
+        })
+    return cities
@@ -1,6 +1,20 @@
+import argparse
+import io
 import requests
 import json
 
+API_URL = "http://localhost:8000"
+
+# Wire formats for match results. MessagePack needs `pip install msgpack`,
+# Arrow IPC `pip install pyarrow`; both send the scores as columns.
+MEDIA_TYPES = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+MATCH_COLUMNS = ('state', 'match_score', 'language_match', 'job_match', 'education_match', 'health_match',
+                 'mental_health_match', 'job_market_score', 'support_services_score')
+
 def get_refugee_details():
     """Prompt user for refugee details"""
     print("🎯 REFUGEE MATCHING SYSTEM")
@@ -79,9 +93,102 @@ def display_results(result):
         print(f"   📈 Breakdown: Lang({match['language_match']}/10) Job({match['job_match']}/10) Edu({match['education_match']}/10) Health({match['health_match']}/10)")
         print(f"   💼 Job Market: {match['job_market_score']}/10, Support: {match['support_services_score']}/10")
 
-def main():
+def _arrow_responses(content):
+    """MatchResponse dicts from an Arrow IPC stream of match results"""
+    import pyarrow as pa
+    reader = pa.ipc.open_stream(content)
+    total = int(reader.schema.metadata[b'total_states_evaluated'])
+    results = []
+    while True:
+        try:
+            batch, metadata = reader.read_next_batch_with_custom_metadata()
+        except StopIteration:
+            break
+        if metadata is not None and b'error' in metadata:
+            raise RuntimeError(f"Batch stopped after {int(metadata[b'completed'])} profiles: "
+                               f"{metadata[b'error'].decode()}")
+        timestamp = metadata[b'timestamp'].decode() if metadata is not None else None
+        for row in batch.to_pylist():
+            matches = [dict(zip(MATCH_COLUMNS, values)) for values in zip(*(row[column] for column in MATCH_COLUMNS))]
+            results.append({'refugee_name': row['refugee_name'], 'matches': matches,
+                             'top_match': matches[0] if matches else None,
+                             'timestamp': timestamp, 'total_states_evaluated': total})
+    return results
+
+def _msgpack_batch_responses(content):
+    """MatchResponse dicts from a /match/batch MessagePack stream (header map, then one map per chunk)"""
+    import msgpack
+    unpacker = msgpack.Unpacker(io.BytesIO(content), raw=False)
+    header = next(unpacker)
+    states, k = header['states'], header['top_k']
+    results = []
+    for chunk in unpacker:
+        if 'error' in chunk:
+            raise RuntimeError(f"Batch stopped after {chunk['completed']} profiles: {chunk['error']}")
+        for i, name in enumerate(chunk['refugee_name']):
+            matches = []
+            for position in range(i * k, (i + 1) * k):
+                state_id = chunk['state_index'][position]
+                match = {'state': states[state_id]}
+                for column in MATCH_COLUMNS[1:7]:
+                    match[column] = chunk[column][position]
+                match['job_market_score'] = header['job_market_score'][state_id]
+                match['support_services_score'] = header['support_services_score'][state_id]
+                matches.append(match)
+            results.append({'refugee_name': name, 'matches': matches, 'top_match': matches[0] if matches else None,
+                            'timestamp': chunk['timestamp'], 'total_states_evaluated': header['total_states_evaluated']})
+    return results
+
+def decode_match_response(response):
+    """The MatchResponse dict of a /match response, whichever format the server answered in"""
+    content_type = response.headers.get('content-type', '')
+    if content_type.startswith(MEDIA_TYPES['msgpack']):
+        import msgpack
+        result = msgpack.unpackb(response.content, raw=False)
+        # Matches arrive as columns: turn them back into one dict per state
+        columns = result['matches']
+        result['matches'] = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        return result
+    if content_type.startswith(MEDIA_TYPES['arrow']):
+        return _arrow_responses(response.content)[0]
+    return response.json()
+
+def match_batch(profiles, wire_format='msgpack', top_k=None, url=API_URL):
+    """
+    Match many profiles with one /match/batch request, sent and received
+    in wire_format ('json', 'msgpack' or 'arrow'). Returns one MatchResponse
+    dict per profile, in order.
+    """
+    params = {'top_k': top_k} if top_k else {}
+    if wire_format == 'json':
+        response = requests.post(f"{url}/match/batch", json=profiles, params=params, timeout=300)
+        response.raise_for_status()
+        results = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+        if results and 'error' in results[-1]:
+            raise RuntimeError(f"Batch stopped after {results[-1]['completed']} profiles: {results[-1]['error']}")
+        return results
+
+    media_type = MEDIA_TYPES[wire_format]
+    if wire_format == 'msgpack':
+        import msgpack
+        body = msgpack.packb(profiles, use_bin_type=True)
+    else:
+        import pyarrow as pa
+        table = pa.Table.from_pylist(profiles)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        body = sink.getvalue().to_pybytes()
+    response = requests.post(f"{url}/match/batch", data=body, params=params, timeout=300,
+                             headers={'Content-Type': media_type, 'Accept': media_type})
+    response.raise_for_status()
+    if wire_format == 'msgpack':
+        return _msgpack_batch_responses(response.content)
+    return _arrow_responses(response.content)
+
+def main(wire_format='json'):
     # API endpoint
-    url = "http://localhost:8000/match"
+    url = f"{API_URL}/match"
     
     try:
         # Get refugee details from user
@@ -92,11 +199,12 @@ def main():
         print("Please wait while we find the best matching states...")
         
         # Send the request to API
-        response = requests.post(url, json=refugee_data, timeout=30)
+        response = requests.post(url, json=refugee_data, timeout=30,
+                                 headers={'Accept': MEDIA_TYPES[wire_format]})
         
         # Display results
         if response.status_code == 200:
-            result = response.json()
+            result = decode_match_response(response)
             display_results(result)
             
             # Ask if user wants to see more details
@@ -104,7 +212,7 @@ def main():
             see_details = input("\n🔍 Would you like to see details for a specific state? (yes/no): ").strip().lower()
             if see_details in ['yes', 'y']:
                 state_name = input("Enter state name: ").strip()
-                state_url = f"http://localhost:8000/states/{state_name}"
+                state_url = f"{API_URL}/states/{state_name}"
                 state_response = requests.get(state_url)
                 if state_response.status_code == 200:
                     state_info = state_response.json()
@@ -133,14 +241,30 @@ def main():
 
 # Run the interactive matching system
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Interactive refugee matching client")
+    parser.add_argument('--format', choices=sorted(MEDIA_TYPES), default='json',
+                        help="Wire format for match results (msgpack and arrow need msgpack / pyarrow installed)")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Match every profile in a JSON list file with one /match/batch request and exit")
+    args = parser.parse_args()
+
+    if args.batch:
+        with open(args.batch) as f:
+            profiles = json.load(f)
+        for result in match_batch(profiles, wire_format=args.format):
+            top = result['top_match']
+            print(f"{result['refugee_name']}: {top['state']} ({top['match_score']}/10)" if top
+                  else f"{result['refugee_name']}: no match")
+        raise SystemExit(0)
+
+    main(args.format)
     
     # Ask if user wants to run another match
     while True:
         print(f"\n{'='*60}")
         another = input("\n🔄 Would you like to match another refugee? (yes/no): ").strip().lower()
         if another in ['yes', 'y']:
-            main()
+            main(args.format)
         else:
             print("👋 Thank you for using the Refugee Matching System!")
             break
\ No newline at end of file
@@ -1,11 +1,23 @@
+import os
+import sys
 import pandas as pd
-import numpy as np
 from typing import List, Dict, Any
 
+# The scoring primitives are shared with the API and live in src/scoring
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from scoring.state_masks import _popcount, MASK_FIELDS, STATE_SCORE_WEIGHTS, TermVocabulary, ProfileMasks
+
 class RefugeeStateMatcher:
     def __init__(self):
         self.states_data = self._initialize_states_data()
-        self.df = pd.DataFrame(self.states_data)
+        self.vocabularies = {
+            field: TermVocabulary(term for state in self.states_data for term in state[field])
+            for field in MASK_FIELDS
+        }
+        self.state_masks = [self._encode_state(state) for state in self.states_data]
     
     def _initialize_states_data(self) -> List[Dict[str, Any]]:
         """Initialize comprehensive US states demographic data"""
@@ -127,9 +139,10 @@ class RefugeeStateMatcher:
         Match a refugee profile to suitable US states based on multiple criteria
         """
         scores = []
+        refugee_masks = self._encode_refugee(refugee_profile)
         
-        for state in self.states_data:
-            score = self._calculate_match_score(refugee_profile, state)
+        for state, state_masks in zip(self.states_data, self.state_masks):
+            score = self._calculate_match_score(refugee_masks, state_masks)
             scores.append({
                 'state': state['state'],
                 'match_score': score['total_score'],
@@ -145,48 +158,50 @@ class RefugeeStateMatcher:
         results_df = pd.DataFrame(scores)
         return results_df.sort_values('match_score', ascending=False)
     
-    def _calculate_match_score(self, refugee: Dict, state: Dict) -> Dict[str, float]:
+    def _encode_state(self, state: Dict) -> ProfileMasks:
+        """Encode a state's offerings as bitmasks over the interned vocabularies"""
+        return ProfileMasks(
+            languages=self.vocabularies['languages'].encode(state['languages']),
+            job_skills=self.vocabularies['job_skills'].encode(state['job_skills']),
+            health_requirements=self.vocabularies['health_requirements'].encode(state['health_requirements']),
+            education_levels=self.vocabularies['education_levels'].encode(state['education_levels']),
+            mental_health=bool(state['mental_health_support'])
+        )
+    
+    def _encode_refugee(self, refugee: Dict) -> ProfileMasks:
+        """Encode a refugee profile once per request so each state costs an AND plus a popcount"""
+        return ProfileMasks(
+            languages=self.vocabularies['languages'].encode(refugee.get('languages', [])),
+            job_skills=self.vocabularies['job_skills'].encode(refugee.get('job_skills', [])),
+            health_requirements=self.vocabularies['health_requirements'].encode(refugee.get('health_requirements', [])),
+            education_levels=self.vocabularies['education_levels'].bits.get(refugee.get('education_level', ''), 0),
+            mental_health=bool(refugee.get('mental_health_support_needed', False))
+        )
+    
+    def _calculate_match_score(self, refugee: ProfileMasks, state: ProfileMasks) -> Dict[str, float]:
         """Calculate matching scores for different criteria"""
         scores = {}
         
         # Language matching (30% weight)
-        refugee_langs = set(refugee.get('languages', []))
-        state_langs = set(state['languages'])
-        language_overlap = len(refugee_langs.intersection(state_langs))
+        language_overlap = _popcount(refugee.languages & state.languages)
         scores['language_score'] = min(10, language_overlap * 3)  # Max 10 points
         
         # Job skills matching (25% weight)
-        refugee_skills = set(refugee.get('job_skills', []))
-        state_skills = set(state['job_skills'])
-        job_overlap = len(refugee_skills.intersection(state_skills))
+        job_overlap = _popcount(refugee.job_skills & state.job_skills)
         scores['job_score'] = min(10, job_overlap * 2.5)  # Max 10 points
         
         # Education level matching (15% weight)
-        refugee_edu = refugee.get('education_level', '')
-        state_edus = state['education_levels']
-        scores['education_score'] = 10 if refugee_edu in state_edus else 5
+        scores['education_score'] = 10 if refugee.education_levels & state.education_levels else 5
         
         # Health requirements matching (15% weight)
-        refugee_health = set(refugee.get('health_requirements', []))
-        state_health = set(state['health_requirements'])
-        health_overlap = len(refugee_health.intersection(state_health))
+        health_overlap = _popcount(refugee.health_requirements & state.health_requirements)
         scores['health_score'] = min(10, health_overlap * 3)
         
         # Mental health support (15% weight)
-        refugee_needs_mental = refugee.get('mental_health_support_needed', False)
-        state_has_mental = state['mental_health_support']
-        scores['mental_health_score'] = 10 if (not refugee_needs_mental or state_has_mental) else 0
+        scores['mental_health_score'] = 10 if (not refugee.mental_health or state.mental_health) else 0
         
         # Calculate total weighted score
-        weights = {
-            'language_score': 0.3,
-            'job_score': 0.25,
-            'education_score': 0.15,
-            'health_score': 0.15,
-            'mental_health_score': 0.15
-        }
-        
-        total_score = sum(scores[key] * weights[key] for key in scores)
+        total_score = sum(scores[key] * STATE_SCORE_WEIGHTS[key] for key in scores)
         scores['total_score'] = round(total_score, 2)
         
         return scores
@@ -0,0 +1,279 @@
+"""
+Memory accounting for a running server process.
+
+deep_sizeof estimates what an object graph holds (containers, instance
+attributes, numpy arrays, pandas DataFrames), and MemoryTracker reports it
+per named component, alongside the process RSS. MemoryTracker also takes
+named tracemalloc snapshots and diffs two of them by allocation site, to
+find what keeps growing in a long-running server.
+
+Run as a script to query a server's admin endpoints:
+
+    python src/monitoring/memory.py report
+    python src/monitoring/memory.py snapshot before
+    python src/monitoring/memory.py snapshot after
+    python src/monitoring/memory.py diff before after --top 15
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional
+
+# tracemalloc frames kept per allocation; more frames cost more memory and time
+DEFAULT_FRAMES = 10
+# Snapshots are large; the oldest is dropped beyond this
+MAX_SNAPSHOTS = 8
+# Walks of a component that changed size mid-walk (e.g. a cache filled by
+# another thread) before it is reported as an error
+SIZE_ATTEMPTS = 3
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    Bytes held by obj and everything it references, counting each object
+    once. Classes, modules and functions are not followed.
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(current))
+        module = type(current).__module__
+        if module == 'numpy' and hasattr(current, 'nbytes'):
+            # A view's buffer belongs to its base
+            total += sys.getsizeof(current) if getattr(current, 'base', None) is not None else current.nbytes
+            continue
+        if module.startswith('pandas') and hasattr(current, 'memory_usage'):
+            usage = current.memory_usage(deep=True)
+            total += int(usage.sum() if hasattr(usage, 'sum') else usage)
+            continue
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, Mapping):
+            # e.g. MappingProxyType, whose backing dict is only reachable
+            # through the mapping itself
+            stack.extend(current.keys())
+            stack.extend(current.values())
+            if hasattr(current, '__dict__'):
+                stack.append(current.__dict__)
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            if hasattr(current, '__dict__'):
+                stack.append(current.__dict__)
+            for slot in getattr(type(current), '__slots__', ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, where the platform exposes it"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # peak, not current
+
+
+class MemoryTracker:
+    """
+    Per-component memory report and named tracemalloc snapshots.
+
+    Components are registered as callables returning the object(s) to
+    measure, or None when the component is not loaded in this process, so
+    a report never forces anything to load. Objects shared between
+    components are counted in each of them.
+    """
+
+    def __init__(self, frames: int = DEFAULT_FRAMES, max_snapshots: int = MAX_SNAPSHOTS):
+        self.frames = frames
+        self.max_snapshots = max_snapshots
+        self._components = OrderedDict()
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, fn: Callable[[], Any]):
+        self._components[name] = fn
+
+    def components(self) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for name, fn in self._components.items():
+            try:
+                value = fn()
+            except Exception as e:
+                report[name] = {'loaded': False, 'error': str(e)}
+                continue
+            if value is None:
+                report[name] = {'loaded': False, 'bytes': 0}
+                continue
+            for attempt in range(SIZE_ATTEMPTS):
+                try:
+                    report[name] = {'loaded': True, 'bytes': deep_sizeof(value)}
+                    break
+                except RuntimeError as e:  # dict / set changed size during iteration
+                    report[name] = {'loaded': True, 'error': str(e)}
+        return report
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Process RSS, component sizes and tracemalloc status. Each component
+        is walked on its own, so objects shared between components (e.g.
+        catalog records a cache also holds) count once per component and
+        the total is an upper bound.
+        """
+        components = self.components()
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+        return {
+            'pid': os.getpid(),
+            'rss_bytes': rss_bytes(),
+            'components': components,
+            'components_total_bytes': sum(entry.get('bytes', 0) for entry in components.values()),
+            'components_total_note': 'upper bound: objects shared between components count once per component',
+            'tracemalloc': {
+                'tracing': tracemalloc.is_tracing(),
+                'traced_bytes': current,
+                'traced_peak_bytes': peak,
+                'snapshots': list(self._snapshots),
+            },
+        }
+
+    def snapshot(self, label: str) -> Dict[str, Any]:
+        """
+        Take a named tracemalloc snapshot, starting tracing first if needed.
+        Only allocations made after tracing started are seen, so take a
+        baseline snapshot before the period of interest.
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            self._snapshots.pop(label, None)
+            self._snapshots[label] = (time.time(), snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        stats = snapshot.statistics('filename')
+        return {
+            'label': label,
+            'traced_bytes': sum(stat.size for stat in stats),
+            'blocks': sum(stat.count for stat in stats),
+        }
+
+    def diff(self, start: str, end: str, top: int = 20, key_type: str = 'lineno') -> Dict[str, Any]:
+        """Allocation sites that grew (or shrank) the most between two snapshots"""
+        with self._lock:
+            if start not in self._snapshots or end not in self._snapshots:
+                missing = [label for label in (start, end) if label not in self._snapshots]
+                raise KeyError(f"Unknown snapshot: {', '.join(missing)}")
+            start_time, first = self._snapshots[start]
+            end_time, second = self._snapshots[end]
+        changes = second.compare_to(first, key_type)
+        return {
+            'start': start,
+            'end': end,
+            'seconds_between': round(end_time - start_time, 3),
+            'size_diff_bytes': sum(stat.size_diff for stat in changes),
+            'count_diff': sum(stat.count_diff for stat in changes),
+            'top': [_stat_row(stat) for stat in changes[:top]],
+        }
+
+    def reset(self):
+        """Drop every snapshot and stop tracing"""
+        with self._lock:
+            self._snapshots.clear()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+def _stat_row(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        'site': f'{frame.filename}:{frame.lineno}',
+        'size_diff_bytes': stat.size_diff,
+        'size_bytes': stat.size,
+        'count_diff': stat.count_diff,
+        'count': stat.count,
+    }
+
+
+def _format_bytes(value: Optional[int]) -> str:
+    if value is None:
+        return 'n/a'
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(value) < 1024:
+            return f'{value:.0f} {unit}' if unit == 'B' else f'{value:.1f} {unit}'
+        value /= 1024
+    return f'{value:.1f} GiB'
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    import json
+    import urllib.parse
+    import urllib.request
+
+    parser = argparse.ArgumentParser(description='Memory report and tracemalloc snapshots of a running API')
+    parser.add_argument('--url', default='http://localhost:8000', help='API base URL')
+    parser.add_argument('--token', default=os.environ.get('ADMIN_TOKEN'), help='X-Admin-Token (default $ADMIN_TOKEN)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('report', help='Component sizes and RSS')
+    snapshot = commands.add_parser('snapshot', help='Take a named tracemalloc snapshot')
+    snapshot.add_argument('label')
+    diff = commands.add_parser('diff', help='Top allocation sites between two snapshots')
+    diff.add_argument('start')
+    diff.add_argument('end')
+    diff.add_argument('--top', type=int, default=20)
+    commands.add_parser('reset', help='Drop snapshots and stop tracing')
+    args = parser.parse_args(argv)
+
+    base = args.url.rstrip('/') + '/admin/memory'
+    if args.command == 'report':
+        method, url = 'GET', base
+    elif args.command == 'snapshot':
+        method, url = 'POST', f'{base}/snapshots?' + urllib.parse.urlencode({'label': args.label})
+    elif args.command == 'diff':
+        method, url = 'GET', f'{base}/diff?' + urllib.parse.urlencode(
+            {'start': args.start, 'end': args.end, 'top': args.top})
+    else:
+        method, url = 'DELETE', f'{base}/snapshots'
+    request = urllib.request.Request(url, method=method, headers={'X-Admin-Token': args.token or ''})
+    with urllib.request.urlopen(request) as response:
+        result = json.load(response)
+
+    if args.command == 'report':
+        print(f"pid {result['pid']}  rss {_format_bytes(result['rss_bytes'])}")
+        for name, entry in result['components'].items():
+            size = _format_bytes(entry.get('bytes')) if entry['loaded'] else 'not loaded'
+            print(f"  {name:<20} {size}")
+        print(f"  {'total':<20} {_format_bytes(result['components_total_bytes'])}")
+    elif args.command == 'diff':
+        print(f"{result['start']} -> {result['end']} ({result['seconds_between']}s): "
+              f"{_format_bytes(result['size_diff_bytes'])}, {result['count_diff']:+d} blocks")
+        for row in result['top']:
+            print(f"  {_format_bytes(row['size_diff_bytes']):>10}  {row['count_diff']:+7d}  {row['site']}")
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
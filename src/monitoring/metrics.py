@@ -0,0 +1,318 @@
+"""
+Low-overhead, dependency-free metrics in the Prometheus text format.
+
+Counters, gauges and histograms live in a Registry and are rendered by
+Registry.render() for a /metrics endpoint. Values that already exist
+elsewhere (cache counters, worker-pool queue depth, ...) are read at scrape
+time through callback metrics, so the hot path only pays for what it
+actually records: a dict lookup, a bisect and a locked increment.
+"""
+import hashlib
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; fine-grained at the low end, where single-profile stages live
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        """Child for one label combination; bind it once and reuse it on hot paths"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> Iterable[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for suffix, labels, value in self._samples():
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return lines
+
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests served (name it *_total)"""
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield '', _format_labels(self.labelnames, key), child.value
+
+
+class Gauge(Counter):
+    """Value that goes up and down"""
+    type_name = 'gauge'
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> '_Timer':
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies) in cumulative buckets"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                yield '_bucket', _format_labels(self.labelnames, key, le), cumulative
+            yield '_sum', _format_labels(self.labelnames, key), total
+            yield '_count', _format_labels(self.labelnames, key), cumulative
+
+
+class CallbackMetric(_Metric):
+    """
+    Metric read at scrape time from fn(), which returns a number or a
+    {label values tuple: number} dict; None skips the metric.
+    """
+
+    def __init__(self, name: str, documentation: str, fn: Callable, type_name: str = 'gauge',
+                 labelnames: Sequence[str] = ()):
+        self.fn = fn
+        self.type_name = type_name
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def _samples(self):
+        values = self.fn()
+        if values is None:
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in values.items():
+            if value is not None:
+                yield '', _format_labels(self.labelnames, key), value
+
+
+class Registry:
+    """Named set of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, fn: Callable, type_name: str = 'gauge',
+                 labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, fn, type_name, labelnames))
+
+    def render(self) -> bytes:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:  # one failing callback must not break the scrape
+                lines.append(f'# {metric.name} unavailable: {_escape(e)}')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and timing them per route.
+
+    Stores the arrival time in the request state ('received_at', from
+    time.perf_counter) so endpoints can time the stages before them, e.g.
+    body parsing and validation. Routes are labelled by their path template,
+    so path parameters do not create new series.
+    """
+
+    def __init__(self, app, registry: Registry):
+        self.app = app
+        self.requests = registry.counter(
+            'http_requests_total', 'HTTP requests by route, method and status',
+            ('route', 'method', 'status'))
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'HTTP request latency by route', ('route',))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        received = time.perf_counter()
+        scope.setdefault('state', {})['received_at'] = received
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            path = getattr(route, 'path', 'unmatched')
+            self.requests.labels(route=path, method=scope['method'], status=status[0]).inc()
+            self.latency.labels(route=path).observe(time.perf_counter() - received)
+
+
+class FileVersion:
+    """
+    Content hash of a model file, recomputed only when its mtime changes;
+    None while the file does not exist
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime = None
+        self._version = None
+
+    def __call__(self) -> Optional[str]:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            with open(self.path, 'rb') as f:
+                self._version = hashlib.sha1(f.read()).hexdigest()[:12]
+            self._mtime = mtime
+        return self._version
+
+
+def info_values(versions: Dict[str, Callable[[], Optional[str]]]) -> Dict[Tuple[str, str], int]:
+    """{(name, version): 1} for every version callable that currently has a value"""
+    values = {}
+    for name, version in versions.items():
+        current = version()
+        if current is not None:
+            values[(name, current)] = 1
+    return values
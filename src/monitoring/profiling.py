@@ -0,0 +1,185 @@
+"""
+Opt-in profiling of individual requests.
+
+A RequestProfiler decides per request whether to profile it: a configurable
+fraction of requests is sampled at random, and, when allowed, a client can
+ask for one with an `X-Profile: 1` header. Profiled calls run through
+profiled_call, under cProfile (a .pstats file for pstats / snakeviz) or a
+stack sampler (a .collapsed file of folded stacks for flamegraph.pl /
+speedscope), written to a local directory for later analysis.
+
+While sampling is off and the header is not allowed, choosing costs one
+attribute check per request and the call runs unwrapped.
+"""
+import cProfile
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional
+
+MODES = ('cprofile', 'sample')
+PROFILE_HEADER = 'x-profile'
+# Profiled requests between two prunes of the output directory
+PRUNE_EVERY = 20
+# Seconds between stack samples in 'sample' mode
+DEFAULT_SAMPLE_INTERVAL = 0.001
+
+
+class ProfileTarget(NamedTuple):
+    """Where and how to profile one call; picklable for process workers"""
+    path: str  # without extension
+    mode: str
+    interval: float
+
+
+class _StackSampler(threading.Thread):
+    """Folds the stack of one thread into 'outer;...;inner' counts every interval seconds"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def profiled_call(target: ProfileTarget, fn: Callable, *args, **kwargs) -> Any:
+    """Run fn(*args, **kwargs) under the target's profiler and write its output, even if fn raises"""
+    if target.mode == 'sample':
+        sampler = _StackSampler(threading.get_ident(), target.interval)
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+            with open(target.path + '.collapsed', 'w') as f:
+                for stack, count in sampler.counts.most_common():
+                    f.write(f'{stack} {count}\n')
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profile.disable()
+        profile.dump_stats(target.path + '.pstats')
+
+
+class RequestProfiler:
+    """
+    Chooses which requests to profile and where their output goes.
+
+    sample_rate is the fraction of requests profiled at random (0 disables
+    sampling); allow_header lets a request opt in with `X-Profile: 1`. At
+    most max_files profiles are kept in output_dir, oldest removed first.
+    """
+
+    def __init__(self, output_dir: str, sample_rate: float = 0.0, allow_header: bool = False,
+                 mode: str = 'cprofile', interval: float = DEFAULT_SAMPLE_INTERVAL, max_files: int = 200):
+        self.output_dir = output_dir
+        self.max_files = max_files
+        self.configure(sample_rate=sample_rate, allow_header=allow_header, mode=mode, interval=interval)
+        self.profiled = 0
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str = 'PROFILE_', default_dir: str = 'profiles') -> 'RequestProfiler':
+        """Configure from <prefix>DIR, <prefix>SAMPLE_RATE, <prefix>ALLOW_HEADER and <prefix>MODE"""
+        return cls(output_dir=os.environ.get(prefix + 'DIR', default_dir),
+                   sample_rate=float(os.environ.get(prefix + 'SAMPLE_RATE', 0.0)),
+                   allow_header=os.environ.get(prefix + 'ALLOW_HEADER', '').lower() in ('1', 'true', 'yes'),
+                   mode=os.environ.get(prefix + 'MODE', 'cprofile'))
+
+    def configure(self, sample_rate: Optional[float] = None, allow_header: Optional[bool] = None,
+                  mode: Optional[str] = None, interval: Optional[float] = None):
+        """Change any of the settings; None keeps the current value"""
+        if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be > 0")
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if allow_header is not None:
+            self.allow_header = allow_header
+        if mode is not None:
+            self.mode = mode
+        if interval is not None:
+            self.interval = interval
+        self.active = self.sample_rate > 0 or self.allow_header
+
+    def target(self, headers: Mapping[str, str], name: str) -> Optional[ProfileTarget]:
+        """A ProfileTarget if this request should be profiled, else None"""
+        if not self.active:
+            return None
+        requested = self.allow_header and headers.get(PROFILE_HEADER, '').lower() in ('1', 'true', 'yes')
+        if not requested and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        with self._lock:
+            self.profiled += 1
+            sequence = next(self._sequence)
+        # The directory is listed once every PRUNE_EVERY profiles, not on every
+        # request, leaving room for the profiles written until the next prune
+        if sequence % PRUNE_EVERY == 0:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._prune(keep=max(0, self.max_files - PRUNE_EVERY))
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.output_dir, f'{stamp}-{name}-{os.getpid()}-{sequence:06d}')
+        return ProfileTarget(path, self.mode, self.interval)
+
+    def files(self) -> List[str]:
+        """Profile files in output_dir, oldest first"""
+        try:
+            names = [name for name in os.listdir(self.output_dir) if name.endswith(('.pstats', '.collapsed'))]
+        except FileNotFoundError:
+            return []
+        return sorted(names, key=self._mtime)
+
+    def _mtime(self, name: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(self.output_dir, name))
+        except OSError:  # removed by a concurrent prune
+            return 0.0
+
+    def _prune(self, keep: int):
+        files = self.files()
+        for name in files[:max(0, len(files) - keep)]:
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        files = self.files()
+        return {
+            'active': self.active,
+            'sample_rate': self.sample_rate,
+            'allow_header': self.allow_header,
+            'mode': self.mode,
+            'interval': self.interval,
+            'output_dir': os.path.abspath(self.output_dir),
+            'profiled': self.profiled,
+            'files': len(files),
+            'recent_files': files[-10:],
+        }
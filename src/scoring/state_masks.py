@@ -0,0 +1,44 @@
+"""Bitmask encoding and weights for the refugee -> state score, shared by the API and the environment"""
+from typing import NamedTuple
+
+try:
+    _popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def _popcount(value: int) -> int:
+        return bin(value).count("1")
+
+# Profile attributes scored by overlap, interned into per-field bit positions
+MASK_FIELDS = ('languages', 'job_skills', 'health_requirements', 'education_levels')
+
+# Component weights for the state score
+STATE_SCORE_WEIGHTS = {
+    'language_score': 0.3,
+    'job_score': 0.25,
+    'education_score': 0.15,
+    'health_score': 0.15,
+    'mental_health_score': 0.15
+}
+
+class TermVocabulary:
+    """Interned term -> bit mapping for one profile attribute"""
+    def __init__(self, terms):
+        self.bits = {}
+        for term in terms:
+            if term not in self.bits:
+                self.bits[term] = 1 << len(self.bits)
+
+    def encode(self, terms) -> int:
+        """OR together the bits of the known terms; unknown terms can never overlap"""
+        mask = 0
+        bits = self.bits
+        for term in terms:
+            mask |= bits.get(term, 0)
+        return mask
+
+class ProfileMasks(NamedTuple):
+    """Bitmask form of a refugee profile or a state, one mask per MASK_FIELDS entry"""
+    languages: int
+    job_skills: int
+    health_requirements: int
+    education_levels: int
+    mental_health: bool
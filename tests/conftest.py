@@ -0,0 +1,74 @@
+"""
+Shared fixtures. The application modules import each other by module
+name (as uvicorn runs them from app/), so app/ goes on sys.path, and
+src/ too for the shared packages (monitoring, scoring).
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+SRC_DIR = os.path.join(os.path.dirname(APP_DIR), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+with open(os.path.join(APP_DIR, 'refugee_data.json')) as f:
+    BASE_PROFILES = json.load(f)
+
+# City terms: everything the sample profiles use, plus terms none of them has
+LANGUAGES = sorted({term for profile in BASE_PROFILES for term in profile['languages']} | {'Polish', 'Tigrinya'})
+JOB_SKILLS = sorted({term for profile in BASE_PROFILES for term in profile['job_skills']} | {'logistics', 'retail'})
+HEALTH_REQUIREMENTS = ['general', 'mental_health', 'specialized', 'disability']
+EDUCATION_LEVELS = ['primary', 'secondary', 'vocational', 'bachelors', 'graduate']
+COMMUNITIES = ['Afghan', 'Somali', 'Syrian', 'Ukrainian', 'East African', 'Latin American']
+REGIONS = {'Europe': ['Germany', 'France', 'Sweden'], 'Canada': ['Canada'], 'USA': ['USA']}
+
+
+def make_cohort(size, seed=0):
+    """Profiles resampled from app/refugee_data.json, with varied cultural backgrounds"""
+    rng = random.Random(seed)
+    cohort = []
+    for i in range(size):
+        profile = dict(rng.choice(BASE_PROFILES))
+        profile['name'] = f'Refugee_{i}'
+        profile['cultural_background'] = rng.choice(['Middle Eastern', 'African', profile['cultural_background']])
+        cohort.append(profile)
+    return cohort
+
+
+def make_cities(size, seed=0):
+    """City records shaped like get_global_cities_data() entries"""
+    rng = random.Random(seed)
+    cities = []
+    for i in range(size):
+        region = rng.choice(list(REGIONS))
+        cities.append({
+            'city': f'City_{i}',
+            'country': rng.choice(REGIONS[region]),
+            'region': region,
+            'languages': rng.sample(LANGUAGES, rng.randint(1, 6)),
+            'job_skills': rng.sample(JOB_SKILLS, rng.randint(1, 6)),
+            'education_levels': sorted(rng.sample(EDUCATION_LEVELS, rng.randint(1, 4))),
+            'health_requirements': rng.sample(HEALTH_REQUIREMENTS, rng.randint(1, 3)),
+            'mental_health_support': rng.random() < 0.7,
+            'refugee_communities': rng.sample(COMMUNITIES, rng.randint(1, 3)),
+            'job_market_score': rng.randint(4, 9),
+            'support_services_score': rng.randint(4, 9),
+            'cost_of_living': rng.randint(3, 9),
+        })
+    return cities
+
+
+@pytest.fixture
+def cohort():
+    return make_cohort(40, seed=3)
+
+
+@pytest.fixture
+def cities():
+    return make_cities(60, seed=5)
@@ -0,0 +1,223 @@
+import asyncio
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+import main
+import serialization
+from serialization import format_available, MSGPACK_TYPE, ARROW_STREAM_TYPE
+
+client = TestClient(main.app)
+BREAKDOWN = ('state', 'match_score', 'language_match', 'job_match', 'education_match', 'health_match',
+             'mental_health_match', 'job_market_score', 'support_services_score')
+
+needs_msgpack = pytest.mark.skipif(not format_available(MSGPACK_TYPE), reason='needs msgpack')
+needs_arrow = pytest.mark.skipif(not format_available(ARROW_STREAM_TYPE), reason='needs pyarrow')
+
+
+@pytest.fixture
+def profiles(cohort):
+    return cohort[:12]
+
+
+def ndjson_matches(response):
+    return [(line['refugee_name'], line['matches']) for line in map(json.loads, response.text.splitlines())]
+
+
+def test_match_ranks_every_state(profiles):
+    response = client.post('/match', json=profiles[0])
+    assert response.status_code == 200
+    body = response.json()
+    scores = [row['match_score'] for row in body['matches']]
+    assert body['total_states_evaluated'] == len(scores)
+    assert scores == sorted(scores, reverse=True)
+    assert body['top_match'] == body['matches'][0]
+
+    top = client.post('/match?top_k=3', json=profiles[0]).json()
+    assert [row['match_score'] for row in top['matches']] == scores[:3]
+
+
+def test_match_rejects_invalid_profile():
+    assert client.post('/match', json={'name': 'missing fields'}).status_code == 422
+
+
+def test_batch_json_matches_single_requests(profiles):
+    response = client.post('/match/batch?chunk_size=5', json=profiles)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    expected = [(profile['name'], client.post('/match', json=profile).json()['matches']) for profile in profiles]
+    assert ndjson_matches(response) == expected
+
+    ndjson = b'\n'.join(json.dumps(profile).encode() for profile in profiles)
+    response = client.post('/match/batch', content=ndjson, headers={'content-type': 'application/x-ndjson'})
+    assert ndjson_matches(response) == expected
+
+
+def test_batch_rejects_invalid_body():
+    response = client.post('/match/batch', content=b'[{"name": 1', headers={'content-type': 'application/json'})
+    assert response.status_code in (400, 422)
+    assert main.limiter.stats()['batch']['in_flight'] == 0
+
+
+async def call_batch(body, spec_version, client_leaves):
+    """POST /match/batch straight through ASGI, with a client that leaves before the first chunk"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0', 'spec_version': spec_version}, 'http_version': '1.1',
+        'method': 'POST', 'scheme': 'http', 'path': '/match/batch', 'raw_path': b'/match/batch',
+        'query_string': b'', 'root_path': '', 'client': ('testclient', 1), 'server': ('testserver', 80),
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}, {'type': 'http.disconnect'}]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        if client_leaves == 'send fails':
+            raise OSError('connection reset')
+        await asyncio.Event().wait()  # never delivered; the disconnect cancels it
+
+    try:
+        await asyncio.wait_for(main.app(scope, receive, send), timeout=10)
+    except (OSError, ClientDisconnect):
+        pass
+
+
+@pytest.mark.parametrize('spec_version, client_leaves', [('2.4', 'send fails'), ('2.3', 'disconnect message')])
+def test_batch_releases_slot_when_client_leaves_before_first_chunk(profiles, spec_version, client_leaves):
+    before = main.limiter.stats()['batch']
+    for _ in range(before['limit'] + 1):
+        asyncio.run(call_batch(json.dumps(profiles).encode(), spec_version, client_leaves))
+    after = main.limiter.stats()['batch']
+    assert after['in_flight'] == 0
+    assert after['cancelled'] - before['cancelled'] == before['limit'] + 1
+    assert client.post('/match/batch', json=profiles).status_code == 200
+
+
+def test_unoffered_accept_gets_json(profiles):
+    # Types the server does not offer get JSON, as before content negotiation
+    response = client.post('/match', json=profiles[0], headers={'accept': 'text/html'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/json')
+
+
+@needs_msgpack
+def test_batch_msgpack_round_trip(profiles):
+    import msgpack
+    expected = ndjson_matches(client.post('/match/batch?top_k=4', json=profiles))
+    response = client.post('/match/batch?top_k=4&chunk_size=5', content=msgpack.packb(profiles),
+                           headers={'content-type': MSGPACK_TYPE, 'accept': MSGPACK_TYPE})
+    assert response.status_code == 200
+    header, *chunks = msgpack.Unpacker(io.BytesIO(response.content), raw=False)
+    k = header['top_k']
+    got = []
+    for chunk in chunks:
+        for i, name in enumerate(chunk['refugee_name']):
+            rows = []
+            for rank in range(k):
+                state = chunk['state_index'][i * k + rank]
+                row = {column: chunk[column][i * k + rank] for column in BREAKDOWN[1:7]}
+                row.update(state=header['states'][state],
+                           job_market_score=header['job_market_score'][state],
+                           support_services_score=header['support_services_score'][state])
+                rows.append({column: row[column] for column in BREAKDOWN})
+            got.append((name, rows))
+    assert got == expected
+
+
+@needs_arrow
+def test_batch_arrow_round_trip(profiles):
+    import pyarrow as pa
+    expected = ndjson_matches(client.post('/match/batch?top_k=4', json=profiles))
+    table = pa.Table.from_pylist(profiles)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post('/match/batch?top_k=4&chunk_size=5', content=sink.getvalue().to_pybytes(),
+                           headers={'content-type': ARROW_STREAM_TYPE, 'accept': ARROW_STREAM_TYPE})
+    assert response.status_code == 200
+    rows = pa.ipc.open_stream(response.content).read_all().to_pylist()
+    got = [(row['refugee_name'], [dict(zip(BREAKDOWN, values)) for values in zip(*(row[c] for c in BREAKDOWN))])
+           for row in rows]
+    assert got == expected
+
+
+@needs_msgpack
+def test_match_msgpack_response(profiles):
+    import msgpack
+    expected = client.post('/match', json=profiles[0]).json()
+    body = msgpack.unpackb(client.post('/match', json=profiles[0], headers={'accept': MSGPACK_TYPE}).content)
+    columns = body['matches']
+    assert [dict(zip(columns, values)) for values in zip(*columns.values())] == expected['matches']
+
+
+@needs_msgpack
+def test_match_msgpack_body(profiles):
+    import msgpack
+    expected = client.post('/match?top_k=3', json=profiles[0]).json()['matches']
+    response = client.post('/match?top_k=3', content=msgpack.packb(profiles[0]),
+                           headers={'content-type': MSGPACK_TYPE})
+    assert response.status_code == 200
+    assert response.json()['matches'] == expected
+
+    for body in (msgpack.packb(profiles[:2]), b'\xc1'):
+        assert client.post('/match', content=body, headers={'content-type': MSGPACK_TYPE}).status_code == 400
+    invalid = client.post('/match', content=msgpack.packb({'name': 'missing fields'}),
+                          headers={'content-type': MSGPACK_TYPE})
+    assert invalid.status_code == 422
+
+
+@needs_arrow
+def test_match_arrow_body(profiles):
+    import pyarrow as pa
+    expected = client.post('/match?top_k=3', json=profiles[0]).json()['matches']
+    table = pa.Table.from_pylist(profiles[:1])
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post('/match?top_k=3', content=sink.getvalue().to_pybytes(),
+                           headers={'content-type': ARROW_STREAM_TYPE})
+    assert response.status_code == 200
+    assert response.json()['matches'] == expected
+
+
+def test_allocate_respects_capacities(cohort):
+    names = [state['state'] for state in client.get('/states').json()]
+    capacities = {name: 2 for name in names[:6]}
+    response = client.post('/allocate', json={'profiles': cohort[:20], 'capacities': capacities})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['placed'] == 12 and body['unplaced'] == 8
+    assert all(body['state_loads'].get(name, 0) <= capacities.get(name, 0) for name in names)
+    placed = [placement for placement in body['placements'] if placement['state'] is not None]
+    assert len(placed) == 12
+    assert body['objective'] == pytest.approx(sum(placement['match_score'] for placement in placed), abs=0.01)
+
+
+def test_allocate_rejects_unknown_state(cohort):
+    response = client.post('/allocate', json={'profiles': cohort[:2], 'capacities': {'Atlantis': 3}})
+    assert response.status_code == 400
+
+
+def test_states_not_modified():
+    response = client.get('/states')
+    assert response.status_code == 200
+    etag = response.headers['etag']
+    cached = client.get('/states', headers={'if-none-match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+    assert client.get('/states', headers={'if-none-match': '"stale"'}).status_code == 200
+
+    name = response.json()[0]['state']
+    one = client.get(f'/states/{name.upper()}')
+    assert one.status_code == 200
+    assert client.get(f'/states/{name}', headers={'if-none-match': one.headers['etag']}).status_code == 304
+
+
+def test_json_encoder_reported():
+    encoder = client.get('/health').json()['json_encoder']
+    assert encoder == ('orjson' if serialization.orjson is not None else 'json')
+    assert f'json_encoder_info{{encoder="{encoder}"}} 1' in client.get('/metrics').text
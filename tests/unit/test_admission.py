@@ -0,0 +1,49 @@
+import pickle
+
+import pytest
+
+from admission import (ConcurrencyLimiter, Deadline, DeadlineExceeded, LimitExceeded, RequestCancelled,
+                       deadline_from_headers)
+
+def test_limiter_counts_slots_and_outcomes():
+    limiter = ConcurrencyLimiter({'match': 2, 'batch': 1})
+    limiter.acquire('match')
+    with limiter.admit('match'):
+        with pytest.raises(LimitExceeded):
+            limiter.acquire('match')
+        assert limiter.stats()['match']['in_flight'] == 2
+    limiter.release('match')
+    for outcome in (DeadlineExceeded(), RequestCancelled(), KeyError('x')):
+        with pytest.raises(type(outcome)):
+            with limiter.admit('batch'):
+                raise outcome
+
+    match, batch = limiter.stats()['match'], limiter.stats()['batch']
+    assert (match['in_flight'], match['admitted'], match['rejected'], match['limit']) == (0, 2, 1, 2)
+    assert (batch['in_flight'], batch['admitted']) == (0, 3)
+    assert (batch['deadline_exceeded'], batch['cancelled'], batch['failed']) == (1, 1, 1)
+
+
+def test_deadline_pickles_remaining_time_but_not_cancel_flag():
+    deadline = Deadline(30)
+    deadline.cancel('cancelled: client disconnected')
+    copy = pickle.loads(pickle.dumps(deadline))
+    assert 29 < copy.remaining() <= 30
+    assert not copy.cancelled
+    copy.check()
+    with pytest.raises(RequestCancelled):
+        deadline.check()
+
+
+def test_expired_deadline_raises():
+    deadline = Deadline(0)
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+    assert pickle.loads(pickle.dumps(deadline)).expired()
+
+
+def test_deadline_from_headers_is_capped():
+    assert deadline_from_headers({'x-request-timeout': '5'}, 2, 10).remaining() == pytest.approx(5, abs=0.1)
+    assert deadline_from_headers({'x-request-timeout': '50'}, 2, 10).remaining() == pytest.approx(10, abs=0.1)
+    assert deadline_from_headers({'x-request-timeout': 'soon'}, 2, 10).remaining() == pytest.approx(2, abs=0.1)
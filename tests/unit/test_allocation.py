@@ -0,0 +1,49 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from allocation import solve_capacitated_assignment
+
+
+def brute_force_objective(scores, capacities):
+    n, m = scores.shape
+    best = 0.0
+    for assignment in itertools.product(range(-1, m), repeat=n):
+        loads = np.bincount([site for site in assignment if site >= 0], minlength=m)
+        if (loads <= capacities).all():
+            best = max(best, sum(scores[i, site] for i, site in enumerate(assignment) if site >= 0))
+    return round(best, 2)
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n, m = rng.integers(1, 7), rng.integers(1, 4)
+    # Few distinct values, so identical rows get merged into classes
+    scores = rng.choice([5.0, 12.5, 20.25, 33.0, 47.75], size=(n, m))
+    capacities = rng.integers(0, 3, size=m)
+    result = solve_capacitated_assignment(scores, capacities)
+
+    assert result.objective == pytest.approx(brute_force_objective(scores, capacities))
+    assert (result.loads <= capacities).all()
+    assert result.placed == min(n, int(capacities.sum()))
+    placed = result.assignment >= 0
+    assert np.array_equal(result.match_scores[placed], scores[placed, result.assignment[placed]])
+
+
+def test_rejects_bad_capacities():
+    with pytest.raises(ValueError):
+        solve_capacitated_assignment(np.ones((2, 3)), [1, 1])
+    with pytest.raises(ValueError):
+        solve_capacitated_assignment(np.ones((2, 2)), [1, -1])
+
+
+def test_check_abandons_the_solve():
+    scores = np.random.default_rng(0).uniform(1, 50, size=(30, 3))
+
+    def check():
+        raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        solve_capacitated_assignment(scores, [5, 5, 5], check=check)
@@ -0,0 +1,25 @@
+import sys
+from types import MappingProxyType
+
+from monitoring.memory import MemoryTracker, deep_sizeof
+
+
+def test_deep_sizeof_counts_contents():
+    payload = list(range(10000))
+    assert deep_sizeof({'a': payload}) > deep_sizeof(payload) > sys.getsizeof(payload)
+
+
+def test_deep_sizeof_walks_mapping_proxies():
+    payload = list(range(10000))
+    assert deep_sizeof(MappingProxyType({'a': payload})) >= deep_sizeof(payload)
+
+
+def test_report_total_counts_shared_objects_per_component():
+    shared = list(range(1000))
+    tracker = MemoryTracker()
+    tracker.register('first', lambda: shared)
+    tracker.register('second', lambda: {'rows': shared})
+    report = tracker.report()
+    assert report['components_total_bytes'] == sum(entry['bytes'] for entry in report['components'].values())
+    assert report['components_total_bytes'] >= 2 * deep_sizeof(shared)
+    assert 'upper bound' in report['components_total_note']
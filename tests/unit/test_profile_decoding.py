@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from main import RefugeeProfile
+from profile_decoding import BatchProfileDecoder
+
+decoder = BatchProfileDecoder(RefugeeProfile)
+pytestmark = pytest.mark.skipif(not decoder.available, reason='needs pydantic 2')
+
+
+def test_json_list_matches_model_dicts(cohort):
+    # Optional fields left out entirely must come back with their defaults
+    profiles = [{key: value for key, value in profile.items() if key != 'family_size'} for profile in cohort[:5]]
+    profiles += cohort[5:]
+    expected = [RefugeeProfile(**item).model_dump() for item in profiles]
+    assert decoder.decode(json.dumps(profiles).encode()) == expected
+    assert decoder.decode(json.dumps({'profiles': profiles}).encode()) == expected
+
+
+def test_ndjson_matches_model_dicts(cohort):
+    body = b'\n'.join(json.dumps(profile).encode() for profile in cohort) + b'\n\n'
+    assert decoder.decode(body, ndjson=True) == [RefugeeProfile(**item).model_dump() for item in cohort]
+
+
+@pytest.mark.parametrize('body, ndjson', [
+    (b'[{"name": "x"}]', False),
+    (b'"not a list"', False),
+    (b'[1, 2', False),
+    (b'{"name": "a"} {"name": "b"}', True),
+])
+def test_invalid_bodies_fall_back(body, ndjson):
+    assert decoder.decode(body, ndjson=ndjson) is None
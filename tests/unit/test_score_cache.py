@@ -0,0 +1,39 @@
+from score_cache import STATE_PROFILE_FIELDS, ScoreCache, canonical_profile_key
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = ScoreCache(maxsize=2)
+    cache.get_or_compute(('a',), 'v1', lambda: 1)
+    cache.get_or_compute(('b',), 'v1', lambda: 2)
+    assert cache.get_or_compute(('a',), 'v1', lambda: 'recomputed') == 1
+    cache.get_or_compute(('c',), 'v1', lambda: 3)
+
+    assert cache.get_or_compute(('a',), 'v1', lambda: 'recomputed') == 1
+    assert cache.get_or_compute(('b',), 'v1', lambda: 'recomputed') == 'recomputed'
+    stats = cache.stats()
+    assert stats['size'] == 2
+    assert stats['hits'] == 2
+    assert stats['misses'] == 4
+    assert stats['evictions'] == 2
+
+
+def test_new_version_invalidates_entries():
+    cache = ScoreCache(maxsize=4)
+    cache.get_or_compute(('a',), 'v1', lambda: 1)
+    assert cache.get_or_compute(('a',), 'v2', lambda: 2) == 2
+    assert cache.get_or_compute(('a',), 'v2', lambda: 3) == 2
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_zero_maxsize_never_stores():
+    cache = ScoreCache(maxsize=0)
+    cache.get_or_compute(('a',), 'v1', lambda: 1)
+    assert cache.get_or_compute(('a',), 'v1', lambda: 2) == 2
+    assert cache.stats()['size'] == 0
+
+
+def test_canonical_key_ignores_order_and_unused_fields(cohort):
+    profile = dict(cohort[0], languages=['English', 'Arabic'])
+    reordered = dict(profile, languages=['Arabic', 'English'], name='someone else')
+    assert canonical_profile_key(profile, STATE_PROFILE_FIELDS) == \
+        canonical_profile_key(reordered, STATE_PROFILE_FIELDS)
@@ -0,0 +1,128 @@
+import numpy as np
+
+from batch_scoring import score_matrix
+from catalog import DestinationCatalog
+from pruned_search import pruned_top_k
+from refugee_matcher import calculate_global_match_score
+from score_store import ScoreStore
+
+PINNED_PROFILES = [
+    {'name': 'Amal', 'languages': ['Arabic', 'English', 'French', 'German', 'Spanish'],
+     'job_skills': ['healthcare', 'education'], 'education_level': 'bachelors',
+     'health_requirements': ['general', 'mental_health'], 'mental_health_support_needed': True,
+     'cultural_background': 'Syrian', 'family_size': 5},
+    {'name': 'Dawit', 'languages': ['Somali'], 'job_skills': ['driving', 'construction', 'fishing'],
+     'education_level': 'primary', 'health_requirements': [], 'mental_health_support_needed': False,
+     'cultural_background': 'African', 'family_size': 3},
+    # Optional attributes left out fall back to the score function's defaults
+    {'name': 'Olena', 'languages': ['Ukrainian', 'Russian'], 'job_skills': ['technology'],
+     'education_level': 'graduate', 'health_requirements': ['specialized'],
+     'mental_health_support_needed': True},
+]
+PINNED_CITIES = [
+    {'city': 'Lyon', 'country': 'France', 'region': 'Europe',
+     'languages': ['French', 'English', 'Arabic', 'German', 'Spanish'], 'job_skills': ['healthcare'],
+     'education_levels': ['bachelors', 'graduate'], 'health_requirements': ['general', 'mental_health'],
+     'mental_health_support': True, 'refugee_communities': ['Syrian', 'North African'],
+     'job_market_score': 7, 'support_services_score': 8, 'cost_of_living': 8},
+    {'city': 'Minneapolis', 'country': 'USA', 'region': 'USA',
+     'languages': ['English', 'Somali'], 'job_skills': ['driving', 'construction', 'healthcare'],
+     'education_levels': ['secondary'], 'health_requirements': ['general'],
+     'mental_health_support': False, 'refugee_communities': ['East African', 'Hmong'],
+     'job_market_score': 8, 'support_services_score': 6, 'cost_of_living': 7},
+    {'city': 'Warsaw', 'country': 'Poland', 'region': 'Europe',
+     'languages': ['Polish', 'Ukrainian', 'Russian'], 'job_skills': ['technology', 'logistics'],
+     'education_levels': ['primary', 'graduate'], 'health_requirements': ['specialized', 'general'],
+     'mental_health_support': False, 'refugee_communities': ['Ukrainian'],
+     'job_market_score': 6, 'support_services_score': 5, 'cost_of_living': 5},
+]
+# Scores of the original per-pair calculate_global_match_score, before any
+# of the scoring rewrites
+PINNED_TOTALS = [
+    [6.93, 2.65, 1.45],
+    [2.2, 4.08, 2.75],
+    [3.0, 1.25, 4.33],
+]
+PINNED_BREAKDOWN = {
+    'language_score': 2.5, 'job_score': 5.0, 'education_score': 5, 'health_score': 0,
+    'mental_health_score': 10, 'cultural_score': 10, 'cost_adjustment': -1, 'total_score': 4.08,
+}
+
+
+def test_per_pair_scores_match_pinned_values():
+    totals = [[calculate_global_match_score(profile, city)['total_score'] for city in PINNED_CITIES]
+              for profile in PINNED_PROFILES]
+    assert totals == PINNED_TOTALS
+    assert calculate_global_match_score(PINNED_PROFILES[1], PINNED_CITIES[1]) == PINNED_BREAKDOWN
+
+
+def test_per_pair_scores_from_catalog_and_partial_records():
+    catalog = DestinationCatalog(PINNED_CITIES)
+    assert [calculate_global_match_score(PINNED_PROFILES[0], dest)['total_score'] for dest in catalog] \
+        == PINNED_TOTALS[0]
+    # Only the keys the score reads are required, as in the original
+    unscored = ('city', 'country', 'region', 'job_market_score', 'support_services_score')
+    partial = {key: value for key, value in PINNED_CITIES[1].items() if key not in unscored}
+    assert calculate_global_match_score(PINNED_PROFILES[1], partial) == PINNED_BREAKDOWN
+
+
+def test_score_matrix_matches_pinned_values():
+    matrix = score_matrix(PINNED_PROFILES, PINNED_CITIES)
+    assert matrix['total_score'].tolist() == PINNED_TOTALS
+    assert {key: matrix[key][1, 1] for key in PINNED_BREAKDOWN} == PINNED_BREAKDOWN
+
+
+def test_score_matrix_matches_per_pair_scores(cohort, cities):
+    matrix = score_matrix(cohort, cities, chunk_size=7)
+    for i, profile in enumerate(cohort):
+        for j, city in enumerate(cities):
+            expected = calculate_global_match_score(profile, city)
+            for key, value in expected.items():
+                assert matrix[key][i, j] == value, (i, j, key)
+
+
+def test_score_matrix_totals_only(cohort, cities):
+    totals = score_matrix(cohort, cities, components=False)
+    assert list(totals) == ['total_score']
+    assert np.array_equal(totals['total_score'], score_matrix(cohort, cities)['total_score'])
+
+
+def exhaustive_top_k(profile, catalog, top_k):
+    scored = [(calculate_global_match_score(profile, dest)['total_score'], dest.id) for dest in catalog]
+    # Stable sort on score alone keeps ties in catalog order
+    return [(dest_id, score) for score, dest_id in sorted(scored, key=lambda row: -row[0])[:top_k]]
+
+
+def test_pruned_top_k_matches_exhaustive_search(cohort, cities):
+    catalog = DestinationCatalog(cities)
+    for top_k in (1, 5, len(cities) + 3):
+        for profile in cohort:
+            rows = pruned_top_k(profile, catalog, top_k)
+            assert [(dest_id, result['total_score']) for dest_id, result in rows] == \
+                exhaustive_top_k(profile, catalog, top_k)
+
+
+def test_pruned_top_k_within_candidates(cohort, cities):
+    catalog = DestinationCatalog(cities)
+    candidates = list(range(0, len(cities), 3))
+    for profile in cohort[:10]:
+        rows = pruned_top_k(profile, catalog, 4, candidate_ids=candidates)
+        expected = [row for row in exhaustive_top_k(profile, catalog, len(cities)) if row[0] in candidates][:4]
+        assert [(dest_id, result['total_score']) for dest_id, result in rows] == expected
+
+
+def test_score_store_update_matches_full_rescore(cohort, cities):
+    store = ScoreStore(cohort, DestinationCatalog(cities), top_k=5)
+    updates = [
+        ('City_3', {'languages': ['Somali', 'English']}),
+        ('City_10', {'job_skills': ['fishing'], 'cost_of_living': 9}),
+        ('City_3', {'mental_health_support': False, 'refugee_communities': ['Afghan']}),
+        ('City_7', {'job_market_score': 2}),
+    ]
+    for name, changes in updates:
+        store.update_destination(name, changes)
+        full = score_matrix(cohort, store.catalog.records(), components=False)['total_score']
+        assert np.array_equal(store.totals, full)
+        for row in range(len(cohort)):
+            expected = sorted(range(len(cities)), key=lambda j: -full[row, j])[:5]
+            assert [full[row, j] for j in store.rankings[row]] == [full[row, j] for j in expected]
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from admission import Deadline, DeadlineExceeded
+from single_flight import SingleFlight
+
+def test_single_flight_shares_one_result():
+    flights = SingleFlight()
+    calls = []
+
+    async def compute(shared):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return object()
+
+    async def main():
+        return await asyncio.gather(*(flights.do('key', compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    stats = flights.stats()
+    assert (stats['leaders'], stats['coalesced'], stats['in_flight'], stats['failed']) == (1, 4, 0, 0)
+
+
+def test_single_flight_shares_exceptions():
+    flights = SingleFlight()
+
+    async def compute(shared):
+        await asyncio.sleep(0.05)
+        raise ValueError('bad profile')
+
+    async def main():
+        return await asyncio.gather(*(flights.do('key', compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.stats()['failed'] == 1
+
+
+def test_single_flight_runs_under_the_longest_deadline():
+    flights = SingleFlight()
+    shared_deadlines = []
+
+    async def compute(shared):
+        shared_deadlines.append(shared)
+        await asyncio.sleep(0.2)
+        shared.check()
+        return 'done'
+
+    async def main():
+        short = asyncio.ensure_future(flights.do('key', compute, Deadline(0.05)))
+        await asyncio.sleep(0.01)
+        long = asyncio.ensure_future(flights.do('key', compute, Deadline(2)))
+        return await asyncio.gather(short, long, return_exceptions=True)
+
+    started = time.monotonic()
+    short, long = asyncio.run(main())
+    assert isinstance(short, DeadlineExceeded)
+    assert long == 'done'
+    assert len(shared_deadlines) == 1
+    assert time.monotonic() - started < 1
+
+
+def test_single_flight_cancels_work_nobody_waits_for():
+    flights = SingleFlight()
+    shared_deadlines = []
+
+    async def compute(shared):
+        shared_deadlines.append(shared)
+        await asyncio.sleep(0.2)
+        return 'done'
+
+    async def main():
+        with pytest.raises(DeadlineExceeded):
+            await flights.do('key', compute, Deadline(0.02))
+        assert flights.stats()['in_flight'] == 0
+        return await flights.do('key', compute, Deadline(2))
+
+    assert asyncio.run(main()) == 'done'
+    assert len(shared_deadlines) == 2
+    assert shared_deadlines[0].cancelled and not shared_deadlines[1].cancelled